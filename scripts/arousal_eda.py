@@ -17,6 +17,7 @@ from awear_neuroscience.data_extraction.constants import (
 
 from awear_neuroscience.data_extraction.firestore_loader import  process_eeg_records
 from awear_neuroscience.pipeline.preprocess import process_long_df, extract_features_from_long_df, process_features
+from awear_neuroscience.pipeline.memo import StageCache
 from awear_neuroscience.statistical_analysis.statistical_tests import compare_session_types
 from awear_neuroscience.data_extraction.firestore_loader import get_selreport_data
 
@@ -36,42 +37,54 @@ firestore_client = firestore.Client()
 
 
 
+# Stage outputs are memoized on disk: rerunning with a new alpha or
+# columns_to_normalize only recomputes process_features
+cache = StageCache(os.getenv("AWEAR_CACHE_DIR", ".awear_cache"))
+
+
 # Download all the EEG records for sessions_of_interest
+def download_records(firestore_client, emails, time_ranges, sessions_of_interest):
+    raw_records=[]
+    for email in emails:
+        raw_records.extend(get_selreport_data(
+                firestore_client=firestore_client, 
+                collection_name=os.getenv("COLLECTION_NAME"), 
+                document_name=email, 
+                time_ranges=time_ranges, 
+                sessions_of_interest=sessions_of_interest))
+    return raw_records
 
 emails=["cristiana.principato@gmail.com", "f.morrone980@gmail.com", "antonio.forenza@gmail.com", "simone.balatti@gmail.com"]
 # emails=["simone.balatti@gmail.com"]
 sessions_of_interest=["calm", "stressed"]
-now = datetime.now()
+# Hour resolution keeps the download cached between runs within the hour
+now = datetime.now().replace(minute=0, second=0, microsecond=0)
 start=datetime.fromisocalendar(2025, 1, 1)
 time_ranges = [(start, now)] 
-raw_records=[]
-for email in emails:
-    raw_records.extend(get_selreport_data(
-            firestore_client=firestore_client, 
-            collection_name=os.getenv("COLLECTION_NAME"), 
-            document_name=email, 
-            time_ranges=time_ranges, 
-            sessions_of_interest=sessions_of_interest))
+raw_records = cache.run(
+    "download", download_records,
+    firestore_client=firestore_client, emails=emails, time_ranges=time_ranges,
+    sessions_of_interest=sessions_of_interest, cache_ignore=("firestore_client",))
 
 
 
 
 
 # Transform raw records into a DataFrame 
-long_df = process_eeg_records(raw_records, return_long=True)
+long_df = cache.run("long_df", process_eeg_records, raw_records, return_long=True)
 # Apply segment-wise filtering and artifacts detection
-long_df = process_long_df(long_df,SAMPLING_RATE, artifacts_detection_method='amplitude', amplitude_threshold=20)
+long_df = cache.run("filter", process_long_df, long_df, SAMPLING_RATE, artifacts_detection_method='amplitude', amplitude_threshold=20)
 
 
 
 
 # Extract features
-features_df = extract_features_from_long_df(long_df, SAMPLING_RATE)
+features_df = cache.run("features", extract_features_from_long_df, long_df, SAMPLING_RATE)
 
 # Apply exponential moving averavge, normalization and generates time-based features
 N=15 # window size for the ema filter
 alpha=2/(N+1) # smoothing factor for the ema filter - rule of thumb
 print(f'smoothing factor: {alpha}')
 columns_to_normalize = ['gamma_fil', 'gamma1_fil', 'gamma2_fil' ]
-features_df = process_features(features_df, alpha, columns_to_normalize)
+features_df = cache.run("smooth", process_features, features_df, alpha, columns_to_normalize).value
 features_df.head()
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+Benchmark process_long_df on synthetic recordings of increasing length.
+
+The stage should scale linearly with the amount of data, so the time per
+hour of recording must stay flat from 1 h to 24 h. The script exits with
+status 1 when the longest run costs more per hour than ``--tolerance`` times
+the shortest one.
+
+    python scripts/benchmark_preprocess.py --hours 1 8 24 --tolerance 1.5
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from setup_path import add_src_to_path
+
+add_src_to_path()
+
+from awear_neuroscience.data_extraction.constants import SAMPLING_RATE  # noqa: E402
+from awear_neuroscience.pipeline.preprocess import process_long_df  # noqa: E402
+
+
+def make_long_df(hours: float, fs: int = SAMPLING_RATE, seed: int = 0) -> pd.DataFrame:
+    """Loader-shaped long frame: one contiguous block of `fs` rows per second."""
+    n_segments = int(hours * 3600)
+    rng = np.random.default_rng(seed)
+    t0 = pd.Timestamp("2025-07-01T00:00:00Z")
+    times = t0 + pd.to_timedelta(np.arange(n_segments), unit="s")
+    segments = np.array([f"seg_{i}" for i in range(n_segments)], dtype=object)
+    t = np.arange(n_segments * fs) / fs
+    signal = rng.normal(0, 5, t.size) + 10 * np.sin(2 * np.pi * 10 * t)
+    return pd.DataFrame(
+        {
+            "waveform_value": signal.astype(np.float32),
+            "segment": np.repeat(segments, fs),
+            "time_UTC": np.repeat(times, fs),
+            "time_sample": np.tile(np.arange(fs) / fs, n_segments),
+            "focus_type": "calm",
+            "document_name": "bench@eeg.com",
+            "session_id": 0,
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hours", type=float, nargs="+", default=[1, 8, 24])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="largest allowed ratio of per-hour cost, longest / shortest run",
+    )
+    args = parser.parse_args()
+
+    print(f"{'hours':>6} {'rows':>12} {'seconds':>9} {'s / hour':>9} {'Mrows/s':>8}")
+    per_hour = []
+    for hours in args.hours:
+        long_df = make_long_df(hours)
+        best = np.inf
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            process_long_df(long_df, SAMPLING_RATE)
+            best = min(best, time.perf_counter() - start)
+        per_hour.append(best / hours)
+        print(
+            f"{hours:>6g} {len(long_df):>12,d} {best:>9.2f} "
+            f"{best / hours:>9.2f} {len(long_df) / best / 1e6:>8.2f}"
+        )
+        del long_df
+
+    # Linear scaling keeps the cost per hour constant
+    order = np.argsort(args.hours)
+    ratio = per_hour[order[-1]] / per_hour[order[0]]
+    print(f"cost per hour, longest / shortest: {ratio:.2f}x")
+    if ratio > args.tolerance:
+        print(
+            f"FAIL: per-hour cost grew {ratio:.2f}x "
+            f"(tolerance {args.tolerance:g}x); scaling is not linear"
+        )
+        sys.exit(1)
+    print(f"OK: within {args.tolerance:g}x")
+
+
+if __name__ == "__main__":
+    main()
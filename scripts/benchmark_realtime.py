@@ -0,0 +1,63 @@
+"""
+Benchmark the real-time scoring engine on simulated 1-second streams.
+
+Every user sends one segment per tick; the report shows the per-stage and
+end-to-end latency, which should stay in single-digit milliseconds per
+segment on one core.
+
+    python scripts/benchmark_realtime.py --users 1 10 50 --seconds 60
+"""
+
+import argparse
+import asyncio
+
+import numpy as np
+from setup_path import add_src_to_path
+
+add_src_to_path()
+
+from awear_neuroscience.data_extraction.constants import SAMPLING_RATE  # noqa: E402
+from awear_neuroscience.pipeline.realtime import ScoringEngine  # noqa: E402
+
+
+async def simulate(n_users: int, seconds: int, fs: int = SAMPLING_RATE) -> dict:
+    rng = np.random.default_rng(0)
+    t = np.arange(fs) / fs
+    alpha_wave = 10 * np.sin(2 * np.pi * 10 * t)
+
+    async def discard(score):
+        pass
+
+    async with ScoringEngine(fs, 2 / 16, on_result=discard) as engine:
+        for second in range(seconds):
+            for user in range(n_users):
+                wf = (rng.normal(0, 5, fs) + alpha_wave).astype(np.float32)
+                await engine.submit(f"user{user}@eeg.com", wf, second)
+            # One tick: let the workers catch up before the next second arrives
+            await engine.drain()
+    return engine.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--seconds", type=int, default=60)
+    args = parser.parse_args()
+
+    for n_users in args.users:
+        stats = asyncio.run(simulate(n_users, args.seconds))
+        total = stats["end_to_end"]
+        print(
+            f"{n_users} users: {total['count']} segments, "
+            f"mean {total['mean_ms']:.2f} ms, p99 {total['p99_ms']:.2f} ms, "
+            f"dropped {sum(stats['dropped'].values())}"
+        )
+        for stage, hist in stats["stages"].items():
+            print(
+                f"  {stage:>8}: mean {hist['mean_ms']:.3f} ms, "
+                f"p99 {hist['p99_ms']:.3f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,12 @@ Replicates the functionality of session_browser.py in a web interface.
 import os
 import json
 import base64
+import threading
+import time
+from collections import OrderedDict
 from io import BytesIO
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Hashable, List, Optional
 
 import firebase_admin
 from firebase_admin import credentials, firestore
@@ -40,6 +43,79 @@ firestore_client = firestore.Client()
 print("Firebase initialized for web app")
 
 
+class LRUCache:
+    """
+    Thread-safe in-memory cache holding at most `maxsize` entries, evicting
+    the least recently used first. With `ttl` (seconds), entries also expire
+    that long after they were stored.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            expired = self.ttl is not None and entry is not None \
+                and time.monotonic() > entry[0]
+            if expired:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value of `key`, computing and storing it on a miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'size': len(self._entries), 'maxsize': self.maxsize,
+                'ttl': self.ttl, 'hits': self.hits, 'misses': self.misses}
+
+
+# Recent-session lists change as sessions are recorded, so they expire;
+# finished sessions never change, so their processed views are kept until
+# evicted
+recent_sessions_cache = LRUCache(
+    maxsize=int(os.getenv("WEB_SESSIONS_CACHE_SIZE", "64")),
+    ttl=float(os.getenv("WEB_SESSIONS_TTL", "60")),
+)
+session_view_cache = LRUCache(maxsize=int(os.getenv("WEB_SESSION_CACHE_SIZE", "32")))
+session_doc_cache = LRUCache(maxsize=int(os.getenv("WEB_SESSION_DOC_CACHE_SIZE", "512")))
+
+PAGE_SIZE = 20
+
+
 def get_available_emails() -> List[str]:
     """Get list of available emails from environment variable."""
     emails_str = os.getenv("EMAILS", "")
@@ -48,22 +124,71 @@ def get_available_emails() -> List[str]:
     return [email.strip() for email in emails_str.split(",")]
 
 
-def get_recent_sessions(email: str, limit: int = 20) -> List[Dict[str, Any]]:
-    """Get recent sessions for a user."""
+def sessions_collection(email: str):
     col_ref = firestore_client.collection(os.getenv("COLLECTION_NAME"))
-    subcol = col_ref.document(email).collection("focus_sessions")
-    
-    query = subcol.order_by("timestamp", direction=firestore.Query.DESCENDING).limit(limit)
+    return col_ref.document(email).collection("focus_sessions")
+
+
+def get_recent_sessions(
+    email: str, limit: int = PAGE_SIZE, after: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Get a page of a user's sessions, newest first (cached for
+    WEB_SESSIONS_TTL seconds). `after` is the document id of the last
+    session of the previous page; the query starts right after that
+    document instead of rescanning the earlier pages.
+    """
+    return recent_sessions_cache.get_or_set(
+        (email, limit, after), lambda: _query_recent_sessions(email, limit, after)
+    )
+
+
+def _query_recent_sessions(
+    email: str, limit: int, after: Optional[str]
+) -> List[Dict[str, Any]]:
+    collection = sessions_collection(email)
+    # The document id breaks timestamp ties, so no session falls between pages
+    query = collection.order_by(
+        "timestamp", direction=firestore.Query.DESCENDING
+    ).order_by("__name__", direction=firestore.Query.DESCENDING)
+    if after:
+        cursor = collection.document(after).get()
+        # A deleted cursor document restarts the list from the newest session
+        if cursor.exists:
+            query = query.start_after(cursor)
+    query = query.limit(limit)
     
     sessions = []
     for doc in query.stream():
         session_data = doc.to_dict()
         session_data['doc_id'] = doc.id
         sessions.append(session_data)
+        # Finished sessions do not change: keep them for their detail pages
+        if is_finished(session_data):
+            session_doc_cache.set((email, doc.id), session_data)
     
     return sessions
 
 
+def get_session(email: str, doc_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get one session by its Firestore document id, from the cache or with a
+    single document read. Returns None if it does not exist.
+    """
+    session_data = session_doc_cache.get((email, doc_id))
+    if session_data is not None:
+        return session_data
+
+    doc = sessions_collection(email).document(doc_id).get()
+    if not doc.exists:
+        return None
+    session_data = doc.to_dict()
+    session_data['doc_id'] = doc.id
+    if is_finished(session_data):
+        session_doc_cache.set((email, doc_id), session_data)
+    return session_data
+
+
 def get_session_eeg_data(email: str, session: Dict[str, Any]) -> tuple[List[Dict[str, Any]], str]:
     """
     Get EEG data for a session.
@@ -159,6 +284,46 @@ def create_eeg_plot(long_df):
     return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
 
 
+def is_finished(session_data: Dict[str, Any]) -> bool:
+    """Whether a session has ended, so its EEG data will not change."""
+    return bool(session_data.get("start_time") and session_data.get("end_time"))
+
+
+def get_session_view(email: str, selected_session: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    EEG part of the session detail page: record count, debug info, segment
+    count and plot. Views of finished sessions with data are cached, so a
+    revisit needs no Firestore reads or reprocessing.
+    """
+    key = (email, selected_session.get('doc_id'))
+    view = session_view_cache.get(key)
+    if view is not None:
+        return view
+
+    eeg_records, debug_info = get_session_eeg_data(email, selected_session)
+    view = {
+        'has_data': len(eeg_records) > 0,
+        'record_count': len(eeg_records),
+        'debug_info': debug_info,
+        'plot_json': None
+    }
+    if len(eeg_records) > 0:
+        # Process data
+        try:
+            long_df = process_eeg_records(eeg_records, return_long=True)
+            view['segments_count'] = long_df.shape[0] // 256 if not long_df.empty else 0
+
+            # Create plot
+            view['plot_json'] = create_eeg_plot(long_df)
+
+        except Exception as e:
+            view['error'] = f"Error processing EEG data: {str(e)}"
+
+    if view['has_data'] and 'error' not in view and is_finished(selected_session):
+        session_view_cache.set(key, view)
+    return view
+
+
 @app.route('/')
 def login():
     """Login page - email selection."""
@@ -184,11 +349,14 @@ def sessions():
     if not email:
         return redirect(url_for('login'))
     
-    sessions_list = get_recent_sessions(email)
+    after = request.args.get('after') or None
+    if request.args.get('refresh'):
+        recent_sessions_cache.pop((email, PAGE_SIZE, after))
+    sessions_list = get_recent_sessions(email, PAGE_SIZE, after)
     
     # Format sessions for display
     formatted_sessions = []
-    for i, sess in enumerate(sessions_list):
+    for sess in sessions_list:
         try:
             ts = datetime.fromisoformat(sess["timestamp"].replace("Z", "+00:00"))
             date_str = ts.strftime("%Y-%m-%d")
@@ -204,10 +372,10 @@ def sessions():
         
         start_time = sess.get("start_time", "")
         end_time = sess.get("end_time", "")
-        status = "Ready" if start_time and end_time else "Incomplete"
+        status = "Ready" if is_finished(sess) else "Incomplete"
         
         formatted_sessions.append({
-            'index': i,
+            'doc_id': sess['doc_id'],
             'date': date_str,
             'time': time_str,
             'type': session_type,
@@ -216,27 +384,27 @@ def sessions():
             'data': sess
         })
     
+    # A full page may have more after it; its last document is the cursor
+    next_after = sessions_list[-1]["doc_id"] if len(sessions_list) == PAGE_SIZE else None
+    
     return render_template('sessions.html', 
                          email=email, 
-                         sessions=formatted_sessions)
+                         sessions=formatted_sessions,
+                         after=after,
+                         next_after=next_after)
 
 
-@app.route('/session/<int:session_index>')
-def session_detail(session_index):
+@app.route('/session/<doc_id>')
+def session_detail(doc_id):
     """Session detail page with EEG processing."""
     email = session.get('email')
     if not email:
         return redirect(url_for('login'))
     
-    sessions_list = get_recent_sessions(email)
-    if session_index >= len(sessions_list):
+    selected_session = get_session(email, doc_id)
+    if selected_session is None:
         return "Session not found", 404
     
-    selected_session = sessions_list[session_index]
-    
-    # Get EEG data
-    eeg_records, debug_info = get_session_eeg_data(email, selected_session)
-    
     context = {
         'email': email,
         'session': selected_session,
@@ -245,28 +413,22 @@ def session_detail(session_index):
         'start_time': selected_session.get("start_time", "Unknown"),
         'end_time': selected_session.get("end_time", "Unknown"),
         'timestamp': selected_session.get("timestamp", "Unknown"),
-        'has_data': len(eeg_records) > 0,
-        'record_count': len(eeg_records),
-        'debug_info': debug_info,
-        'plot_json': None
+        **get_session_view(email, selected_session)
     }
     
-    if len(eeg_records) > 0:
-        # Process data
-        try:
-            long_df = process_eeg_records(eeg_records, return_long=True)
-            context['segments_count'] = long_df.shape[0] // 256 if not long_df.empty else 0
-            
-            # Create plot
-            plot_json = create_eeg_plot(long_df)
-            context['plot_json'] = plot_json
-            
-        except Exception as e:
-            context['error'] = f"Error processing EEG data: {str(e)}"
-    
     return render_template('session_detail.html', **context)
 
 
+@app.route('/cache')
+def cache_stats():
+    """Sizes and hit counts of the server-side caches."""
+    return jsonify({
+        'recent_sessions': recent_sessions_cache.stats(),
+        'session_views': session_view_cache.stats(),
+        'session_docs': session_doc_cache.stats(),
+    })
+
+
 @app.route('/logout')
 def logout():
     """Clear session and return to login."""
@@ -12,10 +12,12 @@ from awear_neuroscience.data_extraction.reshape import (construct_long_df,
                                                         normalize_session)
 from awear_neuroscience.data_extraction.utils import (
     convert_string_to_utc_timestamp, format_firestore_timestamp)
+from awear_neuroscience.utils.profiling import profiled
 
 MAX_DURATION_MINUTES = 300
 
 
+@profiled("query_eeg_data", records="return")
 def query_eeg_data(
     firestore_client: firestore.Client,
     collection_name: str,
@@ -139,6 +141,7 @@ def get_selreport_data(
     return results
 
 
+@profiled("process_eeg_records", records="records", segments="return")
 def process_eeg_records(
     records: List[Dict[str, Any]], return_long: bool = False
 ) -> pd.DataFrame:
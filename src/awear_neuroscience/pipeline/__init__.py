@@ -0,0 +1,5 @@
+def main(argv=None):
+    """Entry point of the ``awear-pipeline`` command (see ``pipeline.cli``)."""
+    from awear_neuroscience.pipeline.cli import main as cli_main
+
+    return cli_main(argv)
@@ -0,0 +1,5 @@
+import sys
+
+from awear_neuroscience.pipeline.cli import main
+
+sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Out-of-core processing of long histories in fixed-size time chunks.
+
+Segments are read from the :class:`FeatureStore` one time window at a time
+and every result is appended to the store before the next window is read,
+so memory is bounded by the chunk size instead of the history length.
+Filtering is per segment and needs no state between chunks; the EMA resumes
+from its per-user state, and per-user normalization statistics are
+accumulated over every chunk before any row is normalized, so the output
+equals a single in-memory run over the whole range.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from awear_neuroscience.pipeline.parallel import extract_segment_features_parallel
+from awear_neuroscience.pipeline.store import FeatureStore, to_utc
+from awear_neuroscience.signal_processing.features import (
+    add_time_features,
+    apply_ema_filtering,
+    merge_moments,
+    normalize_indexes,
+)
+
+TimeLike = Union[str, pd.Timestamp, None]
+
+
+def time_chunks(
+    start: TimeLike, end: TimeLike, freq: str = "1D"
+) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """
+    Split ``[start, end)`` into consecutive windows of length `freq`.
+
+    Window edges are aligned to `freq` (e.g. midnight UTC for ``"1D"``), so
+    chunks line up with the store's daily partitions.
+    """
+    start, end = to_utc(start), to_utc(end)
+    edges = pd.date_range(start.floor(freq), end, freq=freq)
+    edges = [max(start, edges[0]), *edges[1:]]
+    if edges[-1] < end:
+        edges.append(end)
+    return [(lo, hi) for lo, hi in zip(edges[:-1], edges[1:]) if lo < hi]
+
+
+def iter_chunks(
+    store: FeatureStore,
+    table: str,
+    start: TimeLike,
+    end: TimeLike,
+    freq: str = "1D",
+    users: Union[str, Sequence[str], None] = None,
+) -> Iterator[pd.DataFrame]:
+    """Rows of `table` one time window at a time, skipping empty windows."""
+    for lo, hi in time_chunks(start, end, freq):
+        chunk = store.read(table, start=lo, end=hi, users=users)
+        if not chunk.empty:
+            # 'date' is the partition column the store adds on write
+            yield chunk.drop(columns="date", errors="ignore")
+
+
+def iter_segment_features(
+    store: FeatureStore,
+    sampling_rate: int,
+    start: TimeLike,
+    end: TimeLike,
+    freq: str = "1D",
+    users: Union[str, Sequence[str], None] = None,
+    source: str = "segments",
+    n_workers: Optional[int] = 1,
+    **kwargs
+) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    ``extract_segment_features`` over `source`, one chunk at a time, each
+    chunk spread over `n_workers` processes (see
+    ``extract_segment_features_parallel``).
+
+    Yields
+    ------
+    features_df, flags_df : pd.DataFrame
+        Unsmoothed features of the clean segments and the flags of every
+        segment in the chunk.
+    """
+    for segments in iter_chunks(store, source, start, end, freq, users):
+        features, flags = extract_segment_features_parallel(
+            segments, sampling_rate, n_workers, **kwargs
+        )
+        yield features.reset_index(drop=True), flags
+
+
+def iter_processed_features(
+    store: FeatureStore,
+    alpha: float,
+    start: TimeLike,
+    end: TimeLike,
+    freq: str = "1D",
+    users: Union[str, Sequence[str], None] = None,
+    columns_to_normalize: Optional[List[str]] = None,
+    source: str = "segment_features",
+    staging: str = "_smoothed_staging",
+    state: Optional[Dict[str, Any]] = None,
+    precision=None,
+) -> Iterator[pd.DataFrame]:
+    """
+    ``process_features`` over `source`, one chunk at a time.
+
+    Without normalization every chunk is smoothed and yielded directly. With
+    `columns_to_normalize`, a first pass smooths each chunk into the
+    `staging` table while folding the per-user moments of those columns; a
+    second pass reads the staged chunks back and z-scores them against the
+    statistics of the full range, as ``normalize_indexes`` does in memory.
+    The staging table is dropped afterwards.
+
+    Parameters
+    ----------
+    store : FeatureStore
+        Store holding `source`; also receives the staging table.
+    alpha : float
+        Smoothing factor for exponential moving average filtering.
+    start, end : str or pd.Timestamp
+        Time range to process.
+    freq : str, default '1D'
+        Chunk length as a pandas offset alias.
+    users : str or sequence of str, optional
+        ``document_name`` values to process.
+    columns_to_normalize : List[str], optional
+        Columns z-scored per user after smoothing. Only 'zscore'
+        normalization can be computed out of core.
+    source : str, default 'segment_features'
+        Table of unsmoothed feature rows.
+    staging : str, default '_smoothed_staging'
+        Scratch table for the smoothed rows.
+    state : dict, optional
+        EMA state (see ``apply_ema_filtering``), to resume from an earlier run.
+    precision : str or DtypePolicy, optional
+        dtype policy of the smoothed and normalized columns.
+
+    Yields
+    ------
+    pd.DataFrame
+        Processed rows of one chunk, as ``process_features`` returns them.
+    """
+    ema_state = state if state is not None else {}
+    chunks = iter_chunks(store, source, start, end, freq, users)
+    if not columns_to_normalize:
+        for chunk in chunks:
+            yield add_time_features(
+                apply_ema_filtering(chunk, alpha, state=ema_state, precision=precision)
+            )
+        return
+
+    columns = list(columns_to_normalize)
+    # Per-user moments in the state format of normalize_indexes
+    moments: Dict[str, Any] = {}
+    store.drop(staging)
+    try:
+        for chunk in chunks:
+            smoothed = apply_ema_filtering(
+                chunk, alpha, state=ema_state, precision=precision
+            )
+            values = smoothed[columns].to_numpy(dtype=float)
+            for document_name, rows in smoothed.groupby(
+                "document_name", sort=False
+            ).indices.items():
+                zeros = np.zeros(len(columns))
+                prev = moments.get(document_name, {})
+                count, mean, m2 = merge_moments(
+                    prev.get("count", zeros),
+                    prev.get("mean", zeros),
+                    prev.get("m2", zeros),
+                    values[rows],
+                )
+                moments[document_name] = {"count": count, "mean": mean, "m2": m2}
+            store.append(smoothed, table=staging)
+
+        final = {"columns": columns, "users": moments}
+        for chunk in iter_chunks(store, staging, start, end, freq, users):
+            yield add_time_features(
+                normalize_indexes(
+                    chunk,
+                    columns,
+                    state=final,
+                    precision=precision,
+                    update_state=False,
+                )
+            )
+    finally:
+        store.drop(staging)
+
+
+def run_chunked_pipeline(
+    store: FeatureStore,
+    sampling_rate: int,
+    alpha: float,
+    start: TimeLike,
+    end: TimeLike,
+    freq: str = "1D",
+    users: Union[str, Sequence[str], None] = None,
+    columns_to_normalize: Optional[List[str]] = None,
+    precision=None,
+    **kwargs
+) -> Dict[str, int]:
+    """
+    Segments → features over a long history with memory bounded by `freq`.
+
+    Reads the 'segments' table chunk by chunk and appends to the
+    'segment_features', 'segment_flags' and 'features' tables (replacing
+    any previous contents), as the ``preprocess`` and ``features`` stages of
+    ``awear-pipeline`` do in memory.
+
+    Parameters
+    ----------
+    store : FeatureStore
+        Store holding the 'segments' table.
+    sampling_rate : int
+        Sampling frequency in Hz.
+    alpha : float
+        Smoothing factor for exponential moving average filtering.
+    start, end : str or pd.Timestamp
+        Time range to process.
+    freq : str, default '1D'
+        Chunk length as a pandas offset alias, e.g. '6h' or '7D'.
+    users : str or sequence of str, optional
+        ``document_name`` values to process.
+    columns_to_normalize : List[str], optional
+        Columns z-scored per user over the whole range.
+    precision : str or DtypePolicy, optional
+        dtype policy (see ``precision.get_policy``) of every stage.
+    **kwargs :
+        `n_workers` and the per-segment options of ``extract_segment_features``
+        (artifact method and thresholds, feature families, batch size).
+
+    Returns
+    -------
+    dict
+        Rows written per table.
+    """
+    written = {"segment_features": 0, "segment_flags": 0, "features": 0}
+    for table in written:
+        store.drop(table)
+    for features, flags in iter_segment_features(
+        store, sampling_rate, start, end, freq, users, precision=precision, **kwargs
+    ):
+        if not features.empty:
+            written["segment_features"] += store.append(
+                features, table="segment_features"
+            )
+        written["segment_flags"] += store.append(flags, table="segment_flags")
+    for features in iter_processed_features(
+        store,
+        alpha,
+        start,
+        end,
+        freq,
+        users,
+        columns_to_normalize,
+        precision=precision,
+    ):
+        written["features"] += store.append(features, table="features")
+    return written
@@ -0,0 +1,413 @@
+"""
+Command-line batch pipeline: extract → preprocess → features into a local store.
+
+Usage::
+
+    awear-pipeline config.toml [--stages preprocess features] [--workers 8]
+
+Each stage reads its input tables from the :class:`FeatureStore` and writes
+its output tables back together with a key hashed from the stage
+parameters and the versions of its inputs. A stage whose outputs carry the
+current key is skipped unless ``--force`` is given, so changing a late
+parameter such as ``ema_alpha`` reruns only the stages from there on, and a
+failed nightly run resumes where it stopped.
+"""
+
+import argparse
+import json
+import os
+import sys
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from awear_neuroscience.data_extraction.constants import SAMPLING_RATE
+from awear_neuroscience.pipeline.memo import code_fingerprint, fingerprint
+from awear_neuroscience.pipeline.store import FeatureStore
+from awear_neuroscience.utils import profiling
+
+
+@dataclass
+class PipelineConfig:
+    """
+    Settings of a batch pipeline run, loaded from a JSON or TOML file.
+
+    Attributes
+    ----------
+    users : List[str]
+        Firestore document names (user e-mails) to process.
+    start, end : str
+        Date range of the sessions, ISO format; `end` defaults to now.
+    session_types : List[str]
+        Session types to keep, e.g. ``["calm", "stressed"]``.
+    collection : str, optional
+        Firestore collection, default the ``COLLECTION_NAME`` variable.
+    artifact_method : str
+        Artifact detection method (see ``detect_artifacts``).
+    amplitude_threshold : float
+        Threshold of the amplitude artifact method.
+    artifact_kwargs : dict
+        Extra method-specific options for ``detect_artifacts``.
+    ema_alpha : float
+        Smoothing factor of the EMA.
+    columns_to_normalize : List[str]
+        Columns normalized per user after smoothing.
+    normalization : str
+        'zscore' or 'robust'.
+    psd_method : str
+        'welch' or 'multitaper'.
+    spectral_shape, aperiodic : bool
+        Extra feature families.
+    precision : str
+        dtype policy of signals and features: 'float32' (default),
+        'float64' or 'float32-compute' (see ``precision.POLICIES``).
+    store : str
+        Root directory of the output store.
+    """
+
+    users: List[str]
+    start: str
+    end: Optional[str] = None
+    session_types: List[str] = field(default_factory=lambda: ["calm", "stressed"])
+    collection: Optional[str] = None
+    artifact_method: str = "amplitude"
+    amplitude_threshold: float = 20.0
+    artifact_kwargs: Dict[str, Any] = field(default_factory=dict)
+    ema_alpha: float = 2 / 16
+    columns_to_normalize: List[str] = field(default_factory=list)
+    normalization: str = "zscore"
+    psd_method: str = "welch"
+    spectral_shape: bool = False
+    aperiodic: bool = False
+    precision: str = "float32"
+    store: str = "feature_store"
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PipelineConfig":
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown config keys: {sorted(unknown)}")
+        return cls(**data)
+
+    @classmethod
+    def from_file(cls, path: str) -> "PipelineConfig":
+        """Load a ``.json`` or ``.toml`` config file."""
+        if str(path).endswith(".toml"):
+            try:
+                import tomllib
+            except ModuleNotFoundError:  # Python < 3.11
+                import tomli as tomllib
+
+            with open(path, "rb") as f:
+                return cls.from_dict(tomllib.load(f))
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def time_range(self) -> Tuple[datetime, datetime]:
+        start = pd.Timestamp(self.start)
+        end = pd.Timestamp(self.end) if self.end else pd.Timestamp.now()
+        return start.to_pydatetime(), end.to_pydatetime()
+
+    def read(self, store: FeatureStore, table: str) -> pd.DataFrame:
+        """Rows of `table` for the configured users and date range."""
+        start, end = self.time_range()
+        return store.read(table, users=self.users, start=start, end=end)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    A named pipeline step mapping input tables to output tables.
+
+    `run` returns the output tables, or an iterator of partial outputs that
+    are appended one after the other (``--chunk`` mode).
+
+    `params` lists the config fields the stage depends on; together with the
+    keys of its input tables and the code of `run` they make up the stage
+    key stored with its outputs, so only stages whose key changed are
+    recomputed.
+    """
+
+    name: str
+    inputs: Tuple[str, ...]
+    outputs: Tuple[str, ...]
+    params: Tuple[str, ...]
+    run: Callable[..., Union[Dict[str, pd.DataFrame], Iterator[Dict]]]
+
+    def key(self, config: "PipelineConfig", input_keys: Sequence[str]) -> str:
+        params = {name: getattr(config, name) for name in self.params}
+        if "end" in params and params["end"] is None:
+            # Open-ended ranges are refreshed once per day
+            params["end"] = pd.Timestamp.now().strftime("%Y-%m-%d")
+        return fingerprint(
+            self.name, code_fingerprint(self.run), params, list(input_keys)
+        )
+
+
+def _extract(config: PipelineConfig, store: FeatureStore, options) -> Dict:
+    from google.cloud import firestore
+
+    from awear_neuroscience.data_extraction.firestore_loader import (
+        get_selreport_data,
+        process_eeg_records,
+    )
+
+    client = firestore.Client()
+    collection = config.collection or os.getenv("COLLECTION_NAME")
+    records: List[Dict[str, Any]] = []
+    for user in config.users:
+        records.extend(
+            get_selreport_data(
+                firestore_client=client,
+                collection_name=collection,
+                document_name=user,
+                time_ranges=[config.time_range()],
+                sessions_of_interest=config.session_types,
+            )
+        )
+    segments = process_eeg_records(records)
+    segments.insert(0, "segment", [f"seg_{i}" for i in range(len(segments))])
+    return {"segments": segments}
+
+
+def _preprocess(config: PipelineConfig, store: FeatureStore, options):
+    segment_options = dict(
+        batch_size=options.batch_size,
+        artifacts_detection_method=config.artifact_method,
+        amplitude_threshold=config.amplitude_threshold,
+        spectral_shape=config.spectral_shape,
+        aperiodic=config.aperiodic,
+        psd_method=config.psd_method,
+        precision=config.precision,
+        **config.artifact_kwargs,
+    )
+    if options.chunk:
+        from awear_neuroscience.pipeline.chunked import iter_segment_features
+
+        return (
+            {"segment_features": features, "segment_flags": flags}
+            for features, flags in iter_segment_features(
+                store,
+                SAMPLING_RATE,
+                *config.time_range(),
+                freq=options.chunk,
+                users=config.users,
+                n_workers=options.workers,
+                **segment_options,
+            )
+        )
+
+    from awear_neuroscience.pipeline.parallel import extract_segment_features_parallel
+
+    features, flags = extract_segment_features_parallel(
+        config.read(store, "segments"),
+        SAMPLING_RATE,
+        n_workers=options.workers,
+        **segment_options,
+    )
+    return {"segment_features": features, "segment_flags": flags}
+
+
+def _features(config: PipelineConfig, store: FeatureStore, options):
+    if options.chunk:
+        from awear_neuroscience.pipeline.chunked import iter_processed_features
+
+        if config.columns_to_normalize and config.normalization != "zscore":
+            raise RuntimeError("--chunk only supports 'zscore' normalization")
+        return (
+            {"features": features}
+            for features in iter_processed_features(
+                store,
+                config.ema_alpha,
+                *config.time_range(),
+                freq=options.chunk,
+                users=config.users,
+                columns_to_normalize=config.columns_to_normalize,
+                precision=config.precision,
+            )
+        )
+
+    from awear_neuroscience.pipeline.preprocess import process_features
+
+    features = process_features(
+        config.read(store, "segment_features"),
+        config.ema_alpha,
+        config.columns_to_normalize,
+        normalization=config.normalization,
+        precision=config.precision,
+    )
+    return {"features": features}
+
+
+EXTRACT_PARAMS = ("users", "start", "end", "session_types", "collection")
+PREPROCESS_PARAMS = (
+    "artifact_method",
+    "amplitude_threshold",
+    "artifact_kwargs",
+    "psd_method",
+    "spectral_shape",
+    "aperiodic",
+    "precision",
+)
+FEATURE_PARAMS = ("ema_alpha", "columns_to_normalize", "normalization", "precision")
+
+STAGES: Dict[str, Stage] = {
+    stage.name: stage
+    for stage in (
+        Stage("extract", (), ("segments",), EXTRACT_PARAMS, _extract),
+        Stage(
+            "preprocess",
+            ("segments",),
+            ("segment_features", "segment_flags"),
+            PREPROCESS_PARAMS,
+            _preprocess,
+        ),
+        Stage(
+            "features", ("segment_features",), ("features",), FEATURE_PARAMS, _features
+        ),
+    )
+}
+
+
+def run_stages(
+    config: PipelineConfig,
+    stages: Sequence[str],
+    options: argparse.Namespace,
+    store: Optional[FeatureStore] = None,
+) -> Dict[str, str]:
+    """
+    Run `stages` in pipeline order and report what each one did.
+
+    Returns
+    -------
+    dict
+        Stage name to 'cached' or 'ran'.
+    """
+    store = store or FeatureStore(options.store or config.store)
+    report = {}
+    for name in STAGES:
+        if name not in stages:
+            continue
+        stage = STAGES[name]
+        missing = [t for t in stage.inputs if not store.exists(t)]
+        if missing:
+            raise RuntimeError(f"Stage '{name}' needs tables {missing}; run them first")
+        input_keys = [store.get_meta(t).get("version") for t in stage.inputs]
+        key = stage.key(config, input_keys)
+
+        # Outputs are reused while they were built from the same key
+        cached = all(
+            store.exists(t) and store.get_meta(t).get("key") == key
+            for t in stage.outputs
+        )
+        if cached and not options.force:
+            print(f"[{name}] cached: {', '.join(stage.outputs)}")
+            report[name] = "cached"
+            continue
+
+        with profiling.stage(f"stage:{name}") as stats:
+            outputs = stage.run(config, store, options)
+            parts = [outputs] if isinstance(outputs, dict) else outputs
+            rows = dict.fromkeys(stage.outputs, 0)
+            for table in stage.outputs:
+                store.drop(table)
+            for part in parts:
+                for table in stage.outputs:
+                    if not part[table].empty:
+                        rows[table] += store.append(part[table], table=table)
+        if stats is not None:
+            stats.segments += rows[stage.outputs[0]]
+        # Downstream stages key on the version of their inputs; a forced
+        # rerun may produce new data under the same parameters
+        version = (
+            fingerprint(key, pd.Timestamp.now().isoformat()) if options.force else key
+        )
+        for table in stage.outputs:
+            store.set_meta(table, {"key": key, "version": version, "stage": name})
+            print(f"[{name}] wrote {rows[table]} rows to '{table}'")
+        report[name] = "ran"
+    return report
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="awear-pipeline",
+        description="Run the AWEAR EEG batch pipeline from a config file.",
+    )
+    parser.add_argument("config", help="JSON or TOML pipeline config")
+    parser.add_argument(
+        "--stages",
+        nargs="+",
+        choices=list(STAGES),
+        default=list(STAGES),
+        help="stages to run (default: all, in pipeline order)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="worker processes (default: all cores)",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=1024, help="segments per processing batch"
+    )
+    parser.add_argument("--store", default=None, help="override the store directory")
+    parser.add_argument(
+        "--chunk",
+        default=None,
+        metavar="FREQ",
+        help="process the date range out of core in chunks of FREQ, e.g. 1D or 6h",
+    )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        metavar="PATH",
+        help="write per-stage time, throughput and peak memory as JSON to PATH",
+    )
+    parser.add_argument(
+        "--profile-stacks",
+        default=None,
+        metavar="PATH",
+        help="with --profile, also write sampled call stacks (folded format)",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="with --profile, serve /metrics and /report on this port",
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="rerun stages whose outputs exist"
+    )
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Entry point of the ``awear-pipeline`` command."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    options = build_parser().parse_args(argv)
+    config = PipelineConfig.from_file(options.config)
+    profiler = None
+    if options.profile:
+        profiler = profiling.Profiler(
+            sample_interval=0.005 if options.profile_stacks else None
+        )
+        if options.metrics_port:
+            profiler.serve(options.metrics_port)
+        profiler.start()
+    try:
+        run_stages(config, options.stages, options)
+    except RuntimeError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            profiler.dump(options.profile, options.profile_stacks)
+            print(profiler.summary(), file=sys.stderr)
+    return 0
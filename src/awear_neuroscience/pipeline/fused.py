@@ -0,0 +1,252 @@
+"""Fused single-pass pipeline from raw segments to smoothed features."""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from awear_neuroscience.pipeline.preprocess import (
+    artifact_flags,
+    segment_band_features,
+)
+from awear_neuroscience.signal_processing.features import (
+    add_time_features,
+    apply_ema_filtering,
+    normalize_indexes,
+)
+from awear_neuroscience.signal_processing.filters import preprocess_segment
+from awear_neuroscience.signal_processing.precision import get_policy
+
+META_COLS = (
+    "segment",
+    "focus_type",
+    "timestamp",
+    "document_name",
+    "session_id",
+    "utc_offset_minutes",
+)
+
+
+def segment_meta(segments_df: pd.DataFrame) -> pd.DataFrame:
+    """Metadata columns of the segments, with construct_long_df segment names."""
+    meta = segments_df.reset_index(drop=True)
+    if "segment" not in meta.columns:
+        meta["segment"] = [f"seg_{i}" for i in range(len(meta))]
+    return meta[[c for c in META_COLS if c in meta.columns]]
+
+
+def _flags_frame(meta: pd.DataFrame, max_abs: list, flags: list) -> pd.DataFrame:
+    return meta.assign(
+        max_abs_filtered_value=np.concatenate(max_abs or [np.empty(0)]),
+        is_artifact=np.concatenate(flags or [np.empty(0, dtype=bool)]),
+    )
+
+
+def _iter_batches(
+    waveforms: np.ndarray,
+    meta: pd.DataFrame,
+    sampling_rate: int,
+    batch_size: int,
+    artifacts_detection_method: str = "amplitude",
+    amplitude_threshold: float = 20,
+    spectral_shape: bool = False,
+    aperiodic: bool = False,
+    psd_method: str = "welch",
+    precision=None,
+    **artifact_kwargs,
+):
+    """
+    Filter, flag and featurize `waveforms` `batch_size` segments at a time.
+
+    Yields ``(features, max_abs, is_artifact)`` per batch; `features` holds the
+    clean segments indexed by their position in `waveforms` (None when the
+    whole batch is flagged).
+    """
+    policy = get_policy(precision)
+    lengths = np.fromiter((len(w) for w in waveforms), dtype=int, count=len(waveforms))
+    for start in range(0, len(waveforms), batch_size):
+        batch = np.arange(start, min(start + batch_size, len(waveforms)))
+        batch_max = np.empty(batch.size)
+        batch_flags = np.empty(batch.size, dtype=bool)
+        batch_features = []
+        # Segments of equal length are stacked into one matrix
+        for length in np.unique(lengths[batch]):
+            rows = batch[lengths[batch] == length]
+            # Rounded to the signal dtype, as process_long_df stores it
+            filtered = policy.as_signal(
+                preprocess_segment(
+                    np.stack(waveforms[rows]), sampling_rate, dtype=policy.compute
+                )
+            )
+            # NaN samples are ignored, as in process_long_df
+            seg_max = np.fmax.reduce(np.abs(filtered), axis=-1)
+            seg_flags = artifact_flags(
+                filtered,
+                seg_max,
+                sampling_rate,
+                artifacts_detection_method,
+                amplitude_threshold,
+                **artifact_kwargs,
+            )
+            batch_max[rows - start] = seg_max
+            batch_flags[rows - start] = seg_flags
+            clean, signals = rows[~seg_flags], filtered[~seg_flags]
+            # Samples with a NaN filtered value drop out, as in process_long_df
+            valid = ~np.isnan(signals)
+            n_valid = valid.sum(axis=-1)
+            for n in np.unique(n_valid[n_valid > 0]):
+                pick = n_valid == n
+                bands_df, extra = segment_band_features(
+                    signals[pick][valid[pick]].reshape(-1, n),
+                    sampling_rate,
+                    spectral_shape,
+                    aperiodic,
+                    psd_method,
+                    policy,
+                )
+                clean_meta = meta.iloc[clean[pick]].reset_index(drop=True)
+                feat = pd.concat([bands_df, clean_meta, extra], axis=1)
+                feat.index = clean[pick]
+                batch_features.append(feat)
+        feat = pd.concat(batch_features).sort_index() if batch_features else None
+        yield feat, batch_max, batch_flags
+
+
+def extract_segment_features(
+    segments_df: pd.DataFrame, sampling_rate: int, batch_size: int = 1024, **kwargs
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Unsmoothed half of :func:`run_segment_pipeline`: filter, flag and
+    featurize the segments batch by batch, without EMA or normalization.
+
+    Returns
+    -------
+    features_df : pd.DataFrame
+        One row per clean segment, indexed by its row in `segments_df`, as
+        ``extract_features_from_long_df`` returns them.
+    flags_df : pd.DataFrame
+        One row per segment with 'max_abs_filtered_value' and 'is_artifact'.
+    """
+    meta = segment_meta(segments_df)
+    batches = list(
+        _iter_batches(
+            segments_df["waveform"].to_numpy(),
+            meta,
+            sampling_rate,
+            batch_size,
+            **kwargs,
+        )
+    )
+    frames = [feat for feat, _, _ in batches if feat is not None]
+    flags_df = _flags_frame(meta, [b[1] for b in batches], [b[2] for b in batches])
+    return (pd.concat(frames) if frames else pd.DataFrame()), flags_df
+
+
+def run_segment_pipeline(
+    segments_df: pd.DataFrame,
+    sampling_rate: int,
+    alpha: float,
+    columns_to_normalize: Optional[List[str]] = None,
+    artifacts_detection_method: str = "amplitude",
+    amplitude_threshold: float = 20,
+    spectral_shape: bool = False,
+    aperiodic: bool = False,
+    psd_method: str = "welch",
+    normalization: str = "zscore",
+    batch_size: int = 1024,
+    state: Optional[Dict[str, Any]] = None,
+    precision=None,
+    **artifact_kwargs,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Run filter → artifact flag → spectrum → band features → EMA in one pass.
+
+    Fused equivalent of ``process_long_df`` → ``extract_features_from_long_df``
+    → ``process_features`` that never builds the long frame. Raw segments are
+    taken `batch_size` at a time; each batch is filtered, flagged, transformed
+    and smoothed before the next one is stacked, and only the feature rows
+    and one flag per segment are kept. Peak memory is the raw waveforms plus
+    a few copies of one batch. As in ``process_long_df``, samples whose
+    filtered value is NaN are left out of the features.
+
+    Parameters
+    ----------
+    segments_df : pd.DataFrame
+        One row per segment, as returned by ``process_eeg_records`` with
+        ``return_long=False``: a 'waveform' column of 1-D arrays plus
+        'timestamp', 'focus_type' and optionally 'segment', 'document_name'
+        and 'session_id'. Rows must be in time order per user.
+    sampling_rate : int
+        Sampling frequency in Hz.
+    alpha : float
+        Smoothing factor for exponential moving average filtering.
+    columns_to_normalize : List[str], optional
+        Columns normalized per user once all batches are smoothed.
+    artifacts_detection_method : str, default 'amplitude'
+        Artifact detection method (see ``detect_artifacts``).
+    amplitude_threshold : float, default 20
+        Amplitude threshold (used if method='amplitude').
+    spectral_shape, aperiodic : bool, default False
+        Extra feature families, as in ``extract_features_from_long_df``.
+    psd_method : {'welch', 'multitaper'}, default 'welch'
+        Spectral estimator passed to compute_psd.
+    normalization : {'zscore', 'robust'}, default 'zscore'
+        Per-user normalization method (see ``normalize_indexes``).
+    batch_size : int, default 1024
+        Segments processed per batch.
+    state : dict, optional
+        Resumable state as in ``process_features``; EMA always resumes
+        across batches, and with a state also across calls.
+    precision : str or DtypePolicy, optional
+        dtype policy (see ``precision.get_policy``) of filtering, signals and
+        features.
+    **artifact_kwargs :
+        Extra method-specific kwargs for detect_artifacts.
+
+    Returns
+    -------
+    features_df : pd.DataFrame
+        One row per clean segment, as ``process_features`` returns it.
+    flags_df : pd.DataFrame
+        One row per segment with the metadata columns,
+        'max_abs_filtered_value' and 'is_artifact'.
+    """
+    ema_state = state.setdefault("ema", {}) if state is not None else {}
+    norm_state = state.setdefault("norm", {}) if state is not None else None
+
+    meta = segment_meta(segments_df)
+    feature_frames, max_abs, flags = [], [], []
+    for feat, batch_max, batch_flags in _iter_batches(
+        segments_df["waveform"].to_numpy(),
+        meta,
+        sampling_rate,
+        batch_size,
+        artifacts_detection_method=artifacts_detection_method,
+        amplitude_threshold=amplitude_threshold,
+        spectral_shape=spectral_shape,
+        aperiodic=aperiodic,
+        psd_method=psd_method,
+        precision=precision,
+        **artifact_kwargs,
+    ):
+        max_abs.append(batch_max)
+        flags.append(batch_flags)
+        if feat is not None:
+            feature_frames.append(
+                apply_ema_filtering(feat, alpha, state=ema_state, precision=precision)
+            )
+
+    flags_df = _flags_frame(meta, max_abs, flags)
+    if not feature_frames:
+        return pd.DataFrame(), flags_df
+
+    features_df = pd.concat(feature_frames).reset_index(drop=True)
+    if columns_to_normalize:
+        features_df = normalize_indexes(
+            features_df,
+            columns_to_normalize,
+            state=norm_state,
+            method=normalization,
+            precision=precision,
+        )
+    return add_time_features(features_df), flags_df
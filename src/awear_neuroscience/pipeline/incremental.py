@@ -0,0 +1,108 @@
+"""Resumable feature post-processing for incrementally arriving segments."""
+
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from awear_neuroscience.pipeline.preprocess import process_features
+
+
+class FeatureState:
+    """
+    Per-user EMA and normalization state for :func:`process_features`.
+
+    Holds, for every ``document_name``, the last EMA value of each smoothed
+    column and the running (count, mean, M2) of each normalized column, so
+    :meth:`update` processes only the newly arrived feature rows, at O(new
+    rows) cost. Smoothed columns match a full ``process_features`` recompute
+    over the whole history. Normalized columns match it only for the newest
+    batch: earlier batches were z-scored with the statistics available when
+    they arrived and are not revised afterwards.
+
+    Parameters
+    ----------
+    alpha : float
+        Smoothing factor for exponential moving average filtering.
+    columns_to_normalize : List[str], optional
+        Columns z-scored per user after filtering.
+
+    Examples
+    --------
+    >>> state = FeatureState(alpha=0.125, columns_to_normalize=["gamma_fil"])
+    >>> out = state.update(new_features_df)
+    >>> state.save("feature_state.json")
+    """
+
+    def __init__(self, alpha: float, columns_to_normalize: Optional[List[str]] = None):
+        self.alpha = alpha
+        self.columns_to_normalize = list(columns_to_normalize or [])
+        self.state: Dict[str, Any] = {}
+
+    def update(self, features_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Process newly arrived feature rows, resuming from the stored state.
+
+        Parameters
+        ----------
+        features_df : pd.DataFrame
+            Feature rows not seen before, in time order per user.
+
+        Returns
+        -------
+        pd.DataFrame
+            The processed rows, as a full ``process_features`` recompute
+            over the history so far would return them.
+        """
+        return process_features(
+            features_df, self.alpha, self.columns_to_normalize, state=self.state
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable snapshot of the state."""
+        out: Dict[str, Any] = {
+            "alpha": self.alpha,
+            "columns_to_normalize": self.columns_to_normalize,
+        }
+        for part in ("ema", "norm"):
+            if part in self.state:
+                section = self.state[part]
+                out[part] = {
+                    "columns": list(section.get("columns", [])),
+                    # (key, values) pairs keep non-string keys such as None
+                    "users": [
+                        [key, {k: np.asarray(v).tolist() for k, v in vals.items()}]
+                        for key, vals in section.get("users", {}).items()
+                    ],
+                }
+        return out
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FeatureState":
+        """Rebuild a state from :meth:`to_dict` output."""
+        obj = cls(data["alpha"], data.get("columns_to_normalize"))
+        for part in ("ema", "norm"):
+            if part in data:
+                obj.state[part] = {
+                    "columns": list(data[part]["columns"]),
+                    "users": {
+                        key: {
+                            k: np.asarray(v, dtype=np.int64 if k == "gap" else float)
+                            for k, v in vals.items()
+                        }
+                        for key, vals in data[part]["users"]
+                    },
+                }
+        return obj
+
+    def save(self, path: str) -> None:
+        """Persist the state as JSON."""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> "FeatureState":
+        """Load a state written by :meth:`save`."""
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,234 @@
+"""Content-addressed, size-bounded on-disk memoization of pipeline stages."""
+
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+import types
+from dataclasses import dataclass
+from typing import Any, Callable, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    """Output of a memoized stage together with the key it is stored under."""
+
+    key: str
+    value: Any
+    hit: bool = False
+
+
+def _update(h, obj) -> None:
+    if isinstance(obj, CachedResult):
+        # Downstream keys chain on the upstream key instead of re-hashing data
+        h.update(b"result:" + obj.key.encode())
+    elif isinstance(obj, pd.DataFrame):
+        h.update(b"frame:" + repr(list(map(str, obj.columns))).encode())
+        for col in obj.columns:
+            _update(h, obj[col])
+    elif isinstance(obj, pd.Series):
+        h.update(f"series:{obj.dtype}:{len(obj)}".encode())
+        try:
+            h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+        except TypeError:
+            # Unhashable cells, e.g. the per-segment waveform arrays
+            _update(h, obj.index.to_numpy())
+            for value in obj:
+                _update(h, value)
+    elif isinstance(obj, np.ndarray) and obj.dtype != object:
+        h.update(f"array:{obj.dtype.str}:{obj.shape}".encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (list, tuple)) and all(
+        isinstance(v, (int, float)) and not isinstance(v, bool) for v in obj
+    ):
+        # Raw waveform lists from Firestore records
+        h.update(f"numbers:{len(obj)}".encode())
+        h.update(np.asarray(obj, dtype=float).tobytes())
+    elif isinstance(obj, (list, tuple, np.ndarray)):
+        h.update(f"seq:{len(obj)}".encode())
+        for value in obj:
+            _update(h, value)
+    elif isinstance(obj, dict):
+        h.update(f"dict:{len(obj)}".encode())
+        for k in sorted(obj, key=repr):
+            _update(h, k)
+            _update(h, obj[k])
+    else:
+        h.update(f"{type(obj).__name__}:{obj!r}".encode())
+
+
+def fingerprint(*objs) -> str:
+    """
+    SHA-256 of the content of `objs`: DataFrames, arrays, containers and
+    scalars are hashed by value, :class:`CachedResult` objects by their key.
+    """
+    h = hashlib.sha256()
+    for obj in objs:
+        _update(h, obj)
+    return h.hexdigest()
+
+
+def _update_code(h, code: types.CodeType) -> None:
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            # Nested functions, lambdas and comprehensions
+            _update_code(h, const)
+        else:
+            h.update(repr(const).encode())
+
+
+def code_fingerprint(func: Callable) -> str:
+    """
+    SHA-256 of the bytecode, names and constants of `func` (decorators
+    unwrapped), or '' for callables without Python code such as numpy
+    functions. Only the function's own code counts, not its callees.
+    """
+    code = getattr(inspect.unwrap(func), "__code__", None)
+    if code is None:
+        return ""
+    h = hashlib.sha256()
+    _update_code(h, code)
+    return h.hexdigest()
+
+
+class StageCache:
+    """
+    Memoize pipeline stages on local disk, keyed on inputs and parameters.
+
+    The key of a stage run is the hash of the stage name, the stage
+    function's code (see :func:`code_fingerprint`), its parameters and its
+    inputs, so editing the function misses the cache. Inputs produced by another memoized stage contribute their
+    key rather than their content, so keys chain along the pipeline:
+    changing a late-stage parameter only misses that stage and the ones
+    after it, while every earlier stage is served from disk. Entries are
+    pickled under `root` and evicted least-recently-used first once they
+    take more than `max_bytes`.
+
+    Parameters
+    ----------
+    root : str
+        Cache directory, created if needed.
+    max_bytes : int, default 2 GiB
+        Size bound of the cache directory.
+
+    Examples
+    --------
+    >>> cache = StageCache(".awear_cache")
+    >>> long_df = cache.run("long", process_eeg_records, records, return_long=True)
+    >>> long_df = cache.run("filter", process_long_df, long_df, SAMPLING_RATE)
+    >>> features = cache.run("features", extract_features_from_long_df, long_df, 256)
+    >>> smoothed = cache.run("smooth", process_features, features, alpha).value
+    """
+
+    def __init__(self, root: str, max_bytes: int = 2 * 1024**3):
+        self.root = str(root)
+        self.max_bytes = int(max_bytes)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.pkl")
+
+    def key(
+        self, name: str, func: Callable, args: tuple, kwargs: dict, version: Any = None
+    ) -> str:
+        """Key of running `func(*args, **kwargs)` as stage `name`."""
+        qualname = (
+            f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', '')}"
+        )
+        return fingerprint(
+            name, qualname, code_fingerprint(func), version, list(args), kwargs
+        )
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def get(self, key: str) -> Any:
+        """Load the entry stored under `key` and mark it as recently used."""
+        path = self._path(key)
+        with open(path, "rb") as f:
+            value = pickle.load(f)
+        os.utime(path)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store `value` under `key`, then evict down to `max_bytes`."""
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """``(key, size, last_used)`` of every entry, least recently used first."""
+        out = []
+        for name in os.listdir(self.root):
+            if name.endswith(".pkl"):
+                st = os.stat(os.path.join(self.root, name))
+                out.append((name[: -len(".pkl")], st.st_size, st.st_mtime))
+        return sorted(out, key=lambda e: e[2])
+
+    def size(self) -> int:
+        """Total size of the stored entries in bytes."""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes: int = None) -> List[str]:
+        """Drop least-recently-used entries until the cache fits `max_bytes`."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for key, size, _ in entries:
+            if total <= limit:
+                break
+            os.remove(self._path(key))
+            total -= size
+            evicted.append(key)
+        return evicted
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        self.evict(0)
+
+    def run(
+        self,
+        name: str,
+        func: Callable,
+        *args,
+        cache_ignore: Sequence[str] = (),
+        cache_version: Any = None,
+        **kwargs,
+    ) -> CachedResult:
+        """
+        Return ``func(*args, **kwargs)``, computing it only on a cache miss.
+
+        Arguments that are :class:`CachedResult` objects are unwrapped before
+        the call and enter the key through their own key. Keyword arguments
+        named in `cache_ignore` (e.g. a Firestore client) are passed to
+        `func` but left out of the key. Changes to the code `func` calls are
+        not seen by the key; bump `cache_version` to invalidate them.
+
+        Returns
+        -------
+        CachedResult
+            The value, its key and whether it came from the cache.
+        """
+        keyed = {k: v for k, v in kwargs.items() if k not in cache_ignore}
+        key = self.key(name, func, args, keyed, cache_version)
+        if key in self:
+            try:
+                return CachedResult(key, self.get(key), hit=True)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                pass  # evicted concurrently or truncated: recompute
+        args = [a.value if isinstance(a, CachedResult) else a for a in args]
+        kwargs = {
+            k: v.value if isinstance(v, CachedResult) else v for k, v in kwargs.items()
+        }
+        value = func(*args, **kwargs)
+        self.put(key, value)
+        return CachedResult(key, value)
@@ -0,0 +1,207 @@
+"""Process-pool execution of the segment pipeline, sharded by user and session."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from awear_neuroscience.pipeline.fused import extract_segment_features, segment_meta
+from awear_neuroscience.pipeline.preprocess import process_features
+
+SHARD_COLS = ("document_name", "session_id")
+
+
+def shard_segments(segments_df: pd.DataFrame) -> List[np.ndarray]:
+    """
+    Row positions of every (document_name, session_id) shard, in order of
+    first appearance; rows keep their order inside a shard.
+    """
+    cols = [c for c in SHARD_COLS if c in segments_df.columns]
+    if not cols or segments_df.empty:
+        return [np.arange(len(segments_df))] if len(segments_df) else []
+    codes = segments_df.groupby(cols, sort=False, dropna=False).ngroup().to_numpy()
+    order = np.argsort(codes, kind="stable")
+    bounds = np.flatnonzero(np.diff(codes[order])) + 1
+    return np.split(order, bounds)
+
+
+def _run_shard(
+    shm_name: str,
+    dtype: str,
+    size: int,
+    offsets: np.ndarray,
+    lengths: np.ndarray,
+    meta: pd.DataFrame,
+    sampling_rate: int,
+    kwargs: Dict[str, Any],
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Worker: featurize one shard whose samples live in shared memory."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        flat = np.ndarray((size,), dtype=dtype, buffer=shm.buf)
+        waveforms = np.empty(len(offsets), dtype=object)
+        waveforms[:] = [flat[o : o + n] for o, n in zip(offsets, lengths)]
+        shard_df = meta.reset_index(drop=True).assign(waveform=waveforms)
+        features, flags = extract_segment_features(shard_df, sampling_rate, **kwargs)
+        # Results must not keep views on the buffer once it is closed
+        del flat, waveforms, shard_df
+    finally:
+        shm.close()
+    if not features.empty:
+        features.index = meta.index[features.index]
+    flags.index = meta.index
+    return features, flags
+
+
+def extract_segment_features_parallel(
+    segments_df: pd.DataFrame,
+    sampling_rate: int,
+    n_workers: Optional[int] = None,
+    **kwargs
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    :func:`extract_segment_features` with the shards spread over processes.
+
+    Segments are sharded by (document_name, session_id) and every shard is
+    filtered, flagged and featurized in a worker process. The raw samples
+    are copied once into a shared-memory block that workers map directly,
+    so only the small per-shard metadata is pickled. Shards are submitted
+    largest first and merged back in input row order, so the result does not
+    depend on scheduling.
+
+    Parameters
+    ----------
+    segments_df : pd.DataFrame
+        One row per segment with a 'waveform' column (see
+        :func:`run_segment_pipeline`).
+    sampling_rate : int
+        Sampling frequency in Hz.
+    n_workers : int, optional
+        Worker processes, default ``os.cpu_count()``. With 1 every shard runs
+        in the calling process.
+    **kwargs :
+        Per-segment options of :func:`extract_segment_features`
+        (artifact method and thresholds, feature families, batch size).
+
+    Returns
+    -------
+    features_df, flags_df : pd.DataFrame
+        As returned by :func:`extract_segment_features`.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    meta = segment_meta(segments_df)
+    shards = shard_segments(meta)
+
+    if n_workers == 1 or len(shards) <= 1:
+        return extract_segment_features(segments_df, sampling_rate, **kwargs)
+
+    waveforms = segments_df["waveform"].to_numpy()
+    lengths = np.fromiter((len(w) for w in waveforms), dtype=int)
+    offsets = np.r_[0, np.cumsum(lengths)[:-1]].astype(int)
+    # One dtype holding every waveform exactly, e.g. float64 for mixed inputs
+    dtype = np.result_type(*{np.asarray(w).dtype for w in waveforms})
+    size = int(lengths.sum())
+
+    shm = shared_memory.SharedMemory(
+        create=True, size=max(size * np.dtype(dtype).itemsize, 1)
+    )
+    try:
+        flat = np.ndarray((size,), dtype=dtype, buffer=shm.buf)
+        for w, o, n in zip(waveforms, offsets, lengths):
+            flat[o : o + n] = w
+        del flat
+
+        results: List[Any] = [None] * len(shards)
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            # Largest shards first keeps the workers evenly loaded
+            futures = {
+                i: pool.submit(
+                    _run_shard,
+                    shm.name,
+                    np.dtype(dtype).str,
+                    size,
+                    offsets[shards[i]],
+                    lengths[shards[i]],
+                    meta.iloc[shards[i]],
+                    sampling_rate,
+                    kwargs,
+                )
+                for i in sorted(
+                    range(len(shards)), key=lambda i: -lengths[shards[i]].sum()
+                )
+            }
+            for i, future in futures.items():
+                results[i] = future.result()
+    finally:
+        shm.close()
+        shm.unlink()
+
+    frames = [f for f, _ in results if not f.empty]
+    features = pd.concat(frames).sort_index() if frames else pd.DataFrame()
+    flags_df = pd.concat([flags for _, flags in results]).sort_index()
+    return features, flags_df
+
+
+def run_parallel_pipeline(
+    segments_df: pd.DataFrame,
+    sampling_rate: int,
+    alpha: float,
+    columns_to_normalize: Optional[List[str]] = None,
+    n_workers: Optional[int] = None,
+    normalization: str = "zscore",
+    state: Optional[Dict[str, Any]] = None,
+    **kwargs
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    :func:`run_segment_pipeline` with the per-segment work spread over processes.
+
+    The heavy filter / flag / feature half runs in
+    :func:`extract_segment_features_parallel`; EMA, normalization and time
+    features then run once in the parent over the merged feature rows,
+    giving exactly the single-process output.
+
+    Parameters
+    ----------
+    segments_df : pd.DataFrame
+        One row per segment with a 'waveform' column.
+    sampling_rate : int
+        Sampling frequency in Hz.
+    alpha : float
+        Smoothing factor for exponential moving average filtering.
+    columns_to_normalize : List[str], optional
+        Columns normalized per user after filtering.
+    n_workers : int, optional
+        Worker processes, default ``os.cpu_count()``.
+    normalization : {'zscore', 'robust'}, default 'zscore'
+        Per-user normalization method.
+    state : dict, optional
+        Resumable smoothing/normalization state (see ``process_features``).
+    **kwargs :
+        Per-segment options of :func:`extract_segment_features`.
+
+    Returns
+    -------
+    features_df, flags_df : pd.DataFrame
+        As returned by :func:`run_segment_pipeline`.
+    """
+    features, flags_df = extract_segment_features_parallel(
+        segments_df, sampling_rate, n_workers, **kwargs
+    )
+    flags_df = flags_df.reset_index(drop=True)
+    if features.empty:
+        return features, flags_df
+    features = features.reset_index(drop=True)
+    return (
+        process_features(
+            features,
+            alpha,
+            columns_to_normalize,
+            state=state,
+            normalization=normalization,
+            precision=kwargs.get("precision"),
+        ),
+        flags_df,
+    )
@@ -8,23 +8,94 @@ from awear_neuroscience.data_extraction.firestore_loader import (
 from awear_neuroscience.data_extraction.reshape import (construct_long_df,
                                                         normalize_session)
 from awear_neuroscience.signal_processing.artifacts import detect_artifacts
-from awear_neuroscience.signal_processing.features import (
-    add_time_features, apply_ema_filtering, compute_psd, extract_band_features,
-    normalize_indexes)
+from awear_neuroscience.signal_processing.bands import EEG_BANDS
+from awear_neuroscience.signal_processing.features import (add_time_features,
+                                                           apply_ema_filtering,
+                                                           compute_psd,
+                                                           group_blocks,
+                                                           normalize_indexes,
+                                                           sliding_window_psd)
 from awear_neuroscience.signal_processing.filters import preprocess_segment
+from awear_neuroscience.signal_processing.precision import get_policy
+from awear_neuroscience.signal_processing.spectral import (
+    fit_aperiodic, periodic_band_powers, spectral_shape_features)
+from awear_neuroscience.utils.profiling import profiled
 
 
+def artifact_flags(
+    segments,
+    seg_max: np.ndarray,
+    sampling_rate: int,
+    method: str,
+    amplitude_threshold: float,
+    **artifact_kwargs
+) -> np.ndarray:
+    """detect_artifacts for every filtered segment; amplitude reuses `seg_max`."""
+    if method == "amplitude":
+        return np.asarray(seg_max > amplitude_threshold, dtype=bool)
+    return np.array(
+        [
+            detect_artifacts(
+                seg,
+                fs=sampling_rate,
+                method=method,
+                amp_thresh=amplitude_threshold,
+                **artifact_kwargs
+            )
+            for seg in segments
+        ],
+        dtype=bool,
+    )
+
+
+def segment_band_features(
+    signals: np.ndarray,
+    sampling_rate: int,
+    spectral_shape: bool = False,
+    aperiodic: bool = False,
+    psd_method: str = "welch",
+    precision=None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Band features and optional shape / aperiodic features of equal-length
+    segments, as ``(bands_df, extra_df)`` in the policy's feature dtype.
+    Shared by the staged and the fused pipelines.
+    """
+    policy = get_policy(precision)
+    signals = policy.as_compute(signals)
+    freqs, psd = compute_psd(signals, sampling_rate, method=psd_method)
+    plan = EEG_BANDS.compile_freqs(freqs)
+    feat = pd.DataFrame(plan.band_powers(psd), columns=list(plan.names))
+    extra = {}
+    if spectral_shape:
+        extra.update(spectral_shape_features(freqs, psd, signals))
+    if aperiodic:
+        params = fit_aperiodic(freqs, psd)
+        extra.update(params)
+        extra.update(periodic_band_powers(freqs, psd, params))
+    return policy.as_features(feat), policy.as_features(pd.DataFrame(extra))
+
+
+@profiled("process_long_df", records="long_df", segments="long_df")
 def process_long_df(
     long_df: pd.DataFrame,
     sampling_rate: int,
     artifacts_detection_method: str = "amplitude",
     amplitude_threshold: float = 20,
+    batch_size: int = 4096,
+    precision=None,
     **artifact_kwargs
 ) -> pd.DataFrame:
     """
     Process the “long” DataFrame: segment-wise filtering,
     max-abs annotation, and artifact‐flagging.
 
+    Rows are addressed through the offsets of each segment block (the loader
+    writes every segment as one contiguous run of rows), so the stage is
+    linear in the number of rows: segments of equal length are filtered
+    together in batches of `batch_size`, and per-segment results are
+    broadcast back to their rows instead of being merged on 'segment'.
+
     Parameters
     ----------
     long_df : DataFrame
@@ -35,6 +106,12 @@ def process_long_df(
         Artifact detection method.
     amplitude_threshold : float, default 20
         Amplitude threshold (used if method='amplitude').
+    batch_size : int, default 4096
+        Segments filtered per call, bounding the size of the working copy.
+    precision : str or DtypePolicy, optional
+        dtype policy (see ``precision.get_policy``): segments are filtered in
+        its compute dtype and the new signal columns stored in its signal
+        dtype, float32 by default.
     **artifact_kwargs :
         Extra method-specific kwargs for detect_artifacts.
 
@@ -42,58 +119,83 @@ def process_long_df(
     -------
     long_df : pd.DataFrame
         With columns ['filtered_value','abs_filtered','max_abs_filtered_value','is_artifact',…].
+        Rows without a segment or with a NaN filtered value are dropped.
     """
+    # 1) segment-wise filtering, on rows grouped into contiguous segment blocks
+    # (already the case for loader output, which keeps the sort a no-op)
+    order, _, starts, stops = group_blocks(long_df["segment"])
+    lengths = stops - starts
+    policy = get_policy(precision)
+    raw = long_df["waveform_value"].to_numpy()[order]
+    filtered = np.empty(raw.shape, dtype=policy.signal)
+    for length in np.unique(lengths):
+        blocks = np.flatnonzero(lengths == length)
+        for i in range(0, blocks.size, batch_size):
+            rows = starts[blocks[i : i + batch_size], None] + np.arange(length)
+            filtered[rows] = preprocess_segment(
+                raw[rows], sampling_rate, dtype=policy.compute
+            )
 
-    # 1) segment-wise filtering
-    segments = long_df["segment"].unique()
-    filtered = [
-        preprocess_segment(
-            long_df.loc[long_df.segment == seg, "waveform_value"].values, sampling_rate
-        )
-        for seg in segments
-    ]
-    long_df["filtered_value"] = np.concatenate(filtered)
-    long_df["abs_filtered"] = np.abs(long_df["filtered_value"])
-
-    # 2) max-abs annotation
-    max_abs = (
-        long_df.groupby("segment")["abs_filtered"]
-        .max()
-        .reset_index(name="max_abs_filtered_value")
-    )
-    long_df = long_df.merge(max_abs, on="segment", how="left")
+    # 2) max-abs annotation, broadcast back to the rows of each segment
+    abs_filtered = np.abs(filtered)
+    seg_max = np.fmax.reduceat(abs_filtered, starts) if starts.size else starts
 
-    # 3) cleanup
-    long_df = long_df.dropna(subset=["segment", "filtered_value"]).reset_index(
-        drop=True
+    # 3) artifact detection
+    seg_flags = artifact_flags(
+        (filtered[start:stop] for start, stop in zip(starts, stops)),
+        seg_max,
+        sampling_rate,
+        artifacts_detection_method,
+        amplitude_threshold,
+        **artifact_kwargs
     )
 
-    # 4) artifact detection
-    flags = (
-        long_df.groupby("segment")["filtered_value"]
-        .apply(
-            lambda x: detect_artifacts(
-                x.values,
-                fs=sampling_rate,
-                method=artifacts_detection_method,
-                amp_thresh=amplitude_threshold,
-                **artifact_kwargs
-            )
+    # 4) write back in the original row order; rows without a segment or
+    # with a NaN filtered value drop out
+    lengths = lengths.astype(np.intp)
+    valid = ~np.isnan(filtered)
+    if not valid.all():
+        order, filtered, abs_filtered = (
+            order[valid],
+            filtered[valid],
+            abs_filtered[valid],
         )
-        .reset_index(name="is_artifact")
-    )
-    long_df = long_df.merge(flags, on="segment", how="left")
+        lengths = np.add.reduceat(valid, starts).astype(np.intp)
+    if order.size == len(long_df) and np.all(order[1:] > order[:-1]):
+        # Contiguous layout: arrays already line up, no row reshuffling
+        back = slice(None)
+        long_df = long_df.copy(deep=False)
+    else:
+        pos = np.full(len(long_df), -1)
+        pos[order] = np.arange(order.size)
+        kept = np.flatnonzero(pos >= 0)
+        back = pos[kept]
+        long_df = long_df.iloc[kept].copy()
+    long_df["filtered_value"] = filtered[back]
+    long_df["abs_filtered"] = abs_filtered[back]
+    long_df["max_abs_filtered_value"] = np.repeat(seg_max, lengths)[back]
+    long_df["is_artifact"] = np.repeat(seg_flags, lengths)[back]
+    long_df.index = pd.RangeIndex(len(long_df))
 
     return long_df
 
 
+@profiled("extract_features_from_long_df", records="long_df", segments="return")
 def extract_features_from_long_df(
-    long_df: pd.DataFrame, sampling_rate: int
+    long_df: pd.DataFrame,
+    sampling_rate: int,
+    spectral_shape: bool = False,
+    aperiodic: bool = False,
+    psd_method: str = "welch",
+    precision=None,
 ) -> pd.DataFrame:
     """
     For each non‐artifact segment in long_df, compute PSD and extract band features,
     preserving optional document_name and session_id in the output.
 
+    Segments are stacked into a (n_segments, n_samples) matrix so the PSD and
+    every feature are computed once for the whole batch.
+
     Parameters
     ----------
     long_df : pd.DataFrame
@@ -104,6 +206,17 @@ def extract_features_from_long_df(
           - 'document_name', 'session_id'
     sampling_rate : float
         Fs for compute_psd.
+    spectral_shape : bool, default False
+        Also add spectral entropy, spectral edge frequencies, peak alpha
+        frequency, relative band powers and Hjorth parameters.
+    aperiodic : bool, default False
+        Also add the aperiodic (1/f) offset and exponent of every segment and
+        the band powers of the flattened spectrum (``{band}_periodic``).
+    psd_method : {'welch', 'multitaper'}, default 'welch'
+        Spectral estimator passed to compute_psd.
+    precision : str or DtypePolicy, optional
+        dtype policy: spectra are estimated in its compute dtype and the
+        features stored in its feature dtype.
 
     Returns
     -------
@@ -115,36 +228,160 @@ def extract_features_from_long_df(
           - (optional) document_name
           - (optional) session_id
     """
-    features = []
-    for seg, seg_df in long_df.groupby("segment"):
-        if not seg_df["is_artifact"].iloc[0]:
-            signal = seg_df["filtered_value"].values
-            freqs, psd = compute_psd(signal, sampling_rate)
-
-            # Base feature dict
-            feat = extract_band_features(
-                freqs,
-                psd,
-                segment=seg,
-                focus_type=seg_df["focus_type"].iloc[0],
-                timestamp=seg_df["timestamp"].iloc[0],
+    meta_cols = ["segment", "focus_type", "timestamp"] + [
+        col for col in ("document_name", "session_id") if col in long_df.columns
+    ]
+    # First row of every segment, in groupby (sorted segment) order
+    first = long_df.drop_duplicates("segment").sort_values("segment", kind="stable")
+    first = first[~first["is_artifact"].astype(bool)]
+    if first.empty:
+        return pd.DataFrame()
+
+    positions = long_df.groupby("segment").indices
+    values = long_df["filtered_value"].to_numpy()
+    segments = first["segment"].to_numpy()
+    lengths = np.array([positions[seg].size for seg in segments])
+
+    frames = []
+    # Segments of equal length share one PSD call and one band plan
+    for length in np.unique(lengths):
+        rows = np.flatnonzero(lengths == length)
+        signals = np.stack([values[positions[segments[i]]] for i in rows])
+        bands_df, extra = segment_band_features(
+            signals, sampling_rate, spectral_shape, aperiodic, psd_method, precision
+        )
+        meta = first.iloc[rows][meta_cols].reset_index(drop=True)
+        feat = pd.concat([bands_df, meta, extra], axis=1)
+        feat.index = rows
+        frames.append(feat)
+
+    return pd.concat(frames).sort_index().reset_index(drop=True)
+
+
+def extract_sliding_window_features(
+    long_df: pd.DataFrame,
+    sampling_rate: int,
+    window_s: float = 4.0,
+    hop_s: float = 0.5,
+    value_col: str = "filtered_value",
+    psd_method: str = "welch",
+    max_gap_s: float = 1.5,
+    drop_artifacts: bool = True,
+    precision=None,
+) -> pd.DataFrame:
+    """
+    Band features on sliding windows over the stitched continuous signal,
+    independent of the 1-second segment grid.
+
+    Segments of each (document_name, session_id) are ordered by time and
+    concatenated; a new run starts wherever consecutive segments are more
+    than `max_gap_s` apart, and windows never cross runs. Each run is
+    analysed with one strided view and batched FFTs (see sliding_window_psd).
+
+    Parameters
+    ----------
+    long_df : pd.DataFrame
+        Long-format frame with 'segment', 'time_UTC', 'focus_type' and
+        `value_col`; optionally 'document_name', 'session_id', 'is_artifact'.
+    sampling_rate : int
+        Sampling frequency in Hz.
+    window_s : float, default 4.0
+        Window length in seconds.
+    hop_s : float, default 0.5
+        Step between windows in seconds.
+    value_col : str, default 'filtered_value'
+        Signal column to analyse.
+    psd_method : {'welch', 'multitaper'}, default 'welch'
+        Spectral estimator passed to compute_psd.
+    max_gap_s : float, default 1.5
+        Largest start-to-start distance between consecutive segments that
+        still counts as continuous signal.
+    drop_artifacts : bool, default True
+        Drop windows overlapping an artifact segment; otherwise keep them
+        and report 'is_artifact'.
+    precision : str or DtypePolicy, optional
+        dtype policy: spectra are estimated in its compute dtype and the
+        band powers stored in its feature dtype.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per window with all band features plus 'timestamp' (window
+        start, UTC), 'segment' and 'focus_type' of the first segment in the
+        window, 'is_artifact' and the optional grouping columns.
+    """
+    window = int(round(window_s * sampling_rate))
+    hop = int(round(hop_s * sampling_rate))
+    group_cols = [c for c in ("document_name", "session_id") if c in long_df.columns]
+    has_flags = "is_artifact" in long_df.columns
+
+    seg_df = long_df.drop_duplicates("segment")
+    seg_df = seg_df.assign(time_UTC=pd.to_datetime(seg_df["time_UTC"], utc=True))
+    positions = long_df.groupby("segment").indices
+    policy = get_policy(precision)
+    values = policy.as_compute(long_df[value_col].to_numpy())
+    groups = seg_df.groupby(group_cols, sort=False) if group_cols else [(None, seg_df)]
+
+    frames = []
+    for _, segs in groups:
+        segs = segs.sort_values("time_UTC", kind="stable")
+        gaps = segs["time_UTC"].diff().dt.total_seconds() > max_gap_s
+        for _, run in segs.groupby(gaps.cumsum().to_numpy(), sort=False):
+            seg_rows = [positions[seg] for seg in run["segment"]]
+            lengths = np.array([rows.size for rows in seg_rows])
+            freqs, psd, starts = sliding_window_psd(
+                values[np.concatenate(seg_rows)],
+                sampling_rate,
+                window,
+                hop,
+                method=psd_method,
+                precision=policy,
             )
+            if not starts.size:
+                continue
 
-            # Inject optional metadata if it exists
-            if "document_name" in seg_df.columns:
-                feat["document_name"] = seg_df["document_name"].iloc[0]
-            if "session_id" in seg_df.columns:
-                feat["session_id"] = seg_df["session_id"].iloc[0]
+            # Segment holding the first and last sample of every window
+            seg_start = np.r_[0, np.cumsum(lengths)[:-1]]
+            first = np.searchsorted(seg_start, starts, side="right") - 1
+            last = np.searchsorted(seg_start, starts + window - 1, side="right") - 1
 
-            features.append(feat)
+            plan = EEG_BANDS.compile_freqs(freqs)
+            feat = policy.as_features(
+                pd.DataFrame(plan.band_powers(psd), columns=list(plan.names))
+            )
+            first_meta = run.iloc[first]
+            feat["segment"] = first_meta["segment"].to_numpy()
+            feat["focus_type"] = first_meta["focus_type"].to_numpy()
+            offsets = (starts - seg_start[first]) / sampling_rate
+            feat["timestamp"] = pd.DatetimeIndex(
+                first_meta["time_UTC"]
+            ) + pd.to_timedelta(offsets, unit="s")
+            for col in group_cols:
+                feat[col] = first_meta[col].to_numpy()
+            if has_flags:
+                # Windows overlapping any flagged segment, via a cumulative count
+                flagged = np.r_[0, np.cumsum(run["is_artifact"].to_numpy(dtype=int))]
+                feat["is_artifact"] = flagged[last + 1] - flagged[first] > 0
+            else:
+                feat["is_artifact"] = False
+            frames.append(feat)
 
-    return pd.DataFrame(features)
+    if not frames:
+        return pd.DataFrame()
+    features_df = pd.concat(frames, ignore_index=True)
+    if drop_artifacts:
+        features_df = features_df[~features_df["is_artifact"]].reset_index(drop=True)
+    return features_df
 
 
+@profiled("process_features", records="features_df", segments="features_df")
 def process_features(
     features_df: pd.DataFrame,
     alpha: float,
     columns_to_normalize: Optional[List[str]] = None,
+    state: Optional[Dict[str, Any]] = None,
+    normalization: str = "zscore",
+    precision=None,
 ) -> pd.DataFrame:
     """
     Sequentially apply EMA filtering, optional index normalization, and time feature engineering.
@@ -158,6 +395,15 @@ def process_features(
     columns_to_normalize : List[str], optional
         Column names in `features_df` to be normalized after filtering.
         If None or empty, normalization is skipped.
+    state : dict, optional
+        Resumable smoothing/normalization state with keys ``"ema"`` and
+        ``"norm"`` (see ``FeatureState``). When given, `features_df` is treated
+        as the rows that arrived since the previous call and the state is
+        updated in place.
+    normalization : {'zscore', 'robust'}, default 'zscore'
+        Per-user normalization method (see ``normalize_indexes``).
+    precision : str or DtypePolicy, optional
+        dtype policy of the smoothed and normalized columns.
 
     Returns
     -------
@@ -165,12 +411,23 @@ def process_features(
         A new DataFrame with EMA filtering applied, specified columns normalized (if any),
         and additional time-based features added.
     """
+    ema_state = state.setdefault("ema", {}) if state is not None else None
+    norm_state = state.setdefault("norm", {}) if state is not None else None
+
     # 1) EMA smoothing
-    df = apply_ema_filtering(features_df, alpha=alpha)
+    df = apply_ema_filtering(
+        features_df, alpha=alpha, state=ema_state, precision=precision
+    )
 
     # 2) Normalize selected columns if provided
     if columns_to_normalize:
-        df = normalize_indexes(df, columns_to_normalize)
+        df = normalize_indexes(
+            df,
+            columns_to_normalize,
+            state=norm_state,
+            method=normalization,
+            precision=precision,
+        )
 
     # 3) Add derived time features
     df = add_time_features(df)
@@ -0,0 +1,397 @@
+"""
+Asyncio real-time scoring of 1-second EEG segments, one queue per user.
+
+Each arriving waveform goes through filter → artifact check → band powers →
+EMA → derived indexes straight away, carrying only the per-user EMA state
+from one segment to the next; the smoothed values match what the batch
+pipeline computes over the same segments. Per-user queues are bounded:
+producers either wait for room (backpressure) or the engine sheds segments,
+and every stage records its latency in a histogram.
+
+Usage::
+
+    async with ScoringEngine(SAMPLING_RATE, alpha=2 / 16) as engine:
+        await engine.submit("user@eeg.com", waveform, timestamp)
+        score = await engine.results.get()
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import numpy as np
+
+from awear_neuroscience.pipeline.preprocess import artifact_flags
+from awear_neuroscience.signal_processing.bands import EEG_BANDS
+from awear_neuroscience.signal_processing.features import (
+    compute_psd,
+    derived_indexes,
+    ema_block,
+)
+from awear_neuroscience.signal_processing.filters import preprocess_segment
+from awear_neuroscience.signal_processing.precision import get_policy
+
+STAGES = ("filter", "artifact", "bands", "ema", "indexes")
+
+# Upper bucket edges in milliseconds, four per decade from 10 µs to 10 s
+LATENCY_BUCKETS_MS = tuple(float(b) for b in np.logspace(-2, 4, 25))
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram, cheap enough to update per segment.
+
+    Parameters
+    ----------
+    bounds_ms : sequence of float
+        Increasing upper bucket edges in milliseconds; slower samples go
+        into a final overflow bucket.
+    """
+
+    def __init__(self, bounds_ms=LATENCY_BUCKETS_MS):
+        self.bounds_ms = np.asarray(bounds_ms, dtype=float)
+        self.counts = np.zeros(len(self.bounds_ms) + 1, dtype=np.int64)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float) -> None:
+        ms = seconds * 1e3
+        self.counts[np.searchsorted(self.bounds_ms, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Upper edge of the bucket holding quantile `q`, in milliseconds."""
+        if not self.count:
+            return 0.0
+        i = int(np.searchsorted(np.cumsum(self.counts), q * self.count))
+        return float(self.bounds_ms[i]) if i < len(self.bounds_ms) else self.max_ms
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_ms": self.mean_ms,
+            "p50_ms": self.quantile(0.5),
+            "p90_ms": self.quantile(0.9),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": self.max_ms,
+        }
+
+
+@dataclass
+class Score:
+    """
+    Result of one segment.
+
+    Attributes
+    ----------
+    user : str
+        The ``document_name`` the segment belongs to.
+    timestamp : Any
+        Timestamp passed to :meth:`ScoringEngine.submit`.
+    is_artifact : bool
+        Whether the segment was flagged; flagged segments carry no values
+        and leave the EMA untouched, as in the batch pipeline. Segments that
+        failed to score are flagged too.
+    max_abs : float
+        Maximum absolute filtered amplitude.
+    values : dict
+        Band powers, ``*_fil`` smoothed powers and derived indexes.
+    latency_s : float
+        Time from submission to result, queueing included.
+    error : str, optional
+        Why scoring failed, e.g. a segment too short to filter.
+    """
+
+    user: str
+    timestamp: Any
+    is_artifact: bool
+    max_abs: float
+    values: Dict[str, float] = field(default_factory=dict)
+    latency_s: float = 0.0
+    error: Optional[str] = None
+
+
+class SegmentScorer:
+    """
+    Synchronous per-segment scoring core shared by all users of an engine.
+
+    Parameters
+    ----------
+    sampling_rate : int
+        Sampling frequency in Hz.
+    alpha : float
+        Smoothing factor for exponential moving average filtering.
+    artifacts_detection_method : str, default 'amplitude'
+        Artifact detection method (see ``detect_artifacts``).
+    amplitude_threshold : float, default 20
+        Amplitude threshold (used if method='amplitude').
+    psd_method : {'welch', 'multitaper'}, default 'welch'
+        Spectral estimator passed to compute_psd.
+    state : dict, optional
+        EMA state in the format of ``apply_ema_filtering``
+        (``{"columns": [...], "users": {user: {"last", "gap"}}}``), so a
+        stream can resume from a batch run and vice versa. Updated in place.
+    precision : str or DtypePolicy, optional
+        dtype policy of filtering and of the filtered signal, as in the batch
+        pipeline.
+    **artifact_kwargs :
+        Extra method-specific kwargs for detect_artifacts.
+    """
+
+    def __init__(
+        self,
+        sampling_rate: int,
+        alpha: float,
+        artifacts_detection_method: str = "amplitude",
+        amplitude_threshold: float = 20,
+        psd_method: str = "welch",
+        state: Optional[Dict[str, Any]] = None,
+        precision=None,
+        **artifact_kwargs,
+    ):
+        self.sampling_rate = sampling_rate
+        self.policy = get_policy(precision)
+        self.alpha = alpha
+        self.artifacts_detection_method = artifacts_detection_method
+        self.amplitude_threshold = amplitude_threshold
+        self.psd_method = psd_method
+        self.artifact_kwargs = artifact_kwargs
+        self.state = state if state is not None else {}
+        columns = self.state.setdefault("columns", list(EEG_BANDS.names))
+        if list(columns) != list(EEG_BANDS.names):
+            raise ValueError(
+                f"EMA state was built for columns {list(columns)}, "
+                f"got {list(EEG_BANDS.names)}"
+            )
+        self.users = self.state.setdefault("users", {})
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+
+    def score(self, user: str, waveform: np.ndarray) -> Score:
+        """Score one segment of `user` and advance its EMA state."""
+        clock = time.perf_counter
+        hist = self.histograms
+
+        t0 = clock()
+        filtered = self.policy.as_signal(
+            preprocess_segment(
+                np.asarray(waveform), self.sampling_rate, dtype=self.policy.compute
+            )
+        )
+        max_abs = float(np.abs(filtered).max())
+        t1 = clock()
+        hist["filter"].record(t1 - t0)
+
+        flagged = bool(
+            artifact_flags(
+                filtered[None],
+                np.array([max_abs]),
+                self.sampling_rate,
+                self.artifacts_detection_method,
+                self.amplitude_threshold,
+                **self.artifact_kwargs,
+            )[0]
+        )
+        t2 = clock()
+        hist["artifact"].record(t2 - t1)
+        if flagged:
+            return Score(user, None, True, max_abs)
+
+        freqs, psd = compute_psd(
+            self.policy.as_compute(filtered), self.sampling_rate, method=self.psd_method
+        )
+        plan = EEG_BANDS.compile_freqs(freqs)
+        powers = plan.band_powers(psd)
+        t3 = clock()
+        hist["bands"].record(t3 - t2)
+
+        # The EMA accumulates in float64, as in apply_ema_filtering; only its
+        # outputs are stored in the feature dtype
+        prev = self.users.get(user, {})
+        smoothed, last, gap = ema_block(
+            powers[None].astype(np.float64),
+            self.alpha,
+            prev.get("last"),
+            prev.get("gap"),
+        )
+        self.users[user] = {"last": last, "gap": gap}
+        t4 = clock()
+        hist["ema"].record(t4 - t3)
+
+        # numpy scalars, so zero denominators give inf instead of raising
+        values = dict(zip(plan.names, powers.astype(self.policy.features)))
+        smoothed = smoothed[0].astype(self.policy.features)
+        values.update((f"{name}_fil", v) for name, v in zip(plan.names, smoothed))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values.update(derived_indexes(values))
+        # Same clean-up as apply_ema_filtering: inf / NaN become 0
+        values = {k: float(v) if np.isfinite(v) else 0.0 for k, v in values.items()}
+        hist["indexes"].record(clock() - t4)
+        return Score(user, None, False, max_abs, values)
+
+
+class ScoringEngine:
+    """
+    Score streamed segments per user under a latency budget.
+
+    Every user gets a bounded queue and a worker task that scores its
+    segments in arrival order. When a queue is full, :meth:`submit` either
+    waits for room (``shed=None``, backpressure onto the producer) or sheds
+    a segment: ``'oldest'`` drops the longest-waiting one so results stay
+    current, ``'newest'`` drops the incoming one. Segments that waited more
+    than `max_lag_s` before scoring are shed as well. Shed segments behave
+    like artifacts: they are skipped by the EMA.
+
+    Results go to :attr:`results` (bounded too, so a slow consumer
+    eventually holds back the workers) or to the `on_result` coroutine.
+    A segment that fails to score (e.g. too short to filter) yields a flagged
+    :class:`Score` carrying the error, is counted in :attr:`errors`, and the
+    user's worker carries on with the next segment.
+
+    Parameters
+    ----------
+    sampling_rate : int
+        Sampling frequency in Hz.
+    alpha : float
+        Smoothing factor for exponential moving average filtering.
+    max_pending : int, default 8
+        Queue capacity per user, in segments.
+    shed : {'oldest', 'newest', None}, default 'oldest'
+        Load-shedding policy for full queues; None applies backpressure.
+    max_lag_s : float, optional
+        Shed segments that waited longer than this before scoring.
+    output_size : int, default 1024
+        Capacity of :attr:`results`.
+    on_result : coroutine function, optional
+        Awaited with every :class:`Score` instead of queueing it.
+    **scorer_kwargs :
+        Options of :class:`SegmentScorer` (artifact method and threshold,
+        PSD method, resumable EMA state).
+    """
+
+    def __init__(
+        self,
+        sampling_rate: int,
+        alpha: float,
+        max_pending: int = 8,
+        shed: Optional[str] = "oldest",
+        max_lag_s: Optional[float] = None,
+        output_size: int = 1024,
+        on_result: Optional[Callable[[Score], Awaitable[None]]] = None,
+        **scorer_kwargs,
+    ):
+        if shed not in ("oldest", "newest", None):
+            raise ValueError(f"Unknown shed policy: {shed}")
+        self.scorer = SegmentScorer(sampling_rate, alpha, **scorer_kwargs)
+        self.max_pending = max_pending
+        self.shed = shed
+        self.max_lag_s = max_lag_s
+        self.on_result = on_result
+        self.results: "asyncio.Queue[Score]" = asyncio.Queue(output_size)
+        self.latency = LatencyHistogram()
+        self.processed: Dict[str, int] = {}
+        self.dropped: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+
+    async def __aenter__(self) -> "ScoringEngine":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop(drain=exc[0] is None)
+
+    def _queue(self, user: str) -> asyncio.Queue:
+        queue = self._queues.get(user)
+        if queue is None:
+            queue = self._queues[user] = asyncio.Queue(self.max_pending)
+            self.processed.setdefault(user, 0)
+            self.dropped.setdefault(user, 0)
+            self.errors.setdefault(user, 0)
+            self._workers[user] = asyncio.create_task(self._work(user, queue))
+        return queue
+
+    async def submit(self, user: str, waveform, timestamp: Any = None) -> bool:
+        """
+        Queue one segment of `user` for scoring.
+
+        Returns
+        -------
+        bool
+            False if the segment itself was shed.
+        """
+        queue = self._queue(user)
+        item = (np.asarray(waveform), timestamp, time.perf_counter())
+        if self.shed is None:
+            await queue.put(item)
+            return True
+        if queue.full():
+            self.dropped[user] += 1
+            if self.shed == "newest":
+                return False
+            queue.get_nowait()
+            queue.task_done()
+        queue.put_nowait(item)
+        return True
+
+    async def _work(self, user: str, queue: asyncio.Queue) -> None:
+        while True:
+            waveform, timestamp, submitted = await queue.get()
+            try:
+                if (
+                    self.max_lag_s is not None
+                    and time.perf_counter() - submitted > self.max_lag_s
+                ):
+                    self.dropped[user] += 1
+                    continue
+                try:
+                    score = self.scorer.score(user, waveform)
+                    self.processed[user] += 1
+                except Exception as e:
+                    # One bad segment must not stop the user's worker
+                    self.errors[user] += 1
+                    score = Score(user, None, True, float("nan"), error=repr(e))
+                score.timestamp = timestamp
+                score.latency_s = time.perf_counter() - submitted
+                self.latency.record(score.latency_s)
+                if self.on_result is not None:
+                    await self.on_result(score)
+                else:
+                    await self.results.put(score)
+            finally:
+                queue.task_done()
+            # Scoring is synchronous; yield so other users and producers run
+            await asyncio.sleep(0)
+
+    async def drain(self) -> None:
+        """Wait until every queued segment has been scored or shed."""
+        await asyncio.gather(*(q.join() for q in self._queues.values()))
+
+    async def stop(self, drain: bool = True) -> None:
+        """Stop the workers, by default after scoring what is queued."""
+        if drain:
+            await self.drain()
+        for task in self._workers.values():
+            task.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+        self._queues.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-stage and end-to-end latency summaries and per-user counts."""
+        return {
+            "stages": {
+                name: hist.to_dict() for name, hist in self.scorer.histograms.items()
+            },
+            "end_to_end": self.latency.to_dict(),
+            "processed": dict(self.processed),
+            "dropped": dict(self.dropped),
+            "errors": dict(self.errors),
+        }
@@ -0,0 +1,284 @@
+"""Partitioned Parquet store for feature tables."""
+
+import functools
+import json
+import operator
+import os
+import shutil
+import uuid
+import warnings
+from typing import Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+PARTITION_COLS = ["document_name", "date"]
+# Source UTC offset of every stored row; timestamps themselves are stored in UTC
+OFFSET_COL = "utc_offset_minutes"
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.dataset  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "The feature store needs pyarrow; install it with "
+            "`pip install awear_neuroscience[store]`"
+        ) from e
+
+
+def _as_list(value) -> Optional[List]:
+    if value is None:
+        return None
+    if isinstance(value, str) or not isinstance(value, Iterable):
+        return [value]
+    return list(value)
+
+
+def to_utc(ts) -> pd.Timestamp:
+    """`ts` as a UTC timestamp; naive values are taken as UTC."""
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def utc_offset_minutes(timestamps: pd.Series) -> np.ndarray:
+    """
+    UTC offset in minutes of every timestamp as written: 0 for naive and UTC
+    values, and per row for strings with mixed offsets (e.g. across a
+    daylight saving change).
+    """
+    ts = timestamps
+    if not pd.api.types.is_datetime64_any_dtype(ts):
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("error", FutureWarning)
+                ts = pd.to_datetime(ts)
+        except (FutureWarning, ValueError, TypeError):
+            # Mixed offsets do not fit one datetime64 dtype
+            offsets = [pd.Timestamp(v).utcoffset() for v in timestamps]
+            return np.array(
+                [0 if o is None else o.total_seconds() // 60 for o in offsets],
+                dtype=np.int32,
+            )
+    if ts.dt.tz is None:
+        return np.zeros(len(ts), dtype=np.int32)
+    local = ts.dt.tz_localize(None)
+    utc = ts.dt.tz_convert("UTC").dt.tz_localize(None)
+    return ((local - utc).dt.total_seconds() // 60).to_numpy(dtype=np.int32)
+
+
+class FeatureStore:
+    """
+    Append-only feature tables stored as Parquet, partitioned by user and day.
+
+    Every table lives under ``root/<table>/document_name=<user>/date=<YYYY-MM-DD>/``
+    and each :meth:`append` adds new files without touching existing ones, so
+    segments processed today are stored without rewriting past days. Reads go
+    through ``pyarrow.dataset``: partitions outside the requested users and
+    dates are never opened, only the requested columns are decoded, and the
+    remaining row filters are pushed down to the Parquet row groups.
+
+    Parameters
+    ----------
+    root : str
+        Directory holding the tables; created on the first write.
+
+    Examples
+    --------
+    >>> store = FeatureStore("feature_store")
+    >>> store.append(features_df)
+    >>> df = store.read(users="a@eeg.com", start="2025-07-01", columns=["alpha"])
+    """
+
+    def __init__(self, root: str):
+        _require_pyarrow()
+        self.root = str(root)
+
+    def _path(self, table: str) -> str:
+        return os.path.join(self.root, table)
+
+    @staticmethod
+    def _partitioning():
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        return ds.partitioning(
+            pa.schema([(col, pa.string()) for col in PARTITION_COLS]), flavor="hive"
+        )
+
+    def _dataset(self, table: str):
+        import pyarrow.dataset as ds
+
+        return ds.dataset(
+            self._path(table), format="parquet", partitioning=self._partitioning()
+        )
+
+    def tables(self) -> List[str]:
+        """Names of the tables in the store."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name
+            for name in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, name))
+        )
+
+    def exists(self, table: str) -> bool:
+        """
+        Whether `table` holds at least one Parquet data file; a directory
+        with only metadata, or left empty, does not count.
+        """
+        return any(
+            name.endswith(".parquet")
+            for _, _, files in os.walk(self._path(table))
+            for name in files
+        )
+
+    def drop(self, table: str) -> None:
+        """Delete `table` and all its partitions."""
+        shutil.rmtree(self._path(table), ignore_errors=True)
+
+    def get_meta(self, table: str) -> dict:
+        """User metadata stored next to `table` (empty if none)."""
+        path = os.path.join(self._path(table), "_meta.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def set_meta(self, table: str, meta: dict) -> None:
+        """Store JSON metadata next to `table`; the dataset reader skips it."""
+        os.makedirs(self._path(table), exist_ok=True)
+        with open(os.path.join(self._path(table), "_meta.json"), "w") as f:
+            json.dump(meta, f)
+
+    def schema(self, table: str = "features"):
+        """Arrow schema of `table`, partition columns included."""
+        return self._dataset(table).schema
+
+    def append(self, features_df: pd.DataFrame, table: str = "features") -> int:
+        """
+        Append feature rows to `table`.
+
+        Parameters
+        ----------
+        features_df : pd.DataFrame
+            Feature rows with 'document_name' and 'timestamp' columns, e.g.
+            the output of ``extract_features_from_long_df`` or
+            ``process_features``. 'timestamp' is stored as a UTC datetime
+            and its source offset as 'utc_offset_minutes' (unless that
+            column is already present), so time-of-day features of read
+            rows are still in the recording's local time.
+        table : str, default 'features'
+            Table name.
+
+        Returns
+        -------
+        int
+            Number of rows written.
+
+        Raises
+        ------
+        ValueError
+            If the columns do not match the rows already in `table`.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        missing = {"document_name", "timestamp"} - set(features_df.columns)
+        if missing:
+            raise ValueError(f"features_df is missing columns {sorted(missing)}")
+        if features_df.empty:
+            return 0
+
+        df = features_df.reset_index(drop=True)
+        if OFFSET_COL not in df.columns:
+            df[OFFSET_COL] = utc_offset_minutes(df["timestamp"])
+        df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+        df["document_name"] = df["document_name"].astype(str)
+        df["date"] = df["timestamp"].dt.strftime("%Y-%m-%d")
+        data = pa.Table.from_pandas(df, preserve_index=False)
+
+        path = self._path(table)
+        if self.exists(table):
+            schema = self.schema(table)
+            if set(schema.names) != set(data.schema.names):
+                raise ValueError(
+                    f"Columns do not match table '{table}': "
+                    f"{sorted(set(schema.names) ^ set(data.schema.names))}"
+                )
+            data = data.select(schema.names).cast(schema)
+
+        ds.write_dataset(
+            data,
+            path,
+            format="parquet",
+            partitioning=self._partitioning(),
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        return len(df)
+
+    def read(
+        self,
+        table: str = "features",
+        columns: Optional[Sequence[str]] = None,
+        start: Union[str, pd.Timestamp, None] = None,
+        end: Union[str, pd.Timestamp, None] = None,
+        users: Union[str, Sequence[str], None] = None,
+        focus_types: Union[str, Sequence[str], None] = None,
+    ) -> pd.DataFrame:
+        """
+        Load rows of `table`, reading only what the filters select.
+
+        Parameters
+        ----------
+        table : str, default 'features'
+            Table name.
+        columns : sequence of str, optional
+            Columns to load; all by default.
+        start, end : str or pd.Timestamp, optional
+            Inclusive start and exclusive end of the time range (naive values
+            are taken as UTC).
+        users : str or sequence of str, optional
+            ``document_name`` values to load.
+        focus_types : str or sequence of str, optional
+            ``focus_type`` values to load.
+
+        Returns
+        -------
+        pd.DataFrame
+            Matching rows sorted by user and timestamp.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if not self.exists(table):
+            return pd.DataFrame(columns=list(columns or []))
+
+        dataset = self._dataset(table)
+        ts_type = dataset.schema.field("timestamp").type
+        # Conditions on the partition columns prune whole directories
+        conditions = []
+        users = _as_list(users)
+        if users is not None:
+            conditions.append(ds.field("document_name").isin(users))
+        if start is not None:
+            start = to_utc(start)
+            conditions.append(ds.field("date") >= start.strftime("%Y-%m-%d"))
+            conditions.append(ds.field("timestamp") >= pa.scalar(start, ts_type))
+        if end is not None:
+            end = to_utc(end)
+            conditions.append(ds.field("date") <= end.strftime("%Y-%m-%d"))
+            conditions.append(ds.field("timestamp") < pa.scalar(end, ts_type))
+        focus_types = _as_list(focus_types)
+        if focus_types is not None:
+            conditions.append(ds.field("focus_type").isin(focus_types))
+        expr = functools.reduce(operator.and_, conditions) if conditions else None
+
+        df = dataset.to_table(columns=columns, filter=expr).to_pandas()
+        sort_cols = [c for c in ("document_name", "timestamp") if c in df.columns]
+        if sort_cols:
+            df = df.sort_values(sort_cols, kind="stable")
+        return df.reset_index(drop=True)
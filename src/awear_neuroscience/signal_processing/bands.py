@@ -0,0 +1,273 @@
+"""EEG frequency band registry and precomputed band integration plans."""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Mapping, Sequence, Tuple, Union
+
+import numpy as np
+
+# A band is either an atomic (low, high) range in Hz or a list of sub-band names
+BandSpec = Union[Tuple[float, float], Sequence[str]]
+
+INTEGRATION_METHODS = ("trapezoid", "sum", "mean")
+COMPOSITE_METHODS = ("sum", "mean")
+
+
+@lru_cache(maxsize=None)
+def _rfft_grid(fs: float, nfft: int) -> np.ndarray:
+    """Frequency bins of a one-sided FFT, identical to ``scipy.signal.welch``."""
+    freqs = np.fft.rfftfreq(nfft, d=1.0 / fs)
+    freqs.setflags(write=False)
+    return freqs
+
+
+def _is_composite(spec: BandSpec) -> bool:
+    return len(spec) > 0 and isinstance(spec[0], str)
+
+
+@dataclass(frozen=True, eq=False)
+class BandPlan:
+    """
+    Band integration plan compiled for one frequency grid.
+
+    Attributes
+    ----------
+    freqs : np.ndarray
+        Frequency bins the plan was compiled for.
+    names : tuple of str
+        Band names, in registry order.
+    slices : dict
+        Contiguous bin slice covering each band.
+    weights : np.ndarray
+        Integration weights of shape (n_freqs, n_bands); ``psd @ weights``
+        gives every band power at once.
+    """
+
+    freqs: np.ndarray
+    names: Tuple[str, ...]
+    slices: Dict[str, slice]
+    weights: np.ndarray
+
+    def index(self, name: str) -> int:
+        """Column of `name` in :attr:`weights`."""
+        return self.names.index(name)
+
+    def band_powers(self, psd: np.ndarray) -> np.ndarray:
+        """
+        Compute all band powers for one spectrum or a batch of spectra.
+
+        Parameters
+        ----------
+        psd : np.ndarray
+            Spectra of shape (..., n_freqs).
+
+        Returns
+        -------
+        np.ndarray
+            Band powers of shape (..., n_bands).
+        """
+        return np.asarray(psd) @ self.weights
+
+    def band_power(self, psd: np.ndarray, name: str) -> np.ndarray:
+        """Compute the power of a single band, touching only its bins."""
+        sl = self.slices[name]
+        return np.asarray(psd)[..., sl] @ self.weights[sl, self.index(name)]
+
+    def ratio(self, psd: np.ndarray, numerator: str, denominator: str) -> np.ndarray:
+        """Ratio between the powers of two bands."""
+        return self.band_power(psd, numerator) / self.band_power(psd, denominator)
+
+    def to_dict(self, psd: np.ndarray) -> Dict[str, float]:
+        """Band powers of a single 1-D spectrum as a ``{band: power}`` dict."""
+        return dict(zip(self.names, self.band_powers(psd).tolist()))
+
+
+class BandRegistry:
+    """
+    Named EEG frequency bands, compiled into memoized :class:`BandPlan` objects.
+
+    Parameters
+    ----------
+    bands : Mapping[str, BandSpec]
+        Band name to either a ``(low, high)`` range in Hz (both edges inclusive)
+        or a list of sub-band names, e.g. ``{"alpha": ["alpha1", "alpha2"]}``.
+    integration : {'trapezoid', 'sum', 'mean'}, default 'trapezoid'
+        How bins inside an atomic band are combined: trapezoidal rule over
+        frequency (as ``np.trapz``), plain sum of bins, or mean of bins.
+    composite : {'sum', 'mean'}, default 'sum'
+        How sub-band powers are combined into a composite band.
+    """
+
+    def __init__(
+        self,
+        bands: Mapping[str, BandSpec],
+        integration: str = "trapezoid",
+        composite: str = "sum",
+    ):
+        if integration not in INTEGRATION_METHODS:
+            raise ValueError(f"Unknown integration '{integration}'")
+        if composite not in COMPOSITE_METHODS:
+            raise ValueError(f"Unknown composite '{composite}'")
+        self.bands = {
+            name: list(spec) if _is_composite(spec) else tuple(spec)
+            for name, spec in bands.items()
+        }
+        self.integration = integration
+        self.composite = composite
+        self._plans: Dict[tuple, BandPlan] = {}
+        # Resolve every band once so that bad definitions fail early
+        for name in self.bands:
+            self.range(name)
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        return tuple(self.bands)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.bands
+
+    def __iter__(self):
+        return iter(self.bands)
+
+    def __len__(self) -> int:
+        return len(self.bands)
+
+    def __repr__(self) -> str:
+        return (
+            f"BandRegistry({list(self.bands)}, integration='{self.integration}', "
+            f"composite='{self.composite}')"
+        )
+
+    def range(self, name: str, _seen: tuple = ()) -> Tuple[float, float]:
+        """Overall ``(low, high)`` frequency span of a band in Hz."""
+        if name not in self.bands:
+            raise KeyError(f"Unknown band '{name}'")
+        if name in _seen:
+            raise ValueError(f"Circular band definition for '{name}'")
+        spec = self.bands[name]
+        if not _is_composite(spec):
+            return spec
+        spans = [self.range(sub, _seen + (name,)) for sub in spec]
+        return min(lo for lo, _ in spans), max(hi for _, hi in spans)
+
+    def ranges(self) -> Dict[str, Tuple[float, float]]:
+        """``{band: (low, high)}`` for every band, composites included."""
+        return {name: self.range(name) for name in self.bands}
+
+    def compile(self, fs: float, nfft: int) -> BandPlan:
+        """
+        Compile (or fetch the memoized) plan for a one-sided FFT grid.
+
+        Parameters
+        ----------
+        fs : float
+            Sampling frequency in Hz.
+        nfft : int
+            FFT length (``nperseg`` for Welch / spectrogram).
+
+        Returns
+        -------
+        BandPlan
+        """
+        return self.compile_freqs(_rfft_grid(float(fs), int(nfft)))
+
+    def compile_freqs(self, freqs: np.ndarray) -> BandPlan:
+        """
+        Compile (or fetch the memoized) plan for an arbitrary frequency grid,
+        e.g. the ``freqs`` returned by ``scipy.signal.welch``.
+        """
+        freqs = np.asarray(freqs, dtype=float)
+        key = (freqs.size, float(freqs[0]), float(freqs[-1]))
+        plan = self._plans.get(key)
+        if plan is None or not np.array_equal(plan.freqs, freqs):
+            plan = self._build_plan(freqs)
+            self._plans[key] = plan
+        return plan
+
+    def _atomic_weights(self, freqs: np.ndarray, low: float, high: float):
+        weights = np.zeros(freqs.size)
+        idx = np.flatnonzero((freqs >= low) & (freqs <= high))
+        if idx.size == 0:
+            return weights
+        if self.integration == "trapezoid":
+            # Same arithmetic as np.trapz(psd[mask], freqs[mask])
+            dx = np.diff(freqs[idx]) / 2.0
+            weights[idx[:-1]] += dx
+            weights[idx[1:]] += dx
+        elif self.integration == "sum":
+            weights[idx] = 1.0
+        else:
+            weights[idx] = 1.0 / idx.size
+        return weights
+
+    def _band_weights(self, freqs: np.ndarray, name: str, cache: dict):
+        if name not in cache:
+            spec = self.bands[name]
+            if _is_composite(spec):
+                subs = [self._band_weights(freqs, sub, cache) for sub in spec]
+                weights = np.sum(subs, axis=0)
+                if self.composite == "mean":
+                    weights /= len(subs)
+            else:
+                weights = self._atomic_weights(freqs, *spec)
+            cache[name] = weights
+        return cache[name]
+
+    def _build_plan(self, freqs: np.ndarray) -> BandPlan:
+        cache: dict = {}
+        weights = np.column_stack(
+            [self._band_weights(freqs, name, cache) for name in self.bands]
+        )
+        slices = {}
+        for i, name in enumerate(self.bands):
+            nz = np.flatnonzero(weights[:, i])
+            slices[name] = slice(nz[0], nz[-1] + 1) if nz.size else slice(0, 0)
+        freqs = freqs.copy()
+        freqs.setflags(write=False)
+        weights.setflags(write=False)
+        return BandPlan(freqs=freqs, names=self.names, slices=slices, weights=weights)
+
+
+# Default EEG bands used by the feature pipeline
+EEG_BANDS = BandRegistry(
+    {
+        "delta": (0.1, 4),
+        "theta": (4, 8),
+        "alpha": (8, 12),
+        "beta": (12, 30),
+        "gamma": (30, 42),
+        "alpha1": (8, 10),
+        "alpha2": (10, 12),
+        "beta1": (12, 18),
+        "beta2": (18, 24),
+        "beta3": (24, 30),
+        "gamma1": (30, 38),
+        "gamma2": (38, 42),
+    }
+)
+
+
+_REGISTRIES: Dict[tuple, BandRegistry] = {}
+
+
+def as_registry(
+    bands: Union[BandRegistry, Mapping[str, BandSpec], None], **kwargs
+) -> BandRegistry:
+    """
+    Return `bands` as a :class:`BandRegistry`.
+
+    ``None`` gives :data:`EEG_BANDS`; a plain dict (the legacy
+    ``frequency_bands`` format) is converted once and then reused, so its
+    compiled plans stay memoized across calls.
+    """
+    if bands is None:
+        return EEG_BANDS
+    if isinstance(bands, BandRegistry):
+        return bands
+    key = (
+        tuple((name, tuple(spec)) for name, spec in bands.items()),
+        tuple(sorted(kwargs.items())),
+    )
+    if key not in _REGISTRIES:
+        _REGISTRIES[key] = BandRegistry(bands, **kwargs)
+    return _REGISTRIES[key]
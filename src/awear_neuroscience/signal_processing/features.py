@@ -1,48 +1,194 @@
-"""""EEG feature extraction and smoothing utilities."""
+"""
+EEG feature extraction and smoothing utilities.
+
+Besides the DataFrame-level stages, the array helpers shared with the
+pipeline modules are public:
+
+- :func:`ema_block` — resumable EMA down the rows of a 2-D block.
+- :func:`group_blocks` — row order and bounds of contiguous group blocks.
+- :func:`combine_moments` — combine two sets of (count, mean, M2).
+- :func:`merge_moments` — fold values into running (count, mean, M2).
+"""
+
+from functools import lru_cache
 
 import numpy as np
 import pandas as pd
-from scipy.signal import welch
-
-# Define EEG frequency bands
-bands = {
-    "delta": (0.1, 4),
-    "theta": (4, 8),
-    "alpha": (8, 12),
-    "beta": (12, 30),
-    "gamma": (30, 42),
-    "alpha1": (8, 10),
-    "alpha2": (10, 12),
-    "beta1": (12, 18),
-    "beta2": (18, 24),
-    "beta3": (24, 30),
-    "gamma1": (30, 38),
-    "gamma2": (38, 42),
-}
-
-
-def compute_psd(signal: np.ndarray, fs: int):
+from scipy import fft as sp_fft
+from scipy.signal import lfilter, welch
+from scipy.signal.windows import dpss
+
+from awear_neuroscience.signal_processing.bands import EEG_BANDS, as_registry
+from awear_neuroscience.signal_processing.precision import get_policy
+
+# EEG frequency bands as {name: (low, high)}, kept for band-by-band callers
+bands = EEG_BANDS.ranges()
+
+# Scales the median absolute deviation to a standard deviation for Gaussian data
+MAD_SCALE = 1.4826
+
+
+@lru_cache(maxsize=32)
+def dpss_tapers(n: int, NW: float = 2.5, K: int = None) -> np.ndarray:
+    """
+    DPSS (Slepian) tapers of length `n`, computed once per (n, NW, K).
+
+    Parameters
+    ----------
+    n : int
+        Taper length in samples.
+    NW : float, default 2.5
+        Time-half-bandwidth product.
+    K : int, optional
+        Number of tapers, default ``2 * NW - 1``.
+
+    Returns
+    -------
+    np.ndarray
+        Read-only array of shape (K, n), each taper with unit energy.
+    """
+    if K is None:
+        K = max(int(2 * NW) - 1, 1)
+    tapers = np.atleast_2d(dpss(n, NW, Kmax=K, norm=2))
+    tapers.setflags(write=False)
+    return tapers
+
+
+def compute_psd_multitaper(
+    signal: np.ndarray, fs: int, NW: float = 2.5, K: int = None
+):
+    """
+    Compute the multitaper power spectral density with DPSS tapers.
+
+    The whole batch is tapered as one (segments, tapers, samples) array and
+    transformed with a single FFT; the taper set is cached per length.
+
+    Parameters
+    ----------
+    signal : np.ndarray
+        Time series EEG segment, or a (n_segments, n_samples) matrix.
+    fs : int
+        Sampling frequency.
+    NW : float, default 2.5
+        Time-half-bandwidth product (resolution of ``2 * NW * fs / n`` Hz).
+    K : int, optional
+        Number of tapers, default ``2 * NW - 1``.
+
+    Returns
+    -------
+    freqs : np.ndarray
+        Array of frequency bins, the same grid as :func:`compute_psd`.
+    psd : np.ndarray
+        One-sided PSD with the same density scaling as :func:`compute_psd`.
+    """
+    x = np.asarray(signal)
+    if not np.issubdtype(x.dtype, np.floating):
+        x = x.astype(float)
+    n = x.shape[-1]
+    tapers = dpss_tapers(n, NW, K).astype(x.dtype, copy=False)
+    x = x - x.mean(axis=-1, keepdims=True)
+    # scipy.fft keeps single precision, numpy.fft always returns complex128
+    spectra = sp_fft.rfft(x[..., None, :] * tapers, axis=-1)
+    psd = (spectra.real**2 + spectra.imag**2).mean(axis=-2) / fs
+    # Fold negative frequencies into the one-sided spectrum
+    if n % 2:
+        psd[..., 1:] *= 2
+    else:
+        psd[..., 1:-1] *= 2
+    return np.fft.rfftfreq(n, d=1.0 / fs), psd
+
+
+def compute_psd(signal: np.ndarray, fs: int, method: str = "welch", **kwargs):
     """
     Compute the power spectral density (PSD) using Welch's method.
 
     Parameters
     ----------
     signal : np.ndarray
-        Time series EEG segment.
+        Time series EEG segment, or a (n_segments, n_samples) matrix of
+        equal-length segments.
     fs : int
         Sampling frequency.
+    method : {'welch', 'multitaper'}, default 'welch'
+        'welch' is a single Hann-windowed periodogram over the segment;
+        'multitaper' averages DPSS tapers for a lower-variance estimate
+        (see :func:`compute_psd_multitaper`, which receives `kwargs`).
 
     Returns
     -------
     freqs : np.ndarray
         Array of frequency bins.
     psd : np.ndarray
-        Power spectral density for the signal.
+        Power spectral density for the signal, one row per segment for 2-D input.
     """
-    freqs, psd = welch(signal, fs=fs, nperseg=len(signal), window="hann")
+    if method == "multitaper":
+        return compute_psd_multitaper(signal, fs, **kwargs)
+    if method != "welch":
+        raise ValueError(f"Unknown method '{method}'")
+    nperseg = np.shape(signal)[-1]
+    freqs, psd = welch(signal, fs=fs, nperseg=nperseg, window="hann", axis=-1)
     return freqs, psd
 
 
+def sliding_window_psd(
+    signal: np.ndarray,
+    fs: int,
+    window: int,
+    hop: int,
+    method: str = "welch",
+    batch_size: int = 4096,
+    precision=None,
+    **kwargs,
+):
+    """
+    PSD of every `window`-sample window of a continuous signal, every `hop` samples.
+
+    Windows are taken as a strided view of `signal` (no per-window copies)
+    and sent to :func:`compute_psd` in batches of `batch_size` windows, so
+    each batch is one FFT call and memory stays bounded on long recordings.
+
+    Parameters
+    ----------
+    signal : np.ndarray
+        1-D continuous signal.
+    fs : int
+        Sampling frequency.
+    window : int
+        Window length in samples.
+    hop : int
+        Step between window starts in samples.
+    method : {'welch', 'multitaper'}, default 'welch'
+        Spectral estimator, see :func:`compute_psd`.
+    batch_size : int, default 4096
+        Windows per FFT call.
+    precision : str or DtypePolicy, optional
+        dtype policy (see ``precision.get_policy``); the spectra are computed
+        in its compute dtype.
+    **kwargs :
+        Extra estimator options (e.g. ``NW`` for multitaper).
+
+    Returns
+    -------
+    freqs : np.ndarray
+        Frequency bins.
+    psd : np.ndarray
+        Spectra of shape (n_windows, n_freqs).
+    starts : np.ndarray
+        Start sample of each window.
+    """
+    signal = get_policy(precision).as_compute(signal)
+    freqs = np.fft.rfftfreq(window, 1.0 / fs)
+    if signal.size < window:
+        return freqs, np.empty((0, freqs.size)), np.empty(0, dtype=int)
+    windows = np.lib.stride_tricks.sliding_window_view(signal, window)[::hop]
+    starts = np.arange(windows.shape[0]) * hop
+    psd = []
+    for i in range(0, windows.shape[0], batch_size):
+        freqs, batch = compute_psd(windows[i : i + batch_size], fs, method, **kwargs)
+        psd.append(batch)
+    return freqs, np.concatenate(psd), starts
+
+
 def bandpower(freqs, psd, band):
     """
     Compute bandpower for a given frequency band using the trapezoidal rule.
@@ -74,10 +220,14 @@ def extract_band_features(
     focus_type=None,
     session_id=None,
     timestamp=None,
+    band_registry=None,
 ):
     """
     Extract power features for each EEG frequency band, with optional metadata.
 
+    Band powers come from the memoized plan of `band_registry` for this
+    frequency grid, so band masks are not re-derived on every call.
+
     Parameters
     ----------
     freqs : np.ndarray
@@ -88,13 +238,16 @@ def extract_band_features(
     focus_type : str, optional
     session_id : str, optional
     timestamp : str, optional
+    band_registry : BandRegistry or dict, optional
+        Bands to extract. Defaults to the shared ``EEG_BANDS`` registry.
 
     Returns
     -------
     dict
         Feature dictionary with band powers and metadata.
     """
-    powers = {name: bandpower(freqs, psd, b) for name, b in bands.items()}
+    plan = as_registry(band_registry).compile_freqs(freqs)
+    powers = plan.to_dict(psd)
 
     if document_name is not None:
         powers["document_name"] = document_name
@@ -109,86 +262,317 @@ def extract_band_features(
     return powers
 
 
-def apply_ema_filtering(features_df: pd.DataFrame, alpha: float = 0.9) -> pd.DataFrame:
+def ema_feature_columns(features_df: pd.DataFrame) -> list:
+    """Columns smoothed by :func:`apply_ema_filtering`: band powers, then entropies."""
+    entropy_features = [col for col in features_df.columns if "entropy" in col]
+    return list(bands.keys()) + entropy_features
+
+
+def ema_block(
+    values: np.ndarray,
+    alpha: float,
+    last: np.ndarray = None,
+    gap: np.ndarray = None,
+):
+    """
+    EMA (``adjust=False``) down the rows of a 2-D block, all columns at once.
+
+    Columns without NaNs go through a single ``lfilter`` call; columns with
+    NaNs fall back to pandas so missing-value handling stays identical.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        (rows, columns) block in time order.
+    alpha : float
+        Smoothing factor for EMA.
+    last, gap : np.ndarray, optional
+        Resume state per column: the last EMA value (NaN if nothing observed
+        yet) and the number of missing rows seen since it.
+
+    Returns
+    -------
+    out : np.ndarray
+        Smoothed block.
+    last, gap : np.ndarray
+        State to resume from after this block.
+    """
+    n_rows, n_cols = values.shape
+    if last is None:
+        last = np.full(n_cols, np.nan)
+    if gap is None:
+        gap = np.zeros(n_cols, dtype=np.int64)
+    out = np.empty_like(values)
+    if n_rows == 0:
+        return out, last.copy(), gap.copy()
+
+    isnan = np.isnan(values)
+    has_prior = ~np.isnan(last)
+    clean = ~isnan.any(axis=0) & (~has_prior | (gap == 0))
+    if clean.any():
+        x = values[:, clean]
+        # y[0] = x[0] (or continues from `last`), y[n] = alpha*x[n] + (1-alpha)*y[n-1]
+        start = np.where(has_prior[clean], last[clean], x[0])
+        zi = (1 - alpha) * start[None, :]
+        out[:, clean], _ = lfilter([alpha], [1.0, alpha - 1.0], x, axis=0, zi=zi)
+    for col in np.flatnonzero(~clean):
+        # Prefixing the previous EMA value and its missing rows reproduces
+        # exactly where a single pandas pass would have been
+        prefix = [last[col]] + [np.nan] * int(gap[col]) if has_prior[col] else []
+        series = pd.Series(np.r_[prefix, values[:, col]])
+        out[:, col] = series.ewm(alpha=alpha, adjust=False).mean().to_numpy()[
+            len(prefix) :
+        ]
+
+    # Trailing missing rows extend the gap; any observation resets it
+    observed = ~isnan
+    trailing = np.argmax(observed[::-1], axis=0)
+    any_obs = observed.any(axis=0)
+    new_gap = np.where(any_obs, trailing, gap + n_rows)
+    new_last = np.where(np.isnan(out[-1]), last, out[-1])
+    return out, new_last, new_gap
+
+
+def group_blocks(group_values: pd.Series):
+    """
+    Stable row order that makes each group contiguous, plus the group key and
+    bounds of each block.
+
+    Rows with a missing group key are left out, as a mask on them never matches.
+    """
+    codes, uniques = pd.factorize(group_values, sort=False)
+    order = np.argsort(codes, kind="stable")
+    order = order[codes[order] >= 0]
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, np.diff(sorted_codes) != 0])[: order.size]
+    stops = np.r_[starts[1:], order.size].astype(int)
+    keys = [uniques[c] for c in sorted_codes[starts]]
+    return order, keys, starts, stops
+
+
+def grouped_ema(
+    values: np.ndarray,
+    group_values: pd.Series = None,
+    alpha: float = 0.9,
+    state: dict = None,
+) -> np.ndarray:
+    """
+    EMA of a (rows, columns) array, restarting at every group.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        2-D float array of features, rows in time order within each group.
+    group_values : pd.Series, optional
+        Group key per row (e.g. ``document_name``). None treats all rows as
+        one group, stored in `state` under the key None.
+    alpha : float
+        Smoothing factor for EMA.
+    state : dict, optional
+        ``{group: {"last": array, "gap": array}}``. Groups found here resume
+        from their stored EMA instead of restarting; the dict is updated in
+        place with the state after these rows.
+
+    Returns
+    -------
+    np.ndarray
+        Smoothed array, NaN for rows without a group key.
+    """
+    values = np.asarray(values, dtype=float)
+    if group_values is None:
+        order = np.arange(len(values))
+        keys, starts, stops = [None], [0], [len(values)]
+    else:
+        order, keys, starts, stops = group_blocks(group_values)
+
+    out = np.full_like(values, np.nan)
+    for key, start, stop in zip(keys, starts, stops):
+        rows = order[start:stop]
+        prev = state.get(key, {}) if state is not None else {}
+        out[rows], last, gap = ema_block(
+            values[rows], alpha, prev.get("last"), prev.get("gap")
+        )
+        if state is not None:
+            state[key] = {"last": last, "gap": gap}
+    return out
+
+
+def apply_ema_filtering(
+    features_df: pd.DataFrame, alpha: float = 0.9, state: dict = None, precision=None
+) -> pd.DataFrame:
     """
     Apply exponential moving average (EMA) filtering to band features and compute derived ratios.
 
+    The filter runs once per ``document_name`` over all band and entropy
+    columns as a single 2-D array.
+
     Parameters
     ----------
     features_df : pd.DataFrame
         DataFrame of EEG features.
     alpha : float
         Smoothing factor for EMA.
+    state : dict, optional
+        Per-user EMA state (see :func:`grouped_ema`). When given, users
+        continue from their last smoothed value, so feeding rows in batches
+        gives the same result as one call over all rows.
+    precision : str or DtypePolicy, optional
+        dtype policy (see ``precision.get_policy``); the EMA runs in float64
+        and the smoothed columns are stored in its feature dtype.
 
     Returns
     -------
     pd.DataFrame
         DataFrame with additional EMA-smoothed features and derived indexes.
     """
-    filtered_df = features_df.copy()
+    columns = ema_feature_columns(features_df)
+    groups = (
+        features_df["document_name"] if "document_name" in features_df.columns else None
+    )
+    if state is not None:
+        known = state.setdefault("columns", columns)
+        if list(known) != columns:
+            raise ValueError(
+                f"EMA state was built for columns {list(known)}, got {columns}"
+            )
+        state = state.setdefault("users", {})
+    smoothed = grouped_ema(
+        features_df[columns].to_numpy(dtype=float), groups, alpha, state
+    )
 
-    band_features = list(bands.keys())
-    entropy_features = [col for col in features_df.columns if "entropy" in col]
+    fil_df = pd.DataFrame(
+        smoothed.astype(get_policy(precision).features, copy=False),
+        index=features_df.index,
+        columns=[f"{col}_fil" for col in columns],
+    )
+    filtered_df = pd.concat(
+        [features_df.drop(columns=fil_df.columns, errors="ignore"), fil_df], axis=1
+    )
+    return _add_derived_indexes(filtered_df)
 
 
-    if "document_name" in features_df.columns:
-        for document_name in filtered_df["document_name"].unique():
-            document_name_mask = filtered_df["document_name"] == document_name
+def derived_indexes(fil) -> dict:
+    """
+    Ratio/index and dB values derived from the EMA-smoothed band powers.
 
-            for band in band_features:
-                ema_values = filtered_df.loc[document_name_mask, band].ewm(alpha=alpha, adjust=False).mean()
-                filtered_df.loc[document_name_mask, f"{band}_fil"] = ema_values
+    Parameters
+    ----------
+    fil : Mapping[str, array-like]
+        ``{band}_fil`` values by column name, e.g. a DataFrame or a dict of
+        scalars or arrays.
 
-            for entropy in entropy_features:
-                ema_values = filtered_df.loc[document_name_mask, entropy].ewm(alpha=alpha, adjust=False).mean()
-                filtered_df.loc[document_name_mask, f"{entropy}_fil"] = ema_values
-    else:
-        for band in band_features:
-            ema_values = filtered_df.loc[:, band].ewm(alpha=alpha, adjust=False).mean()
-            filtered_df.loc[:, f"{band}_fil"] = ema_values
-
-        for entropy in entropy_features:
-            ema_values = filtered_df.loc[:, entropy].ewm(alpha=alpha, adjust=False).mean()
-            filtered_df.loc[:, f"{entropy}_fil"] = ema_values
-            
-    filtered_df["theta_beta_ratio_fil"] = (
-        filtered_df["theta_fil"] / filtered_df["beta_fil"]
-    )
-    filtered_df["theta_alpha_ratio_fil"] = (
-        filtered_df["theta_fil"] / filtered_df["alpha_fil"]
-    )
-    filtered_df["beta_alpha_ratio_fil"] = (
-        filtered_df["beta_fil"] / filtered_df["alpha_fil"]
-    )
-    filtered_df["engagement_index_fil"] = (
-        filtered_df["alpha_fil"] / filtered_df["beta_fil"]
-    )
-    filtered_df["focus_index_fil"] = filtered_df["beta_fil"] / (
-        filtered_df["theta_fil"] + filtered_df["alpha_fil"]
-    )
+    Returns
+    -------
+    dict
+        New column name to value, in the order the columns are added.
+    """
+    out = {
+        "theta_beta_ratio_fil": fil["theta_fil"] / fil["beta_fil"],
+        "theta_alpha_ratio_fil": fil["theta_fil"] / fil["alpha_fil"],
+        "beta_alpha_ratio_fil": fil["beta_fil"] / fil["alpha_fil"],
+        "engagement_index_fil": fil["alpha_fil"] / fil["beta_fil"],
+        "focus_index_fil": fil["beta_fil"] / (fil["theta_fil"] + fil["alpha_fil"]),
+    }
+    ratios = list(out)
 
     eps = 1e-12
     for name in bands.keys():
-        filtered_df[f"{name}_db_fil"] = 10 * np.log10(filtered_df[name+'_fil'] + eps)
-    for name in [
-        "theta_beta_ratio_fil",
-        "theta_alpha_ratio_fil",
-        "beta_alpha_ratio_fil",
-        "engagement_index_fil",
-        "focus_index_fil",
-    ]:
-        filtered_df[f"{name}_db"] = 10 * np.log10(filtered_df[name] + eps)
+        out[f"{name}_db_fil"] = 10 * np.log10(fil[name + "_fil"] + eps)
+    for name in ratios:
+        out[f"{name}_db"] = 10 * np.log10(out[name] + eps)
+    return out
+
+
+def _add_derived_indexes(filtered_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add ratio/index and dB columns derived from the ``*_fil`` band columns,
+    then replace infinities and NaNs with 0.
+
+    Parameters
+    ----------
+    filtered_df : pd.DataFrame
+        DataFrame holding the EMA-smoothed ``*_fil`` columns.
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    for name, values in derived_indexes(filtered_df).items():
+        filtered_df[name] = values
 
     filtered_df = filtered_df.replace([np.inf, -np.inf], np.nan)
     filtered_df = filtered_df.fillna(0)
     return filtered_df
 
 
+def combine_moments(count_a, mean_a, m2_a, count_b, mean_b, m2_b):
+    """
+    Combine two sets of (count, mean, M2) into the statistics of their union.
+
+    Chan et al.'s parallel update; a side with zero count leaves the other
+    unchanged.
+
+    Parameters
+    ----------
+    count_a, mean_a, m2_a : np.ndarray
+        Statistics of the first set, per column.
+    count_b, mean_b, m2_b : np.ndarray
+        Statistics of the second set, per column.
+
+    Returns
+    -------
+    count, mean, m2 : np.ndarray
+        Statistics of both sets together.
+    """
+    n = count_a + count_b
+    delta = mean_b - mean_a
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = np.where(n > 0, count_b / n, 0.0)
+    return n, mean_a + delta * frac, m2_a + m2_b + delta**2 * count_a * frac
+
+
+def merge_moments(count, mean, m2, values: np.ndarray):
+    """
+    Fold a batch of rows into running (count, mean, M2) per column.
+
+    The batch's own moments are combined with :func:`combine_moments`, so
+    statistics built batch by batch match the ones computed over all rows at
+    once. NaNs are skipped.
+
+    Parameters
+    ----------
+    count, mean, m2 : np.ndarray
+        Running statistics per column (zeros for an empty history).
+    values : np.ndarray
+        (rows, columns) batch.
+
+    Returns
+    -------
+    count, mean, m2 : np.ndarray
+        Updated statistics.
+    """
+    values = np.asarray(values, dtype=float)
+    n_b = np.sum(~np.isnan(values), axis=0).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_b = np.where(n_b > 0, np.nansum(values, axis=0) / n_b, 0.0)
+    m2_b = np.nansum((values - mean_b) ** 2, axis=0)
+    return combine_moments(count, mean, m2, n_b, mean_b, m2_b)
+
+
 def normalize_indexes(
-    features_df: pd.DataFrame, columns_to_normalize: list
+    features_df: pd.DataFrame,
+    columns_to_normalize: list,
+    state: dict = None,
+    method: str = "zscore",
+    precision=None,
+    update_state: bool = True,
 ) -> pd.DataFrame:
     """
-    Normalize selected features (z-score) per subject/document_name.
+    Normalize selected features per subject/document_name.
+
+    All columns are normalized together with grouped transforms. Users whose
+    column has zero spread get 0 for every row instead of a missing value;
+    rows without a document_name stay NaN.
 
     Parameters
     ----------
@@ -196,52 +580,218 @@ def normalize_indexes(
         DataFrame of features.
     columns_to_normalize : list
         Columns to normalize.
+    state : dict, optional
+        Per-user running statistics ``{document_name: {"count", "mean", "m2"}}``
+        (arrays aligned with `columns_to_normalize`). When given, the rows are
+        merged into these statistics in place and z-scored against the merged
+        values, i.e. against every row seen so far for that user.
+    method : {'zscore', 'robust'}, default 'zscore'
+        'zscore' uses mean and standard deviation; 'robust' uses the median
+        and the MAD scaled by 1.4826 (comparable to a standard deviation for
+        Gaussian data). 'robust' cannot be combined with `state`.
+    precision : str or DtypePolicy, optional
+        dtype policy whose feature dtype the normalized columns are stored in.
+    update_state : bool, default True
+        With False, rows are z-scored against the statistics already in
+        `state` without being merged into them (e.g. final statistics
+        accumulated over a whole range beforehand).
 
     Returns
     -------
     pd.DataFrame
-        Normalized DataFrame.
+        Normalized DataFrame with one ``{column}_norm`` per input column.
     """
-    normalized_df = features_df.copy()
-
-    for document_name in normalized_df["document_name"].unique():
-        document_name_mask = normalized_df["document_name"] == document_name
-
-        for column in columns_to_normalize:
-            values = normalized_df.loc[document_name_mask, column]
-            mean_val = values.mean()
-            std_val = values.std()
-
-            if std_val == 0:
-                continue
+    if method not in ("zscore", "robust"):
+        raise ValueError(f"Unknown method '{method}'")
+    if state is not None:
+        if method != "zscore":
+            raise ValueError("Incremental normalization only supports 'zscore'")
+        return _normalize_with_state(
+            features_df,
+            columns_to_normalize,
+            state,
+            get_policy(precision).features,
+            update_state,
+        )
+
+    columns = list(columns_to_normalize)
+    values = features_df[columns].astype(float)
+    keys = features_df["document_name"]
+    grouped = values.groupby(keys, sort=False)
+    if method == "zscore":
+        center = grouped.transform("mean")
+        scale = grouped.transform("std")
+    else:
+        center = grouped.transform("median")
+        scale = (values - center).abs().groupby(keys, sort=False).transform("median")
+        scale = scale * MAD_SCALE
+
+    normalized = ((values - center) / scale).mask(scale == 0, 0.0)
+    normalized = normalized.astype(get_policy(precision).features)
+    normalized.columns = [f"{col}_norm" for col in columns]
+    return pd.concat(
+        [features_df.drop(columns=normalized.columns, errors="ignore"), normalized],
+        axis=1,
+    )
 
-            normalized_df.loc[document_name_mask, f"{column}_norm"] = (
-                values - mean_val
-            ) / std_val
 
-    return normalized_df
+def _normalize_with_state(
+    features_df: pd.DataFrame,
+    columns_to_normalize: list,
+    state: dict,
+    dtype: str = "float64",
+    update: bool = True,
+) -> pd.DataFrame:
+    columns = list(columns_to_normalize)
+    known = state.setdefault("columns", columns)
+    if list(known) != columns:
+        raise ValueError(
+            f"Normalization state was built for columns {list(known)}, got {columns}"
+        )
+    users = state.setdefault("users", {})
+
+    values = features_df[columns].to_numpy(dtype=float)
+    normalized = np.full_like(values, np.nan)
+    zeros = np.zeros(len(columns))
+    for document_name, rows in features_df.groupby(
+        "document_name", sort=False
+    ).indices.items():
+        prev = users.get(document_name, {})
+        count, mean, m2 = (
+            prev.get("count", zeros),
+            prev.get("mean", zeros),
+            prev.get("m2", zeros),
+        )
+        if update:
+            count, mean, m2 = merge_moments(count, mean, m2, values[rows])
+            users[document_name] = {"count": count, "mean": mean, "m2": m2}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(m2 / (count - 1))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            normalized[rows] = np.where(std == 0, 0.0, (values[rows] - mean) / std)
+
+    norm_df = pd.DataFrame(
+        normalized.astype(dtype, copy=False),
+        index=features_df.index,
+        columns=[f"{col}_norm" for col in columns],
+    )
+    return pd.concat(
+        [features_df.drop(columns=norm_df.columns, errors="ignore"), norm_df], axis=1
+    )
 
 
-def add_time_features(features_df: pd.DataFrame) -> pd.DataFrame:
+def add_time_features(
+    features_df: pd.DataFrame,
+    time_col: str = "timestamp",
+    calendar: bool = False,
+    timezones: dict = None,
+    session_col: str = "session_id",
+    offset_col: str = "utc_offset_minutes",
+) -> pd.DataFrame:
     """
     Add derived time-of-day features from timestamp.
 
+    The time column is parsed at most once (not at all if it is already
+    datetime64) and every feature is derived from that single column. The
+    input frame is left untouched. Rows read from the feature store carry
+    UTC timestamps and their source offset in `offset_col`; their features
+    are computed from the local wall time, as for the source timestamps.
+
     Parameters
     ----------
     features_df : pd.DataFrame
+    time_col : str, default 'timestamp'
+        Timestamp strings or a datetime64 column.
+    calendar : bool, default False
+        Also add ``day_of_week`` (Monday=0), ``utc_offset_hours`` and
+        ``minutes_since_session_start``.
+    timezones : dict, optional
+        ``{document_name: tz name}`` used for ``utc_offset_hours``; users not
+        listed (or no mapping at all) get the offset of the parsed timestamps.
+    session_col : str, default 'session_id'
+        Session key for ``minutes_since_session_start``, per ``document_name``
+        when that column exists. Without it the whole frame is one session.
+    offset_col : str, default 'utc_offset_minutes'
+        Column of per-row UTC offsets in minutes, used when present and the
+        timestamps are timezone-aware.
 
     Returns
     -------
     pd.DataFrame
+        A new DataFrame with the time features appended.
     """
-    features_df["time_of_day"] = pd.to_datetime(features_df["timestamp"]).dt.time
-    features_df["hours_since_midnight"] = (
-        pd.to_datetime(features_df["timestamp"]).dt.hour
-        + pd.to_datetime(features_df["timestamp"]).dt.minute / 60
-        + pd.to_datetime(features_df["timestamp"]).dt.second / 3600
-    )
-    features_df["minutes_since_midnight"] = (
-        pd.to_datetime(features_df["timestamp"]).dt.hour * 60
-        + pd.to_datetime(features_df["timestamp"]).dt.minute
+    ts = features_df[time_col]
+    if not pd.api.types.is_datetime64_any_dtype(ts):
+        ts = pd.to_datetime(ts)
+    offsets = None
+    if offset_col in features_df.columns and ts.dt.tz is not None:
+        offsets = features_df[offset_col].astype(float)
+        local = ts.dt.tz_convert("UTC").dt.tz_localize(None)
+        dt = (local + pd.to_timedelta(offsets, unit="min")).dt
+    else:
+        dt = ts.dt
+    hour, minute = dt.hour, dt.minute
+
+    new_cols = {
+        "time_of_day": dt.time,
+        "hours_since_midnight": hour + minute / 60 + dt.second / 3600,
+        "minutes_since_midnight": hour * 60 + minute,
+    }
+    if calendar:
+        new_cols["day_of_week"] = dt.dayofweek
+        new_cols["utc_offset_hours"] = _utc_offset_hours(
+            ts, features_df.get("document_name"), timezones or {}, offsets
+        )
+        session_keys = [
+            features_df[col]
+            for col in ("document_name", session_col)
+            if col in features_df.columns
+        ]
+        start = (
+            ts.groupby(session_keys, sort=False).transform("min")
+            if session_keys
+            else ts.min()
+        )
+        new_cols["minutes_since_session_start"] = (ts - start).dt.total_seconds() / 60
+
+    return pd.concat(
+        [
+            features_df.drop(columns=list(new_cols), errors="ignore"),
+            pd.DataFrame(new_cols, index=features_df.index),
+        ],
+        axis=1,
     )
-    return features_df
+
+
+def _utc_offset_hours(
+    ts: pd.Series,
+    users: pd.Series,
+    timezones: dict,
+    offsets: pd.Series = None,
+) -> pd.Series:
+    """
+    UTC offset in hours per row, from each user's timezone when known, else
+    from `offsets` (minutes) or the timestamps themselves.
+    """
+    tz = ts.dt.tz
+    if offsets is not None:
+        base = offsets / 60
+    elif tz is None:
+        base = pd.Series(0.0, index=ts.index)
+    else:
+        local = ts.dt.tz_localize(None)
+        base = (local - ts.dt.tz_convert("UTC").dt.tz_localize(None)).dt.total_seconds()
+        base = base / 3600
+    if users is None or not timezones:
+        return base
+
+    utc = ts.dt.tz_localize("UTC") if tz is None else ts.dt.tz_convert("UTC")
+    offsets = base.copy()
+    for user, rows in users.groupby(users, sort=False).groups.items():
+        if user not in timezones:
+            continue
+        local = utc.loc[rows].dt.tz_convert(timezones[user]).dt.tz_localize(None)
+        offsets.loc[rows] = (
+            local - utc.loc[rows].dt.tz_localize(None)
+        ).dt.total_seconds() / 3600
+    return offsets
@@ -12,6 +12,7 @@ def bandpass_filter(
     lowcut: float = 0.5,
     highcut: float = 47.0,
     order: int = 4,
+    dtype=None,
 ) -> np.ndarray:
     """
     Apply zero-phase Butterworth band-pass filter to EEG data.
@@ -22,12 +23,19 @@ def bandpass_filter(
         lowcut: High-pass cutoff (default 0.5 Hz to remove drifts).
         highcut: Low-pass cutoff (default 47 Hz to retain EEG bands).
         order: Filter order (4th order gives 8th order zero-phase).
+        dtype: Precision of the filtering: single precision runs the filter as
+            second-order sections, anything else filters in float64.
 
     Returns:
         Filtered signal as numpy array.
     """
     nyq = fs / 2.0
     b, a = ss.butter(order, [lowcut / nyq, highcut / nyq], btype="band")
+    if _single(dtype):
+        sos = ss.butter(
+            order, [lowcut / nyq, highcut / nyq], btype="band", output="sos"
+        )
+        return _sosfiltfilt(sos, x, dtype, padlen=3 * max(len(a), len(b)))
     return ss.filtfilt(b, a, x)
 
 
@@ -36,6 +44,7 @@ def notch_filter(
     fs: float,
     freq: float = 60.0,
     Q: float = 30.0,
+    dtype=None,
 ) -> np.ndarray:
     """
     Apply zero-phase IIR notch filter at specified power-line frequency.
@@ -45,6 +54,8 @@ def notch_filter(
         fs: Sampling rate in Hz.
         freq: Center of notch filter (commonly 50 or 60 Hz, depends on the country).
         Q: Quality factor controlling notch bandwidth.
+        dtype: Precision of the filtering: single precision runs the filter as
+            second-order sections, anything else filters in float64.
 
     Returns:
         Filtered signal as numpy array.
@@ -53,21 +64,39 @@ def notch_filter(
     w0 = freq / nyq
     b, a = ss.iirnotch(w0, Q)
     #  zero-phase filtering with filtfilt() avoids phase distortions
+    if _single(dtype):
+        return _sosfiltfilt(ss.tf2sos(b, a), x, dtype, padlen=3 * len(a))
     return ss.filtfilt(b, a, x)
 
 
-def preprocess_segment(x: Sequence[float], fs: float) -> np.ndarray:
+def _single(dtype) -> bool:
+    return dtype is not None and np.dtype(dtype).itemsize < 8
+
+
+def _sosfiltfilt(sos, x, dtype, padlen: int) -> np.ndarray:
+    """
+    Zero-phase filtering in single precision. Transfer-function coefficients
+    of the 0.5 Hz high-pass are too ill-conditioned for float32, so the
+    filter runs as cascaded second-order sections, with filtfilt's padding.
+    """
+    return ss.sosfiltfilt(sos.astype(dtype), np.asarray(x, dtype=dtype), padlen=padlen)
+
+
+def preprocess_segment(x: Sequence[float], fs: float, dtype=None) -> np.ndarray:
     """
     Preprocess a raw EEG segment: remove slow drifts, notch line noise, and detrend.
 
     Args:
         x: Input 1D signal array.
         fs: Sampling frequency in Hz.
+        dtype: Precision of the filtering, e.g. the ``compute`` dtype of a
+            :class:`~awear_neuroscience.signal_processing.precision.DtypePolicy`;
+            None or double precision filters in float64.
 
     Returns:
         Preprocessed signal array.
     """
-    x = bandpass_filter(x, fs)
-    x = notch_filter(x, fs)
+    x = bandpass_filter(x, fs, dtype=dtype)
+    x = notch_filter(x, fs, dtype=dtype)
     # Detrending after filtering removes residual DC offset efficiently
     return ss.detrend(x)
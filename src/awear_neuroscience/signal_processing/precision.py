@@ -0,0 +1,98 @@
+"""Pipeline-wide floating-point precision policy."""
+
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Union
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class DtypePolicy:
+    """
+    Precision used for arithmetic and for stored arrays.
+
+    Attributes
+    ----------
+    compute : str
+        dtype of filtering and spectral estimation.
+    signal : str
+        dtype of stored signal columns ('filtered_value', 'abs_filtered',
+        'max_abs_filtered_value') and of the filtered segments handed on to
+        feature extraction.
+    features : str
+        dtype of feature columns (band powers, smoothed and derived indexes,
+        normalized values). EMA and normalization statistics are always
+        accumulated in float64.
+    """
+
+    compute: str = "float64"
+    signal: str = "float32"
+    features: str = "float32"
+
+    def as_signal(self, x) -> np.ndarray:
+        return np.asarray(x, dtype=self.signal)
+
+    def as_compute(self, x) -> np.ndarray:
+        return np.asarray(x, dtype=self.compute)
+
+    def as_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Cast the floating-point columns of `df` to the feature dtype."""
+        floats = [
+            col
+            for col, dtype in df.dtypes.items()
+            if pd.api.types.is_float_dtype(dtype) and dtype != self.features
+        ]
+        if not floats:
+            return df
+        return df.astype(dict.fromkeys(floats, self.features))
+
+
+POLICIES: Dict[str, DtypePolicy] = {
+    # Filter in double precision, store signals and features in single
+    "float32": DtypePolicy("float64", "float32", "float32"),
+    # Reference: double precision throughout
+    "float64": DtypePolicy("float64", "float64", "float64"),
+    # Single precision throughout, filtering included
+    "float32-compute": DtypePolicy("float32", "float32", "float32"),
+}
+
+PolicyLike = Union[str, DtypePolicy, None]
+
+_policy = POLICIES[os.getenv("AWEAR_DTYPE_POLICY", "float32")]
+
+
+def get_policy(policy: PolicyLike = None) -> DtypePolicy:
+    """
+    Resolve `policy`: a :class:`DtypePolicy`, a name from :data:`POLICIES`,
+    or None for the current default.
+    """
+    if policy is None:
+        return _policy
+    if isinstance(policy, DtypePolicy):
+        return policy
+    try:
+        return POLICIES[policy]
+    except KeyError:
+        raise ValueError(
+            f"Unknown dtype policy '{policy}', expected one of {sorted(POLICIES)}"
+        ) from None
+
+
+def set_policy(policy: PolicyLike) -> DtypePolicy:
+    """Set the default policy; returns the previous one."""
+    global _policy
+    previous, _policy = _policy, get_policy(policy)
+    return previous
+
+
+@contextmanager
+def dtype_policy(policy: PolicyLike):
+    """Use `policy` as the default inside a ``with`` block."""
+    previous = set_policy(policy)
+    try:
+        yield _policy
+    finally:
+        set_policy(previous)
@@ -0,0 +1,278 @@
+"""Batched spectral-shape, aperiodic and Hjorth features over segment matrices."""
+
+from typing import Dict, Sequence
+
+import numpy as np
+
+from awear_neuroscience.signal_processing.bands import as_registry
+
+
+def _range_mask(freqs: np.ndarray, band) -> np.ndarray:
+    return (freqs >= band[0]) & (freqs <= band[1])
+
+
+def relative_band_powers(freqs, psd, band_registry=None) -> Dict[str, np.ndarray]:
+    """
+    Band powers divided by the power over the span of all registry bands.
+
+    Parameters
+    ----------
+    freqs : np.ndarray
+        Frequency bins.
+    psd : np.ndarray
+        Spectra of shape (n_segments, n_freqs).
+    band_registry : BandRegistry or dict, optional
+        Bands to use, defaults to ``EEG_BANDS``.
+
+    Returns
+    -------
+    dict
+        ``{f"{band}_rel": array of shape (n_segments,)}``.
+    """
+    registry = as_registry(band_registry)
+    plan = registry.compile_freqs(freqs)
+    ranges = registry.ranges().values()
+    span = (min(lo for lo, _ in ranges), max(hi for _, hi in ranges))
+    mask = _range_mask(freqs, span)
+    total = np.trapz(psd[..., mask], freqs[mask], axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rel = plan.band_powers(psd) / total[..., None]
+    return {f"{name}_rel": rel[..., i] for i, name in enumerate(plan.names)}
+
+
+def spectral_entropy(freqs, psd, band: Sequence[float] = (0.5, 45)) -> np.ndarray:
+    """
+    Normalized Shannon entropy of the spectrum inside `band` (0 = single
+    peak, 1 = flat).
+    """
+    mask = _range_mask(freqs, band)
+    p = psd[..., mask]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p = p / p.sum(axis=-1, keepdims=True)
+        logp = np.where(p > 0, np.log2(np.where(p > 0, p, 1.0)), 0.0)
+    return -(p * logp).sum(axis=-1) / np.log2(mask.sum())
+
+
+def spectral_edge_frequency(
+    freqs, psd, edges: Sequence[float] = (50, 95), band: Sequence[float] = (0.5, 45)
+) -> Dict[str, np.ndarray]:
+    """
+    Frequencies below which `edges` percent of the power inside `band` lies.
+
+    Returns
+    -------
+    dict
+        ``{f"sef{edge}": array of shape (n_segments,)}``.
+    """
+    mask = _range_mask(freqs, band)
+    f = freqs[mask]
+    cum = np.cumsum(psd[..., mask], axis=-1)
+    total = cum[..., -1:]
+    out = {}
+    for edge in edges:
+        idx = np.argmax(cum >= total * (edge / 100.0), axis=-1)
+        out[f"sef{edge:g}"] = f[idx]
+    return out
+
+
+def peak_frequency(freqs, psd, band: Sequence[float] = (8, 12)) -> np.ndarray:
+    """Frequency of the largest PSD bin inside `band` (peak alpha by default)."""
+    mask = _range_mask(freqs, band)
+    return freqs[mask][np.argmax(psd[..., mask], axis=-1)]
+
+
+def hjorth_parameters(signals: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Hjorth activity, mobility and complexity of each row of `signals`.
+
+    Parameters
+    ----------
+    signals : np.ndarray
+        Segments of shape (n_segments, n_samples).
+
+    Returns
+    -------
+    dict
+        ``hjorth_activity``, ``hjorth_mobility`` and ``hjorth_complexity``.
+    """
+    signals = np.asarray(signals, dtype=float)
+    d1 = np.diff(signals, axis=-1)
+    d2 = np.diff(d1, axis=-1)
+    var0 = signals.var(axis=-1)
+    var1 = d1.var(axis=-1)
+    var2 = d2.var(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mobility = np.sqrt(var1 / var0)
+        complexity = np.sqrt(var2 / var1) / mobility
+    return {
+        "hjorth_activity": var0,
+        "hjorth_mobility": mobility,
+        "hjorth_complexity": complexity,
+    }
+
+
+def _log_power(psd: np.ndarray) -> np.ndarray:
+    # Floor at the smallest normal of psd's own dtype: float64's underflows
+    # to 0 in float32
+    psd = np.asarray(psd)
+    tiny = np.finfo(np.result_type(psd, np.float32)).tiny
+    return np.log10(np.maximum(psd, tiny))
+
+
+def fit_aperiodic(
+    freqs: np.ndarray,
+    psd: np.ndarray,
+    fit_range: Sequence[float] = (1, 40),
+    knee: bool = False,
+    knee_freqs: np.ndarray = None,
+    exclude: Sequence[Sequence[float]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Fit the aperiodic (1/f) component of every spectrum in closed form.
+
+    Without a knee the model is ``log10(P) = offset - exponent * log10(f)``,
+    solved by ordinary least squares in log-log space for all segments at
+    once. With ``knee=True`` it becomes
+    ``log10(P) = offset - exponent * log10(sqrt(f_k**2 + f**2))``: for each
+    candidate knee frequency ``f_k`` the fit is still linear, so every
+    candidate is solved in closed form and the one with the smallest residual
+    is kept per segment.
+
+    Parameters
+    ----------
+    freqs : np.ndarray
+        Frequency bins.
+    psd : np.ndarray
+        Spectra of shape (n_segments, n_freqs).
+    fit_range : sequence of float, default (1, 40)
+        Frequency range used for the fit, in Hz.
+    knee : bool, default False
+        Also fit a knee frequency.
+    knee_freqs : np.ndarray, optional
+        Candidate knee frequencies, default 0.5-30 Hz on a log grid.
+    exclude : sequence of (low, high), optional
+        Ranges left out of the fit, e.g. ``[(7, 14)]`` to keep a strong alpha
+        peak from biasing the exponent.
+
+    Returns
+    -------
+    dict
+        ``aperiodic_offset``, ``aperiodic_exponent``, ``aperiodic_r2`` and,
+        with a knee, ``aperiodic_knee_freq``; arrays of shape (n_segments,).
+    """
+    psd = np.atleast_2d(psd)
+    mask = _range_mask(freqs, fit_range) & (freqs > 0)
+    for band in exclude or ():
+        mask &= ~_range_mask(freqs, band)
+    f = freqs[mask]
+    y = _log_power(psd[..., mask])
+    yc = y - y.mean(axis=-1, keepdims=True)
+    syy = (yc**2).sum(axis=-1)
+
+    if knee:
+        if knee_freqs is None:
+            knee_freqs = np.geomspace(0.5, 30, 60)
+        x = 0.5 * np.log10(np.asarray(knee_freqs)[:, None] ** 2 + f[None, :] ** 2)
+    else:
+        x = np.log10(f)[None, :]
+    xc = x - x.mean(axis=-1, keepdims=True)
+    sxx = (xc**2).sum(axis=-1)
+    sxy = yc @ xc.T  # (n_segments, n_candidates)
+    sse = syy[:, None] - sxy**2 / sxx
+
+    best = np.argmin(sse, axis=-1)
+    rows = np.arange(len(best))
+    slope = sxy[rows, best] / sxx[best]
+    offset = y.mean(axis=-1) - slope * x[best].mean(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r2 = 1 - sse[rows, best] / syy
+
+    params = {
+        "aperiodic_offset": offset,
+        "aperiodic_exponent": -slope,
+        "aperiodic_r2": r2,
+    }
+    if knee:
+        params["aperiodic_knee_freq"] = np.asarray(knee_freqs)[best]
+    return params
+
+
+def aperiodic_spectrum(freqs: np.ndarray, params: Dict[str, np.ndarray]) -> np.ndarray:
+    """Evaluate fitted aperiodic components on `freqs`, shape (n_segments, n_freqs)."""
+    offset = np.asarray(params["aperiodic_offset"])[:, None]
+    exponent = np.asarray(params["aperiodic_exponent"])[:, None]
+    knee_freq = np.asarray(params.get("aperiodic_knee_freq", 0.0))
+    with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+        x = 0.5 * np.log10(np.reshape(knee_freq, (-1, 1)) ** 2 + freqs[None, :] ** 2)
+        return 10 ** (offset - exponent * x)
+
+
+def periodic_band_powers(
+    freqs: np.ndarray,
+    psd: np.ndarray,
+    params: Dict[str, np.ndarray],
+    band_registry=None,
+) -> Dict[str, np.ndarray]:
+    """
+    Band powers of the flattened spectrum, i.e. the power left above the
+    fitted aperiodic component (clipped at zero).
+
+    Returns
+    -------
+    dict
+        ``{f"{band}_periodic": array of shape (n_segments,)}``.
+    """
+    psd = np.atleast_2d(psd)
+    flattened = np.clip(psd - aperiodic_spectrum(freqs, params), 0, None)
+    plan = as_registry(band_registry).compile_freqs(freqs)
+    powers = plan.band_powers(flattened)
+    return {f"{name}_periodic": powers[:, i] for i, name in enumerate(plan.names)}
+
+
+def spectral_shape_features(
+    freqs: np.ndarray,
+    psd: np.ndarray,
+    signals: np.ndarray = None,
+    band_registry=None,
+    edges: Sequence[float] = (50, 95),
+    alpha_band: Sequence[float] = (8, 12),
+) -> Dict[str, np.ndarray]:
+    """
+    Spectral-shape feature family for a batch of segments.
+
+    Every feature is computed with whole-matrix operations on the
+    (n_segments, n_freqs) PSD matrix; Hjorth parameters need the
+    time-domain `signals` and are skipped without them.
+
+    Parameters
+    ----------
+    freqs : np.ndarray
+        Frequency bins.
+    psd : np.ndarray
+        Spectra of shape (n_segments, n_freqs).
+    signals : np.ndarray, optional
+        Segments of shape (n_segments, n_samples) for the Hjorth parameters.
+    band_registry : BandRegistry or dict, optional
+        Bands for the relative powers; its overall span also bounds entropy
+        and edge frequencies.
+    edges : sequence of float, default (50, 95)
+        Spectral edge percentages.
+    alpha_band : sequence of float, default (8, 12)
+        Search range for the peak alpha frequency.
+
+    Returns
+    -------
+    dict
+        Column name to array of shape (n_segments,).
+    """
+    psd = np.atleast_2d(psd)
+    ranges = as_registry(band_registry).ranges().values()
+    span = (min(lo for lo, _ in ranges), max(hi for _, hi in ranges))
+
+    features = relative_band_powers(freqs, psd, band_registry)
+    features["spectral_entropy"] = spectral_entropy(freqs, psd, span)
+    features.update(spectral_edge_frequency(freqs, psd, edges, span))
+    features["peak_alpha_freq"] = peak_frequency(freqs, psd, alpha_band)
+    if signals is not None:
+        features.update(hjorth_parameters(np.atleast_2d(signals)))
+    return features
@@ -0,0 +1,373 @@
+"""
+Session-level permutation tests and bootstrap confidence intervals.
+
+Segments of one recording session are autocorrelated, so treating them as
+independent samples overstates the evidence of a session type effect.
+Here the session is the resampling unit: permutations shuffle the session
+type labels across whole sessions, and bootstrap replicates draw sessions
+with replacement within each session type.
+
+Every permutation and bootstrap replicate of a user is a row of an index
+matrix (replicates x sessions) weighting whole sessions, so the statistic
+of all replicates and all features comes out of a few matrix products
+with the per-session moments of the features. Users are spread over a
+process pool; each user draws from its own stream of a seeded
+``SeedSequence``, so results do not depend on the number of workers.
+"""
+
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from math import comb
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+STATISTICS = ("cohens_d", "mean_diff")
+
+# Permutations evaluated per matrix product, bounding memory to
+# BATCH x n_features statistics
+BATCH = 4096
+
+
+def session_blocks(
+    group: pd.DataFrame,
+    session_type_col: str = "focus_type",
+    session_col: str = "session_id",
+    time_col: str = "timestamp",
+) -> np.ndarray:
+    """
+    Session number of every row of one user's segments.
+
+    Sessions are the (session_col, session type) pairs when `session_col`
+    exists; otherwise each run of consecutive segments of the same session
+    type, in `time_col` order, is a session.
+
+    Returns
+    -------
+    np.ndarray
+        Integer codes 0..n_sessions-1 in row order.
+    """
+    if session_col in group.columns:
+        return (
+            group.groupby([session_col, session_type_col], sort=False, dropna=False)
+            .ngroup()
+            .to_numpy()
+        )
+    order = (
+        np.argsort(pd.to_datetime(group[time_col]).to_numpy(), kind="stable")
+        if time_col in group.columns
+        else np.arange(len(group))
+    )
+    types = group[session_type_col].to_numpy()[order]
+    runs = np.r_[0, np.cumsum(types[1:] != types[:-1])]
+    blocks = np.empty(len(group), dtype=int)
+    blocks[order] = runs
+    return blocks
+
+
+def permutation_matrix(
+    labels: np.ndarray, n_permutations: int, rng: np.random.Generator
+) -> Tuple[np.ndarray, bool]:
+    """
+    Session type assignments of a block permutation test.
+
+    Parameters
+    ----------
+    labels : np.ndarray
+        Boolean, True for sessions of the first type.
+    n_permutations : int
+        Random permutations to draw. When the sessions allow no more
+        distinct assignments than this, all of them are enumerated instead.
+    rng : np.random.Generator
+        Source of the random permutations.
+
+    Returns
+    -------
+    matrix : np.ndarray
+        Boolean array (assignments x sessions).
+    exact : bool
+        True when `matrix` holds every distinct assignment (the observed
+        one included).
+    """
+    k, k1 = len(labels), int(labels.sum())
+    if comb(k, k1) <= n_permutations:
+        matrix = np.zeros((comb(k, k1), k), dtype=bool)
+        for row, chosen in enumerate(combinations(range(k), k1)):
+            matrix[row, list(chosen)] = True
+        return matrix, True
+    return rng.permuted(np.tile(labels, (n_permutations, 1)), axis=1), False
+
+
+def bootstrap_matrix(
+    labels: np.ndarray, n_bootstrap: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Session counts of stratified bootstrap replicates.
+
+    Each replicate draws, with replacement, as many sessions of each type
+    as observed.
+
+    Returns
+    -------
+    np.ndarray
+        Integer array (replicates x sessions): how often each session is
+        drawn.
+    """
+    counts = np.zeros((n_bootstrap, len(labels)), dtype=np.int64)
+    rows = np.arange(n_bootstrap)[:, None]
+    for members in (np.flatnonzero(labels), np.flatnonzero(~labels)):
+        draws = rng.choice(members, size=(n_bootstrap, len(members)))
+        np.add.at(counts, (rows, draws), 1)
+    return counts
+
+
+def _weighted_statistic(
+    weights_1: np.ndarray,
+    weights_2: np.ndarray,
+    moments: Tuple[np.ndarray, np.ndarray, np.ndarray],
+    statistic: str,
+) -> np.ndarray:
+    """
+    `statistic` of group 1 vs group 2 for every row of session weights.
+
+    `moments` are the per-session count, sum and sum of squares of every
+    feature (sessions x features); the result is (replicates x features).
+    """
+    count, total, squares = moments
+    n1, n2 = weights_1 @ count, weights_2 @ count
+    sum1, sum2 = weights_1 @ total, weights_2 @ total
+    with np.errstate(divide="ignore", invalid="ignore"):
+        diff = sum1 / n1 - sum2 / n2
+        if statistic == "mean_diff":
+            return diff
+        ss = weights_1 @ squares - sum1**2 / n1 + weights_2 @ squares - sum2**2 / n2
+        pooled_std = np.sqrt(np.maximum(ss, 0) / (n1 + n2 - 2))
+        return np.where(pooled_std > 0, diff / pooled_std, np.nan)
+
+
+def resample_sessions(
+    values: np.ndarray,
+    blocks: np.ndarray,
+    labels: np.ndarray,
+    statistic: str = "cohens_d",
+    n_permutations: int = 9999,
+    n_bootstrap: int = 2000,
+    confidence: float = 0.95,
+    rng: Any = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Block permutation p-values and bootstrap intervals for one user.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Segments x features; NaNs are ignored per feature.
+    blocks : np.ndarray
+        Session code of every segment, 0..n_sessions-1.
+    labels : np.ndarray
+        Boolean per session, True for the first session type.
+    statistic : {'cohens_d', 'mean_diff'}, default 'cohens_d'
+        First type minus second type.
+    n_permutations : int, default 9999
+        Random session permutations; all distinct ones when fewer.
+    n_bootstrap : int, default 2000
+        Stratified session bootstrap replicates; 0 skips the intervals.
+    confidence : float, default 0.95
+        Coverage of the percentile intervals.
+    rng : np.random.Generator, SeedSequence or int, optional
+        Random source.
+
+    Returns
+    -------
+    dict
+        Arrays of length n_features: 'statistic', 'perm_pvalue' (two-sided),
+        'ci_low', 'ci_high'; scalars 'n_permutations' and 'exact'.
+    """
+    if statistic not in STATISTICS:
+        raise ValueError(
+            f"Unknown statistic '{statistic}', expected one of {STATISTICS}"
+        )
+    rng = np.random.default_rng(rng)
+    valid = ~np.isnan(values)
+    # Centring keeps the sums of squares well conditioned
+    centre = np.where(valid, values, 0).sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+    filled = np.where(valid, values - centre, 0.0)
+    # Every replicate weights whole sessions, so per-session moments suffice
+    n_sessions = len(labels)
+    moments = tuple(
+        np.stack([np.bincount(blocks, x, n_sessions) for x in columns.T], axis=1)
+        for columns in (valid.astype(float), filled, filled**2)
+    )
+
+    in_1 = labels.astype(float)
+    observed = _weighted_statistic(in_1[None], 1 - in_1[None], moments, statistic)[0]
+
+    assignments, exact = permutation_matrix(labels, n_permutations, rng)
+    assignments = assignments.astype(float)
+    # Ties with the observed value count as at least as extreme
+    threshold = np.abs(observed) * (1 - 1e-12)
+    extreme = np.zeros(values.shape[1])
+    for start in range(0, len(assignments), BATCH):
+        weights = assignments[start : start + BATCH]
+        permuted = _weighted_statistic(weights, 1 - weights, moments, statistic)
+        extreme += (np.abs(permuted) >= threshold).sum(axis=0)
+    if exact:
+        pvalue = extreme / len(assignments)
+    else:
+        pvalue = (extreme + 1) / (len(assignments) + 1)
+
+    ci_low = ci_high = np.full(values.shape[1], np.nan)
+    if n_bootstrap:
+        counts = bootstrap_matrix(labels, n_bootstrap, rng).astype(float)
+        replicates = _weighted_statistic(
+            counts * in_1, counts * (1 - in_1), moments, statistic
+        )
+        tail = (1 - confidence) / 2
+        with warnings.catch_warnings():
+            # Features without values give all-NaN replicates
+            warnings.simplefilter("ignore", RuntimeWarning)
+            ci_low, ci_high = np.nanquantile(replicates, [tail, 1 - tail], axis=0)
+
+    return {
+        "statistic": observed,
+        "perm_pvalue": np.where(np.isnan(observed), np.nan, pvalue),
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+        "n_permutations": len(assignments),
+        "exact": exact,
+    }
+
+
+def _resample_user(
+    values: np.ndarray,
+    blocks: np.ndarray,
+    labels: np.ndarray,
+    seed: np.random.SeedSequence,
+    kwargs: Dict[str, Any],
+) -> Dict[str, np.ndarray]:
+    """Worker: resample one user's sessions."""
+    return resample_sessions(values, blocks, labels, rng=seed, **kwargs)
+
+
+def resampling_tests(
+    features_df: pd.DataFrame,
+    feature_columns: List[str],
+    session_type_col: str = "focus_type",
+    document_name_col: str = "document_name",
+    session_col: str = "session_id",
+    statistic: str = "cohens_d",
+    n_permutations: int = 9999,
+    n_bootstrap: int = 2000,
+    confidence: float = 0.95,
+    seed: Optional[int] = None,
+    n_workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Session-level permutation p-values and bootstrap confidence intervals of
+    two session types, per document_name and feature.
+
+    The resampling counterpart of ``statistical_tests.compare_session_types``:
+    sessions, not segments, are exchanged between the types (see
+    :func:`session_blocks`), which keeps the within-session autocorrelation
+    out of the p-values and intervals.
+
+    Parameters
+    ----------
+    features_df : pd.DataFrame
+        Input data with features and metadata.
+    feature_columns : Sequence[str]
+        Names of numeric columns to compare.
+    session_type_col : str
+        Column name for the session type (exactly two unique values).
+    document_name_col : str
+        Column name to group by.
+    session_col : str, default 'session_id'
+        Session key; without it runs of consecutive segments of one type
+        are sessions.
+    statistic : {'cohens_d', 'mean_diff'}, default 'cohens_d'
+        Signed, first session type minus second.
+    n_permutations : int, default 9999
+        Random permutations per user, or all distinct ones when fewer.
+    n_bootstrap : int, default 2000
+        Bootstrap replicates per user; 0 skips the intervals.
+    confidence : float, default 0.95
+        Coverage of the percentile intervals.
+    seed : int, optional
+        Seed of the per-user random streams; fixed seeds give identical
+        results for any `n_workers`.
+    n_workers : int, optional
+        Worker processes, default ``os.cpu_count()``. With 1 every user runs
+        in the calling process.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per (document_name, feature) with the statistic, 'perm_pvalue',
+        'ci_low', 'ci_high', the session counts 'n_sessions_1' and
+        'n_sessions_2', and 'n_permutations' / 'exact'. Users without a
+        session of both types are skipped.
+    """
+    session_types = features_df[session_type_col].dropna().unique()
+    if session_types.size != 2:
+        raise ValueError("Expected exactly two distinct session types.")
+    type_a, type_b = session_types
+
+    feature_columns = list(feature_columns)
+    jobs = []
+    for doc_name, group in features_df.groupby(document_name_col):
+        group = group[group[session_type_col].isin(session_types)]
+        blocks = session_blocks(group, session_type_col, session_col)
+        first_row = pd.Series(np.arange(len(group))).groupby(blocks).first()
+        labels = group[session_type_col].to_numpy()[first_row.to_numpy()] == type_a
+        if labels.all() or not labels.any():
+            continue
+        values = group[feature_columns].to_numpy(dtype=float)
+        jobs.append((doc_name, values, blocks, labels))
+
+    seeds = np.random.SeedSequence(seed).spawn(len(jobs))
+    kwargs = {
+        "statistic": statistic,
+        "n_permutations": n_permutations,
+        "n_bootstrap": n_bootstrap,
+        "confidence": confidence,
+    }
+    n_workers = n_workers or os.cpu_count() or 1
+    if n_workers == 1 or len(jobs) <= 1:
+        results = [
+            _resample_user(values, blocks, labels, s, kwargs)
+            for (_, values, blocks, labels), s in zip(jobs, seeds)
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = [
+                pool.submit(_resample_user, values, blocks, labels, s, kwargs)
+                for (_, values, blocks, labels), s in zip(jobs, seeds)
+            ]
+            results = [future.result() for future in futures]
+
+    frames = []
+    for (doc_name, values, _, labels), result in zip(jobs, results):
+        frames.append(
+            pd.DataFrame(
+                {
+                    document_name_col: doc_name,
+                    "feature": feature_columns,
+                    f"{session_type_col}_1": type_a,
+                    f"{session_type_col}_2": type_b,
+                    statistic: result["statistic"],
+                    "perm_pvalue": result["perm_pvalue"],
+                    "ci_low": result["ci_low"],
+                    "ci_high": result["ci_high"],
+                    "n_sessions_1": int(labels.sum()),
+                    "n_sessions_2": int((~labels).sum()),
+                    "n_permutations": result["n_permutations"],
+                    "exact": result["exact"],
+                }
+            )
+        )
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
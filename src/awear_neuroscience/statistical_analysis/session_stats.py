@@ -0,0 +1,358 @@
+"""Incremental per-session-type feature statistics for fast comparisons."""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.stats import t as student_t
+
+from awear_neuroscience.signal_processing.features import (
+    combine_moments,
+    merge_moments,
+)
+from awear_neuroscience.statistical_analysis.statistical_tests import ks_pvalue
+
+QUANTILES = {"q25": 0.25, "median": 0.5, "q75": 0.75}
+
+
+def _sort_points(points: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Sort every row of a sketch by value, empty slots (NaN) last."""
+    order = np.argsort(points, axis=1)
+    return (
+        np.take_along_axis(points, order, axis=1),
+        np.take_along_axis(weights, order, axis=1),
+    )
+
+
+def compress_sketch(
+    points: np.ndarray, weights: np.ndarray, size: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce weighted points to at most `size` centroids per row.
+
+    Rows with at most `size` points are kept as they are, so small samples
+    stay exact. Larger rows are cut into `size` slices of equal weight and
+    each slice becomes its weighted mean, which bounds the rank error of
+    the sketch's CDF by about ``1 / size``.
+
+    Parameters
+    ----------
+    points : np.ndarray
+        (features, n) values; NaN marks an empty slot.
+    weights : np.ndarray
+        (features, n) weights, 0 for empty slots.
+    size : int
+        Centroids kept per row.
+
+    Returns
+    -------
+    points, weights : np.ndarray
+        (features, size) sorted centroids and their weights.
+    """
+    points = np.where(weights > 0, points, np.nan)
+    points, weights = _sort_points(points, np.where(np.isnan(points), 0.0, weights))
+    n_rows, n = points.shape
+    filled = ~np.isnan(points)
+    total = weights.sum(axis=1, keepdims=True)
+
+    # Slice of every point: its position when the row fits, else its
+    # weight midpoint on a grid of `size` equal-weight slices
+    with np.errstate(divide="ignore", invalid="ignore"):
+        midpoint = (np.cumsum(weights, axis=1) - weights / 2) / total
+    grid = np.minimum((midpoint * size).astype(int), size - 1)
+    fits = filled.sum(axis=1, keepdims=True) <= size
+    slot = np.where(fits, np.arange(n), np.where(filled, grid, 0))
+    keep = filled & (slot < size)
+
+    key = (np.arange(n_rows)[:, None] * size + slot)[keep]
+    new_weights = np.bincount(key, weights[keep], n_rows * size)
+    weighted = weights * np.where(filled, points, 0)
+    sums = np.bincount(key, weighted[keep], n_rows * size)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        new_points = np.where(new_weights > 0, sums / new_weights, np.nan)
+    points, weights = _sort_points(
+        new_points.reshape(n_rows, size), new_weights.reshape(n_rows, size)
+    )
+    # Drop the slots no row uses
+    width = int((weights > 0).sum(axis=1).max(initial=0))
+    return points[:, :width], weights[:, :width]
+
+
+def sketch_quantiles(points: np.ndarray, weights: np.ndarray, q: float) -> np.ndarray:
+    """Quantile `q` of every sketch row, interpolating between centroids."""
+    out = np.full(len(points), np.nan)
+    for row, (p, w) in enumerate(zip(points, weights)):
+        filled = w > 0
+        if filled.any():
+            p, w = p[filled], w[filled]
+            midpoint = (np.cumsum(w) - w / 2) / w.sum()
+            out[row] = np.interp(q, midpoint, p)
+    return out
+
+
+def sketch_ks(
+    points_1: np.ndarray,
+    weights_1: np.ndarray,
+    points_2: np.ndarray,
+    weights_2: np.ndarray,
+) -> np.ndarray:
+    """
+    KS statistic between the sketches of every row, from one pooled sort:
+    the largest gap between their step CDFs. Exact while both sketches
+    hold their raw points.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        steps = np.concatenate(
+            [
+                weights_1 / weights_1.sum(axis=1, keepdims=True),
+                -weights_2 / weights_2.sum(axis=1, keepdims=True),
+            ],
+            axis=1,
+        )
+    points = np.concatenate([points_1, points_2], axis=1)
+    points, steps = _sort_points(points, np.nan_to_num(steps))
+    gap = np.abs(np.cumsum(steps, axis=1))
+    # Compare the CDFs after the last of equal values only
+    ends = np.ones(points.shape, dtype=bool)
+    ends[:, :-1] = points[:, 1:] != points[:, :-1]
+    return np.where(ends & ~np.isnan(points), gap, 0).max(axis=1, initial=0)
+
+
+class SessionStats:
+    """
+    Sufficient statistics of every (user, session type) and feature.
+
+    For each ``document_name`` and session type the store keeps, per
+    feature, the running (count, mean, M2) and a mergeable quantile sketch.
+    Feeding it each newly processed session with :meth:`update` keeps it
+    equal to statistics over all rows seen, and :meth:`compare` answers
+    effect sizes and approximate tests in O(features) per user without
+    reading feature rows back.
+
+    Parameters
+    ----------
+    feature_columns : List[str]
+        Feature columns to track.
+    sketch_size : int, default 200
+        Centroids per sketch; KS statistics and quantiles are exact until a
+        (user, session type) has more rows than this, and within about
+        ``1 / sketch_size`` afterwards.
+    session_type_col : str, default 'focus_type'
+        Column with the session type.
+    document_name_col : str, default 'document_name'
+        Column with the user.
+
+    Examples
+    --------
+    >>> stats = SessionStats(["alpha_fil", "focus_index_fil"])
+    >>> stats.update(new_session_features_df)
+    >>> stats.compare("calm", "stressed")
+    >>> stats.save("session_stats.json")
+    """
+
+    def __init__(
+        self,
+        feature_columns: List[str],
+        sketch_size: int = 200,
+        session_type_col: str = "focus_type",
+        document_name_col: str = "document_name",
+    ):
+        self.feature_columns = list(feature_columns)
+        self.sketch_size = sketch_size
+        self.session_type_col = session_type_col
+        self.document_name_col = document_name_col
+        self.groups: Dict[Tuple[Any, Any], Dict[str, np.ndarray]] = {}
+
+    def _empty(self) -> Dict[str, np.ndarray]:
+        n = len(self.feature_columns)
+        return {
+            "count": np.zeros(n),
+            "mean": np.zeros(n),
+            "m2": np.zeros(n),
+            "points": np.full((n, 0), np.nan),
+            "weights": np.zeros((n, 0)),
+        }
+
+    def _fold(
+        self, key: Tuple[Any, Any], values: np.ndarray, weights: np.ndarray
+    ) -> None:
+        """Fold raw rows (weights 1) or sketch points into group `key`."""
+        group = self.groups.setdefault(key, self._empty())
+        group["points"], group["weights"] = compress_sketch(
+            np.concatenate([group["points"], values], axis=1),
+            np.concatenate([group["weights"], weights], axis=1),
+            self.sketch_size,
+        )
+
+    def update(self, features_df: pd.DataFrame) -> None:
+        """
+        Add newly processed feature rows.
+
+        Parameters
+        ----------
+        features_df : pd.DataFrame
+            Rows not added before, with the tracked feature columns, the
+            session type and the user.
+        """
+        missing = set(self.feature_columns) - set(features_df.columns)
+        if missing:
+            raise ValueError(f"Missing feature columns: {sorted(missing)}")
+        values = features_df[self.feature_columns].to_numpy(dtype=float)
+        keys = [self.document_name_col, self.session_type_col]
+        for key, rows in features_df.groupby(keys, sort=False).indices.items():
+            batch = values[rows]
+            group = self.groups.setdefault(key, self._empty())
+            group["count"], group["mean"], group["m2"] = merge_moments(
+                group["count"], group["mean"], group["m2"], batch
+            )
+            self._fold(key, batch.T, (~np.isnan(batch.T)).astype(float))
+
+    def merge(self, other: "SessionStats") -> "SessionStats":
+        """Fold another store over the same features into this one."""
+        if other.feature_columns != self.feature_columns:
+            raise ValueError("Stores track different feature columns")
+        for key, theirs in other.groups.items():
+            group = self.groups.setdefault(key, self._empty())
+            group["count"], group["mean"], group["m2"] = combine_moments(
+                group["count"],
+                group["mean"],
+                group["m2"],
+                theirs["count"],
+                theirs["mean"],
+                theirs["m2"],
+            )
+            self._fold(key, theirs["points"], theirs["weights"])
+        return self
+
+    def summary(self) -> pd.DataFrame:
+        """Count, mean, standard deviation and quartiles per group and feature."""
+        frames = []
+        for (user, session_type), group in self.groups.items():
+            with np.errstate(divide="ignore", invalid="ignore"):
+                std = np.sqrt(group["m2"] / (group["count"] - 1))
+            frames.append(
+                pd.DataFrame(
+                    {
+                        self.document_name_col: user,
+                        self.session_type_col: session_type,
+                        "feature": self.feature_columns,
+                        "count": group["count"].astype(int),
+                        "mean": np.where(group["count"] > 0, group["mean"], np.nan),
+                        "std": std,
+                        **{
+                            name: sketch_quantiles(group["points"], group["weights"], q)
+                            for name, q in QUANTILES.items()
+                        },
+                    }
+                )
+            )
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def compare(
+        self, type_1: Any, type_2: Any, users: Optional[List[Any]] = None
+    ) -> pd.DataFrame:
+        """
+        Effect sizes and approximate tests of `type_1` vs `type_2`, per user.
+
+        Cohen's d and Welch's t come exactly from the moments; the KS
+        statistic comes from the sketches (see :func:`sketch_ks`) and its
+        p-value from ``statistical_tests.ks_pvalue``.
+
+        Parameters
+        ----------
+        type_1, type_2 : Any
+            Session types to compare.
+        users : list, optional
+            Users to report; default every user with both types.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per (document_name, feature) with 'n1', 'n2', 'mean_1',
+            'mean_2', 'cohens_d', 'welch_t', 'welch_pvalue', 'ks_stat' and
+            'ks_pvalue'.
+        """
+        if users is None:
+            users = list(dict.fromkeys(user for user, _ in self.groups))
+        frames = []
+        for user in users:
+            a = self.groups.get((user, type_1))
+            b = self.groups.get((user, type_2))
+            if a is None or b is None:
+                continue
+            n1, n2 = a["count"], b["count"]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                diff = a["mean"] - b["mean"]
+                pooled_std = np.sqrt((a["m2"] + b["m2"]) / (n1 + n2 - 2))
+                d = np.where(pooled_std > 0, diff / pooled_std, np.nan)
+                se1, se2 = a["m2"] / (n1 - 1) / n1, b["m2"] / (n2 - 1) / n2
+                welch_t = diff / np.sqrt(se1 + se2)
+                welch_df = (se1 + se2) ** 2 / (
+                    se1**2 / (n1 - 1) + se2**2 / (n2 - 1)
+                )
+                welch_p = 2 * student_t.sf(np.abs(welch_t), welch_df)
+            ks = sketch_ks(a["points"], a["weights"], b["points"], b["weights"])
+            frame = pd.DataFrame(
+                {
+                    self.document_name_col: user,
+                    "feature": self.feature_columns,
+                    f"{self.session_type_col}_1": type_1,
+                    f"{self.session_type_col}_2": type_2,
+                    "n1": n1.astype(int),
+                    "n2": n2.astype(int),
+                    "mean_1": a["mean"],
+                    "mean_2": b["mean"],
+                    "cohens_d": d,
+                    "welch_t": welch_t,
+                    "welch_pvalue": welch_p,
+                    "ks_stat": ks,
+                    "ks_pvalue": ks_pvalue(ks, n1, n2),
+                }
+            )
+            frames.append(frame[(frame["n1"] > 0) & (frame["n2"] > 0)])
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable snapshot of the store."""
+        return {
+            "feature_columns": self.feature_columns,
+            "sketch_size": self.sketch_size,
+            "session_type_col": self.session_type_col,
+            "document_name_col": self.document_name_col,
+            # (key, values) pairs keep non-string keys
+            "groups": [
+                [list(key), {k: np.asarray(v).tolist() for k, v in group.items()}]
+                for key, group in self.groups.items()
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SessionStats":
+        """Rebuild a store from :meth:`to_dict` output."""
+        obj = cls(
+            data["feature_columns"],
+            data["sketch_size"],
+            data["session_type_col"],
+            data["document_name_col"],
+        )
+        n = len(obj.feature_columns)
+        for key, group in data["groups"]:
+            obj.groups[tuple(key)] = {
+                k: np.asarray(v, dtype=float).reshape(n, -1)
+                if k in ("points", "weights")
+                else np.asarray(v, dtype=float)
+                for k, v in group.items()
+            }
+        return obj
+
+    def save(self, path: str) -> None:
+        """Persist the store as JSON."""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> "SessionStats":
+        """Load a store written by :meth:`save`."""
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -1,8 +1,19 @@
-from typing import Any, List
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
-from scipy.stats import ks_2samp, mannwhitneyu
+from scipy.special import kolmogorov, smirnov
+from scipy.stats import chi2
+from scipy.stats import f as fisher_f
+from scipy.stats import ks_2samp, mannwhitneyu, norm
+from scipy.stats import t as student_t
+
+# Effective sample size from which KS p-values use the limiting distribution
+KS_LIMIT_MIN_N = 50
+
+# scipy's mannwhitneyu is exact for tie-free samples with a side this small
+MW_EXACT_MAX_N = 8
 
 
 def cohens_d(x: List[float], y: List[float]) -> float:
@@ -21,11 +32,213 @@ def cohens_d(x: List[float], y: List[float]) -> float:
     return (np.mean(x_arr) - np.mean(y_arr)) / pooled_std if pooled_std > 0 else np.nan
 
 
+def _sorted_ranks(rows: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Sort each row of `rows` (one sample per row, NaNs last) and give the
+    sorted values their average ranks.
+
+    Returns the sort order, the sorted rows, the 1-based ranks of the
+    sorted values (NaN for NaNs), the first and last sorted position of the
+    tie group of every value and the per-row tie term.
+    """
+    n = rows.shape[1]
+    # Ranks only depend on tie groups, so the sort need not be stable
+    order = np.argsort(rows, axis=1)
+    ordered = np.take_along_axis(rows, order, axis=1)
+    position = np.arange(n)
+
+    starts = np.ones(ordered.shape, dtype=bool)
+    starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    ends = np.ones(ordered.shape, dtype=bool)
+    ends[:, :-1] = starts[:, 1:]
+    first = np.maximum.accumulate(np.where(starts, position, 0), axis=1)
+    last = np.minimum.accumulate(np.where(ends, position, n - 1)[:, ::-1], axis=1)[
+        :, ::-1
+    ]
+
+    valid = ~np.isnan(ordered)
+    ranks = np.where(valid, (first + last) / 2 + 1, np.nan)
+    # A group of t ties contributes t**3 - t, i.e. t**2 - 1 per member
+    size = last - first + 1
+    tie_term = np.where(valid, size**2 - 1, 0).sum(axis=1).astype(float)
+    return order, ordered, ranks, first, last, tie_term
+
+
+def average_ranks(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rank every column of `values` at once, giving ties their average rank.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        2-D array, one sample per column. NaNs are left out of the ranking.
+
+    Returns
+    -------
+    ranks : np.ndarray
+        1-based ranks in the layout of `values` (NaN where `values` is NaN).
+    tie_term : np.ndarray
+        Per column, the sum of ``t**3 - t`` over groups of ``t`` tied values,
+        as used by the tie corrections of rank tests.
+    """
+    # Sorting along contiguous rows is several times faster than down columns
+    rows = np.ascontiguousarray(np.asarray(values, dtype=float).T)
+    order, _, sorted_ranks, _, _, tie_term = _sorted_ranks(rows)
+    ranks = np.empty_like(sorted_ranks)
+    np.put_along_axis(ranks, order, sorted_ranks, axis=1)
+    return ranks.T, tie_term
+
+
+def ks_pvalue(d: np.ndarray, n1: np.ndarray, n2: np.ndarray) -> np.ndarray:
+    """
+    Two-sided p-values of two-sample KS statistics `d`.
+
+    scipy's ``ks_2samp(method="asymp")`` evaluates the exact distribution of
+    the one-sample statistic for the effective size ``n1 * n2 / (n1 + n2)``,
+    at a fraction of a millisecond per value. Here p-values below 0.2 of
+    effective sizes under ``KS_LIMIT_MIN_N`` are twice its one-sided exact
+    tail, and all others come from the Kolmogorov limit with Stephens'
+    correction. Against scipy, p-values between 1e-3 and 0.05 are within 4%
+    and larger ones within 0.03 from an effective size of 10.
+    """
+    d, n1, n2 = np.broadcast_arrays(*map(np.asarray, (d, n1, n2)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        en = n1 * n2 / (n1 + n2)
+        root = np.sqrt(en)
+        p = kolmogorov((root + 0.12 + 0.11 / root) * d)
+    tail = (en < KS_LIMIT_MIN_N) & (p < 0.2)
+    if tail.any():
+        p[tail] = 2 * smirnov(np.round(en[tail]).astype(int), d[tail])
+    return np.clip(p, 0, 1)
+
+
+def mw_pvalue(
+    u1: np.ndarray, n1: np.ndarray, n2: np.ndarray, tie_term: np.ndarray
+) -> np.ndarray:
+    """
+    Two-sided Mann–Whitney p-values of U statistics `u1`, from the normal
+    approximation with tie and continuity corrections (scipy's
+    ``method="asymptotic"``). `tie_term` is the pooled sample's sum of
+    ``t**3 - t`` over tie groups (see :func:`average_ranks`).
+    """
+    n = n1 + n2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = np.maximum(u1, n1 * n2 - u1)
+        sigma = np.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))))
+        return np.clip(2 * norm.sf((u - n1 * n2 / 2 - 0.5) / sigma), 0, 1)
+
+
+def mw_exact_pvalue(x: np.ndarray, y: np.ndarray) -> float:
+    """Two-sided exact Mann–Whitney p-value of two tie-free samples."""
+    return mannwhitneyu(x, y, alternative="two-sided", method="exact").pvalue
+
+
+def two_sample_tests(
+    x: np.ndarray, y: np.ndarray, exact: bool = True
+) -> Dict[str, np.ndarray]:
+    """
+    Kolmogorov–Smirnov, Mann–Whitney U and Cohen's d for many features at once.
+
+    Column ``j`` of `x` is compared with column ``j`` of `y`; NaNs are
+    ignored, so each column may have its own sample sizes. Both samples are
+    ranked together once and the KS statistic is read off the same sort.
+
+    Statistics equal those of ``scipy.stats.ks_2samp`` and
+    ``scipy.stats.mannwhitneyu``. P-values come from large-sample
+    distributions, computed for all columns at once: the normal
+    approximation with tie and continuity corrections for U (scipy's
+    ``method="asymptotic"``) and :func:`ks_pvalue` for KS. By default,
+    small-sample columns are handed to scipy for its exact p-values, about a
+    millisecond each: KS for effective sizes ``n1 * n2 / (n1 + n2)`` under
+    ``KS_LIMIT_MIN_N``, and U for tie-free samples with a side of at most
+    ``MW_EXACT_MAX_N``. Larger KS p-values stay within about 0.03 of scipy's
+    exact ones. ``exact=False`` vectorizes every column; see
+    :func:`ks_pvalue` for its accuracy on small samples.
+
+    Parameters
+    ----------
+    x, y : np.ndarray
+        Arrays of shape (n1, n_features) and (n2, n_features).
+    exact : bool, default True
+        Use scipy's exact p-values for small samples; False uses the
+        vectorized approximations for every column.
+
+    Returns
+    -------
+    dict
+        Arrays of length n_features: 'ks_stat', 'ks_pvalue', 'mw_stat' (U of
+        `x`), 'mw_pvalue', 'cohens_d' (signed, NaN for zero pooled
+        variance), 'n1' and 'n2'. Statistics of a column with an empty
+        sample are NaN.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # One row per feature
+    pooled = np.ascontiguousarray(np.concatenate([x, y]).T)
+    order, ordered, ranks, _, last, tie_term = _sorted_ranks(pooled)
+    valid = ~np.isnan(ordered)
+    # Last value of each tie group
+    ends = (last == np.arange(pooled.shape[1])) & valid
+    from_x = (order < len(x)) & valid
+    from_y = (order >= len(x)) & valid
+    n1 = from_x.sum(axis=1)
+    n2 = from_y.sum(axis=1)
+    n = n1 + n2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u1 = np.where(from_x, ranks, 0).sum(axis=1) - n1 * (n1 + 1) / 2
+        mw_p = mw_pvalue(u1, n1, n2, tie_term)
+
+        # KS: the empirical CDFs, compared at the last value of each tie group
+        gap = np.abs(
+            np.cumsum(from_x, axis=1) / n1[:, None]
+            - np.cumsum(from_y, axis=1) / n2[:, None]
+        )
+        ks = np.where(ends, gap, 0).max(axis=1, initial=0)
+        ks_p = ks_pvalue(ks, n1, n2)
+
+        # Cohen's d from row-wise moments
+        mean_x = np.where(from_x, ordered, 0).sum(axis=1) / n1
+        mean_y = np.where(from_y, ordered, 0).sum(axis=1) / n2
+        squares = (
+            np.where(from_x, ordered - mean_x[:, None], 0) ** 2
+            + np.where(from_y, ordered - mean_y[:, None], 0) ** 2
+        )
+        pooled_std = np.sqrt(squares.sum(axis=1) / (n - 2))
+        d = np.where(pooled_std > 0, (mean_x - mean_y) / pooled_std, np.nan)
+
+    empty = (n1 == 0) | (n2 == 0)
+    if exact:
+        # Only small samples are worth scipy's exact distributions
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ks_exact = ~empty & (n1 * n2 / n < KS_LIMIT_MIN_N)
+        mw_exact = ~empty & (np.minimum(n1, n2) <= MW_EXACT_MAX_N) & (tie_term == 0)
+        for j in np.flatnonzero(ks_exact | mw_exact):
+            xj, yj = x[:, j], y[:, j]
+            xj, yj = xj[~np.isnan(xj)], yj[~np.isnan(yj)]
+            if ks_exact[j]:
+                ks_p[j] = ks_2samp(xj, yj).pvalue
+            if mw_exact[j]:
+                mw_p[j] = mw_exact_pvalue(xj, yj)
+
+    out = {
+        "ks_stat": ks,
+        "ks_pvalue": ks_p,
+        "mw_stat": u1,
+        "mw_pvalue": mw_p,
+        "cohens_d": d,
+    }
+    out = {key: np.where(empty, np.nan, value) for key, value in out.items()}
+    out["n1"], out["n2"] = n1, n2
+    return out
+
+
 def compare_session_types(
     features_df: pd.DataFrame,
     feature_columns: List[str],
     session_type_col: str = "focus_type",
     document_name_col: str = "document_name",
+    exact: bool = True,
 ) -> pd.DataFrame:
     """
     For each document_name, compare two session types on each feature:
@@ -33,6 +246,11 @@ def compare_session_types(
       - Mann–Whitney U
       - Cohen’s d
 
+    All features of a document are tested together by
+    :func:`two_sample_tests`. Small samples get scipy's exact p-values and
+    larger ones vectorized large-sample p-values, unless ``exact=False``
+    vectorizes them all (see :func:`ks_pvalue`).
+
     Parameters
     ----------
     features_df : pd.DataFrame
@@ -43,6 +261,8 @@ def compare_session_types(
         Column name for the session type (exactly two unique values).
     document_name_col : str
         Column name to group by (formerly `email`).
+    exact : bool, default True
+        Passed to :func:`two_sample_tests`.
 
     Returns
     -------
@@ -52,39 +272,265 @@ def compare_session_types(
     # Identify the two session types
     session_types = features_df[session_type_col].dropna().unique()
     if session_types.size != 2:
-        raise ValueError("Expected exactly two distinct session types.")
+        raise ValueError(
+            "Expected exactly two distinct session types; "
+            "use compare_groups for more."
+        )
     type_a, type_b = session_types
 
-    records = []
+    feature_columns = list(feature_columns)
+    values = features_df[feature_columns].to_numpy(dtype=float)
+    session = features_df[session_type_col].to_numpy()
+    is_a, is_b = session == type_a, session == type_b
+
+    frames = []
     # Group by document_name
-    for doc_name, group in features_df.groupby(document_name_col):
-        grp_a = group[group[session_type_col] == type_a]
-        grp_b = group[group[session_type_col] == type_b]
-
-        for feat in feature_columns:
-            a_vals = grp_a[feat].dropna()
-            b_vals = grp_b[feat].dropna()
-            if a_vals.empty or b_vals.empty:
-                continue
-
-            ks_stat, ks_p = ks_2samp(a_vals, b_vals)
-            mw_stat, mw_p = mannwhitneyu(a_vals, b_vals, alternative="two-sided")
-            d = abs(cohens_d(a_vals, b_vals))
-
-            records.append(
-                {
-                    document_name_col: doc_name,
-                    "feature": feat,
-                    f"{session_type_col}_1": type_a,
-                    f"{session_type_col}_2": type_b,
-                    "ks_stat": ks_stat,
-                    "ks_pvalue": ks_p,
-                    "mw_stat": mw_stat,
-                    "mw_pvalue": mw_p,
-                    "cohens_d": d,
-                    "n1": a_vals.size,
-                    "n2": b_vals.size,
-                }
+    for doc_name, rows in features_df.groupby(document_name_col).indices.items():
+        tests = two_sample_tests(
+            values[rows[is_a[rows]]], values[rows[is_b[rows]]], exact
+        )
+        frame = pd.DataFrame(
+            {
+                document_name_col: doc_name,
+                "feature": feature_columns,
+                f"{session_type_col}_1": type_a,
+                f"{session_type_col}_2": type_b,
+                "ks_stat": tests["ks_stat"],
+                "ks_pvalue": tests["ks_pvalue"],
+                "mw_stat": tests["mw_stat"],
+                "mw_pvalue": tests["mw_pvalue"],
+                "cohens_d": np.abs(tests["cohens_d"]),
+                "n1": tests["n1"],
+                "n2": tests["n2"],
+            }
+        )
+        # Features missing from either session type are skipped
+        frames.append(frame[(frame["n1"] > 0) & (frame["n2"] > 0)])
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def benjamini_hochberg(pvalues: np.ndarray) -> np.ndarray:
+    """
+    Benjamini–Hochberg adjusted p-values (q-values).
+
+    NaNs are left out of the family and stay NaN; rejecting every test with
+    a q-value at or below ``alpha`` controls the false discovery rate at
+    ``alpha``.
+    """
+    pvalues = np.asarray(pvalues, dtype=float)
+    q = np.full(pvalues.shape, np.nan)
+    tested = np.flatnonzero(~np.isnan(pvalues))
+    if tested.size:
+        order = tested[np.argsort(pvalues[tested])]
+        scaled = pvalues[order] * tested.size / np.arange(1, tested.size + 1)
+        q[order] = np.minimum(np.minimum.accumulate(scaled[::-1])[::-1], 1)
+    return q
+
+
+def _group_tests(
+    values: np.ndarray, codes: np.ndarray, n_groups: int, exact: bool = True
+) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    """
+    Omnibus and pairwise statistics of one user from one ranking per feature.
+
+    `values` is segments x features, `codes` the group of every segment.
+    Omnibus arrays have length n_features; pairwise arrays are
+    (pairs x features), pairs in ``itertools.combinations`` order. With
+    `exact`, small tie-free pairs get exact Mann–Whitney p-values.
+    """
+    rows = np.ascontiguousarray(values.T)
+    n = rows.shape[1]
+    order, ordered, ranks, first, last, tie_term = _sorted_ranks(rows)
+    valid = ~np.isnan(ordered)
+    position = np.arange(n)
+    # groups x features x sorted positions
+    member = (codes[order][None] == np.arange(n_groups)[:, None, None]) & valid
+    counts = member.sum(axis=2).astype(float)
+    total = counts.sum(axis=0)
+
+    # Moments about each feature's mean keep the sums of squares accurate
+    filled = np.where(valid, ordered, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        grand_mean = filled.sum(axis=1, keepdims=True) / total[:, None]
+    centred = np.where(valid, ordered - grand_mean, 0)
+    rank_sums = np.where(member, ranks, 0).sum(axis=2)
+    sums = np.where(member, centred, 0).sum(axis=2)
+    squares = np.where(member, centred, 0) ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = sums / counts
+        ss = squares.sum(axis=2) - sums * means
+        present = counts > 0
+        k = present.sum(axis=0)
+
+        # Kruskal–Wallis H with tie correction
+        h = 12 / (total * (total + 1)) * np.where(
+            present, rank_sums**2 / counts, 0
+        ).sum(axis=0) - 3 * (total + 1)
+        h /= 1 - tie_term / (total**3 - total)
+        # One-way ANOVA
+        between = np.where(present, counts * means**2, 0).sum(axis=0)
+        within = np.where(present, ss, 0).sum(axis=0)
+        anova_f = (between / (k - 1)) / (within / (total - k))
+        omnibus = {
+            "n_groups": k,
+            "n": total.astype(int),
+            "kw_stat": h,
+            "kw_pvalue": chi2.sf(h, k - 1),
+            "anova_f": anova_f,
+            "anova_pvalue": fisher_f.sf(anova_f, k - 1, total - k),
+        }
+
+        # Per group: values strictly below and tied with each sorted value
+        cumulative = np.cumsum(member, axis=2)
+        before = np.where(
+            first > 0,
+            np.take_along_axis(cumulative, np.maximum(first - 1, 0)[None], axis=2),
+            0,
+        )
+        tied = np.take_along_axis(cumulative, last[None], axis=2) - before
+        ends = (last == position) & valid
+        dunn_scale = total * (total + 1) / 12 - tie_term / (12 * (total - 1))
+
+        pairs = list(combinations(range(n_groups), 2))
+        i, j = np.array(pairs).T
+        n1, n2 = counts[i], counts[j]
+        # U of group i: pairs it wins against group j, ties counting half
+        u1 = np.where(member[i], before[j] + tied[j] / 2, 0).sum(axis=2)
+        # Tie term of the two groups pooled, one count per tie group
+        pair_tied = tied[i] + tied[j]
+        pair_ties = np.where(ends, pair_tied**3 - pair_tied, 0).sum(axis=2)
+        var1, var2 = ss[i] / (n1 - 1), ss[j] / (n2 - 1)
+        pooled_std = np.sqrt((ss[i] + ss[j]) / (n1 + n2 - 2))
+        diff = means[i] - means[j]
+        dunn_z = (rank_sums[i] / n1 - rank_sums[j] / n2) / np.sqrt(
+            dunn_scale * (1 / n1 + 1 / n2)
+        )
+        se1, se2 = var1 / n1, var2 / n2
+        welch_t = diff / np.sqrt(se1 + se2)
+        welch_df = (se1 + se2) ** 2 / (se1**2 / (n1 - 1) + se2**2 / (n2 - 1))
+        pairwise = {
+            "n1": n1.astype(int),
+            "n2": n2.astype(int),
+            "cohens_d": np.where(pooled_std > 0, diff / pooled_std, np.nan),
+            "rank_biserial": 2 * u1 / (n1 * n2) - 1,
+            "mw_stat": u1,
+            "mw_pvalue": mw_pvalue(u1, n1, n2, pair_ties),
+            "dunn_z": dunn_z,
+            "dunn_pvalue": 2 * norm.sf(np.abs(dunn_z)),
+            "welch_t": welch_t,
+            "welch_pvalue": 2 * student_t.sf(np.abs(welch_t), welch_df),
+        }
+    if exact:
+        small = (np.minimum(n1, n2) <= MW_EXACT_MAX_N) & (n1 > 0) & (n2 > 0)
+        for p, f in zip(*np.nonzero(small & (pair_ties == 0))):
+            x, y = values[codes == i[p], f], values[codes == j[p], f]
+            pairwise["mw_pvalue"][p, f] = mw_exact_pvalue(
+                x[~np.isnan(x)], y[~np.isnan(y)]
             )
+    return omnibus, pairwise
+
+
+def compare_groups(
+    features_df: pd.DataFrame,
+    feature_columns: List[str],
+    group_col: str = "focus_type",
+    document_name_col: str = "document_name",
+    groups: Optional[List[Any]] = None,
+    exact: bool = True,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Compare any number of session types on every feature, per document_name.
+
+    Each feature of a document is ranked once over all its groups; the
+    omnibus tests and every pairwise test are read off that ranking and the
+    group moments:
+
+      - Kruskal–Wallis H and one-way ANOVA across the groups
+      - per pair: Mann–Whitney U, rank-biserial correlation, Dunn's z on the
+        shared ranking, Welch's t and Cohen's d
+
+    Benjamini–Hochberg q-values (``<test>_qvalue``) are computed across the
+    whole table of each test, all documents and features together.
+    Mann–Whitney p-values are exact for tie-free pairs with a group of at
+    most ``MW_EXACT_MAX_N`` values, as in scipy, unless ``exact=False``; all
+    other p-values are asymptotic.
+
+    Parameters
+    ----------
+    features_df : pd.DataFrame
+        Input data with features and metadata.
+    feature_columns : Sequence[str]
+        Names of numeric columns to compare.
+    group_col : str, default 'focus_type'
+        Column with the session type of every row.
+    document_name_col : str
+        Column name to group by.
+    groups : list, optional
+        Session types to compare, in this order; default all of them in
+        order of first appearance.
+    exact : bool, default True
+        Use exact Mann–Whitney p-values where scipy would; False keeps the
+        normal approximation everywhere.
+
+    Returns
+    -------
+    omnibus_df : pd.DataFrame
+        One row per (document_name, feature) with at least two groups
+        present: 'n_groups', 'n', 'kw_stat', 'kw_pvalue', 'anova_f',
+        'anova_pvalue' and their q-values.
+    pairwise_df : pd.DataFrame
+        One row per (document_name, feature, pair of groups) with both groups
+        present: ``{group_col}_1``, ``{group_col}_2``, 'n1', 'n2',
+        'cohens_d', 'rank_biserial', 'mw_stat' (U of the first group),
+        'mw_pvalue', 'dunn_z', 'dunn_pvalue', 'welch_t', 'welch_pvalue' and
+        the q-values. Effect sizes are positive when the first group is
+        larger.
+    """
+    if groups is None:
+        groups = features_df[group_col].dropna().unique().tolist()
+    groups = list(groups)
+    if len(groups) < 2:
+        raise ValueError("Expected at least two distinct session types.")
+    feature_columns = list(feature_columns)
+    n_features = len(feature_columns)
+    pairs = list(combinations(groups, 2))
+
+    values = features_df[feature_columns].to_numpy(dtype=float)
+    codes = pd.Categorical(features_df[group_col], categories=groups).codes
+    omnibus_frames, pairwise_frames = [], []
+    for doc_name, rows in features_df.groupby(document_name_col).indices.items():
+        rows = rows[codes[rows] >= 0]
+        if not len(rows):
+            continue
+        omnibus, pairwise = _group_tests(values[rows], codes[rows], len(groups), exact)
+        frame = pd.DataFrame(
+            {document_name_col: doc_name, "feature": feature_columns, **omnibus}
+        )
+        omnibus_frames.append(frame[frame["n_groups"] >= 2])
+        frame = pd.DataFrame(
+            {
+                document_name_col: doc_name,
+                "feature": np.tile(feature_columns, len(pairs)),
+                f"{group_col}_1": np.repeat([a for a, _ in pairs], n_features),
+                f"{group_col}_2": np.repeat([b for _, b in pairs], n_features),
+                **{key: value.ravel() for key, value in pairwise.items()},
+            }
+        )
+        pairwise_frames.append(frame[(frame["n1"] > 0) & (frame["n2"] > 0)])
+
+    omnibus_df = _with_qvalues(omnibus_frames, ("kw", "anova"))
+    pairwise_df = _with_qvalues(pairwise_frames, ("mw", "dunn", "welch"))
+    return omnibus_df, pairwise_df
+
 
-    return pd.DataFrame(records)
+def _with_qvalues(frames: List[pd.DataFrame], tests: Tuple[str, ...]) -> pd.DataFrame:
+    """Concatenate per-document results and add q-values across all rows."""
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    for test in tests:
+        df[f"{test}_qvalue"] = benjamini_hochberg(df[f"{test}_pvalue"].to_numpy())
+    return df
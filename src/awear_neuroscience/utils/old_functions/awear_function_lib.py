@@ -9,7 +9,9 @@ import seaborn as sns
 from IPython.display import display
 from scipy import signal, stats
 from scipy.spatial.distance import cdist
-from statsmodels.stats.multitest import multipletests
+
+from awear_neuroscience.signal_processing.bands import BandRegistry
+from awear_neuroscience.statistical_analysis.statistical_tests import compare_groups
 
 # ========================== #
 # EEG Data Loading
@@ -250,6 +252,8 @@ frequency_bands = {
     "gamma2": [38, 46],
     "gamma": ["gamma1", "gamma2"],  # Average of gamma1 & gamma2
 }
+# Atomic bands sum their PSD bins, grouped bands average their sub-bands
+_band_registry = BandRegistry(frequency_bands, integration="sum", composite="mean")
 
 
 def compute_band_power(freqs, psd, band):
@@ -265,20 +269,10 @@ def compute_band_power(freqs, psd, band):
     Returns:
         float: Total power within the specified frequency band.
     """
-    # If the band is a grouped label (like 'alpha' or 'beta'), compute power for each sub-band
-    if isinstance(frequency_bands[band][0], str):
-        sub_band_powers = []
-        for sub_band in frequency_bands[band]:
-            f_low, f_high = frequency_bands[sub_band]
-            # Sum power in the sub-band range
-            power = np.sum(psd[(freqs >= f_low) & (freqs <= f_high)])
-            sub_band_powers.append(power)
-        # Return average power across sub-bands
-        return np.mean(sub_band_powers)
-    else:
-        # If it's an atomic band (like 'theta' or 'gamma1'), directly compute total power
-        f_low, f_high = frequency_bands[band]
-        return np.sum(psd[(freqs >= f_low) & (freqs <= f_high)])
+    # Grouped labels (like 'alpha' or 'beta') average their sub-band powers;
+    # the masks for this frequency grid are compiled once and reused
+    plan = _band_registry.compile_freqs(freqs)
+    return plan.band_power(psd, band)
 
 
 def calculate_ratios(data_dict, fs, selected_ratios):
@@ -495,42 +489,41 @@ def compute_effect_sizes(pac_data, name):
     - DataFrame containing effect sizes and statistical results for each state comparison.
     """
 
-    state_pairs = list(itertools.combinations(pac_data.keys(), 2))
-    results = []
-
-    for state1, state2 in state_pairs:
-        data1 = pac_data[state1]
-        data2 = pac_data[state2]
-
-        # Skip empty or too-small datasets
-        if len(data1) < 2 or len(data2) < 2:
-            continue
-
-        # Compute Cohen’s d
-        mean1, mean2 = np.mean(data1), np.mean(data2)
-        std1, std2 = np.std(data1, ddof=1), np.std(data2, ddof=1)
-
-        if std1 == 0 or std2 == 0:  # Avoid division by zero
-            cohen_d = np.nan
-        else:
-            pooled_std = np.sqrt(
-                ((len(data1) - 1) * std1**2 + (len(data2) - 1) * std2**2)
-                / (len(data1) + len(data2) - 2)
-            )
-            cohen_d = (mean1 - mean2) / pooled_std
-
-        # Compute Rank-Biserial Correlation (r) and Mann-Whitney U test
-        U, p = stats.mannwhitneyu(data1, data2, alternative="two-sided")
-        r = 1 - (2 * U) / (len(data1) * len(data2))
-
-        results.append(
-            {
-                "Comparison": f"{state1} vs {state2}",
-                "Cohen's d": cohen_d,
-                "Rank-Biserial r": r,
-                "Mann-Whitney p-value": p,
-            }
-        )
+    # All pairs come from one ranking in compare_groups
+    long_df = pd.DataFrame(
+        {
+            "State": np.repeat(list(pac_data), [len(v) for v in pac_data.values()]),
+            "PAC": np.concatenate(
+                [np.asarray(v, dtype=float) for v in pac_data.values()]
+            ),
+            "Participant": name,
+        }
+    )
+    _, pairwise = compare_groups(
+        long_df, ["PAC"], group_col="State", document_name_col="Participant"
+    )
+    # Skip empty or too-small datasets
+    pairwise = pairwise[(pairwise["n1"] >= 2) & (pairwise["n2"] >= 2)]
+    # Avoid division by zero: d is undefined if either state is constant
+    constant = {
+        state: np.std(np.asarray(values, dtype=float), ddof=1) == 0
+        for state, values in pac_data.items()
+        if len(values) >= 2
+    }
+    results = [
+        {
+            "Comparison": f"{row.State_1} vs {row.State_2}",
+            "Cohen's d": (
+                np.nan
+                if constant[row.State_1] or constant[row.State_2]
+                else row.cohens_d
+            ),
+            # Legacy sign: positive when the first state is smaller
+            "Rank-Biserial r": -row.rank_biserial,
+            "Mann-Whitney p-value": row.mw_pvalue,
+        }
+        for row in pairwise.itertuples()
+    ]
 
     # Convert to DataFrame
     result_df = pd.DataFrame(results)
@@ -739,21 +732,21 @@ def compute_anova_entropy(entropy_df, entropy_type):
     if entropy_col not in entropy_df.columns:
         raise KeyError(f"Column '{entropy_col}' not found in the provided DataFrame.")
 
+    omnibus, _ = compare_groups(
+        entropy_df, [entropy_col], group_col="State", document_name_col="Participant"
+    )
+    omnibus = omnibus.set_index("Participant") if len(omnibus) else omnibus
+    sizes = entropy_df.groupby(["Participant", "State"])[entropy_col].count()
+
     results = []
 
     for participant in entropy_df["Participant"].unique():
-        subset = entropy_df[entropy_df["Participant"] == participant]
-
-        # Group entropy values by state
-        grouped = [
-            state_group[entropy_col].dropna().values
-            for _, state_group in subset.groupby("State")
-        ]
+        group_sizes = sizes.loc[participant]
 
         # Ensure at least two states have multiple values for ANOVA
-        if len(grouped) > 1 and all(len(g) > 1 for g in grouped):
-            F_stat, p_value = stats.f_oneway(*grouped)
-            p_value = f"{p_value:.2e}"  # Convert p-value to scientific notation
+        if len(group_sizes) > 1 and (group_sizes > 1).all():
+            F_stat = omnibus.loc[participant, "anova_f"]
+            p_value = f"{omnibus.loc[participant, 'anova_pvalue']:.2e}"
         else:
             F_stat, p_value = None, None  # Not enough valid data for ANOVA
 
@@ -785,6 +778,15 @@ def compute_pairwise_tests(entropy_df, entropy_type):
     if entropy_col not in entropy_df.columns:
         raise KeyError(f"Column '{entropy_col}' not found in the provided DataFrame.")
 
+    # Welch's t-tests of every pair come from compare_groups in one pass
+    _, pairwise = compare_groups(
+        entropy_df, [entropy_col], group_col="State", document_name_col="Participant"
+    )
+    welch = {
+        (row.Participant, row.State_1, row.State_2): row
+        for row in pairwise.itertuples()
+    }
+
     results = []
 
     for participant in entropy_df["Participant"].unique():
@@ -792,49 +794,31 @@ def compute_pairwise_tests(entropy_df, entropy_type):
 
         # Generate all unique state pairs for pairwise comparisons
         state_pairs = list(itertools.combinations(subset["State"].unique(), 2))
-        p_values = []
+        participant_results = []
 
         for state1, state2 in state_pairs:
-            data1 = subset[subset["State"] == state1][entropy_col].dropna()
-            data2 = subset[subset["State"] == state2][entropy_col].dropna()
-
+            row = welch.get((participant, state1, state2)) or welch.get(
+                (participant, state2, state1)
+            )
             # Only perform test if both groups have more than one value
-            if len(data1) > 1 and len(data2) > 1:
-                t_stat, p_value = stats.ttest_ind(data1, data2, equal_var=False)
-                p_values.append(p_value)
-                results.append(
-                    {
-                        "Participant": participant,
-                        "Comparison": f"{state1} vs {state2}",
-                        "p-value": p_value,  # Raw p-value stored for correction
-                    }
-                )
+            if row is not None and row.n1 > 1 and row.n2 > 1:
+                p_value = row.welch_pvalue
             else:
-                results.append(
-                    {
-                        "Participant": participant,
-                        "Comparison": f"{state1} vs {state2}",
-                        "p-value": None,  # Not enough data for valid test
-                        "Corrected p-value": None,
-                    }
-                )
+                p_value = None  # Not enough data for valid test
+            participant_results.append(
+                {
+                    "Participant": participant,
+                    "Comparison": f"{state1} vs {state2}",
+                    "p-value": p_value,
+                    "Corrected p-value": None,
+                }
+            )
 
         # Apply Bonferroni correction if there are valid p-values
-        valid_p_values = [
-            res["p-value"]
-            for res in results
-            if res["Participant"] == participant and res["p-value"] is not None
-        ]
-
-        if valid_p_values:
-            corrected_p_values = multipletests(valid_p_values, method="bonferroni")[1]
-
-            # Assign corrected p-values
-            corrected_index = 0
-            for res in results:
-                if res["Participant"] == participant and res["p-value"] is not None:
-                    res["Corrected p-value"] = corrected_p_values[corrected_index]
-                    corrected_index += 1
+        tested = [res for res in participant_results if res["p-value"] is not None]
+        for res in tested:
+            res["Corrected p-value"] = min(res["p-value"] * len(tested), 1.0)
+        results.extend(participant_results)
 
     # Convert to DataFrame
     results_df = pd.DataFrame(results)
@@ -12,6 +12,8 @@ from scipy.signal import butter, detrend, filtfilt, iirnotch, welch
 # import difflib
 from tensorpac import Pac
 
+from awear_neuroscience.signal_processing.bands import BandRegistry
+
 AWEAR_COLOR_SCHEME = [
     "rgb(97, 59, 209)",
     "rgb(215, 42, 19)",
@@ -581,6 +583,8 @@ def extract_features_psd(
       features:      DataFrame indexed by filename, epoch with all features
       avg_per_file:  mean of those features per filename
     """
+    if isinstance(frequency_ranges, BandRegistry):
+        frequency_ranges = frequency_ranges.ranges()
 
     def integrate_spectrum(
         x: np.ndarray, y: np.ndarray, lower: float, upper: float
@@ -893,6 +897,8 @@ def extract_features_ts(
     """
     Extract PAC and entropy features from a DataFrame of time series data.
     """
+    if isinstance(frequency_ranges, BandRegistry):
+        frequency_ranges = frequency_ranges.ranges()
     feat_dfs = []
     for fn, group in df.groupby("filename"):
         grp = group[
@@ -5,6 +5,8 @@ import plotly.graph_objects as go
 import plotly.subplots as sp
 from scipy import signal
 
+from awear_neuroscience.signal_processing.bands import EEG_BANDS, as_registry
+
 
 def generate_plotly_colors(num_colors):
     """
@@ -27,6 +29,15 @@ def generate_plotly_colors(num_colors):
     )
 
 
+def _ratio_registry(frequency_bands):
+    """Band registry averaging spectrogram bins within bands and across sub-bands."""
+    if frequency_bands is None:
+        frequency_bands = EEG_BANDS.bands
+    elif not isinstance(frequency_bands, dict):
+        frequency_bands = frequency_bands.bands
+    return as_registry(frequency_bands, integration="mean", composite="mean")
+
+
 def plot_eeg_waveform(df: pd.DataFrame, segment_id: str = "seg_0") -> None:
     """
     Plot EEG waveform for a specific segment using Plotly.
@@ -287,7 +298,7 @@ def plot_spectrogram_plotly(data_dict, fs, name=None, vmax=None):
 
 
 def plot_band_ratios_spectrogram_plotly(
-    data_dict, fs, selected_ratios, frequency_bands, name=None, y_axis_limits=None
+    data_dict, fs, selected_ratios, frequency_bands=None, name=None, y_axis_limits=None
 ):
     """
     Plots the time evolution of selected band ratios using Plotly.
@@ -296,7 +307,8 @@ def plot_band_ratios_spectrogram_plotly(
         data_dict (dict): EEG datasets keyed by condition name.
         fs (int): Sampling frequency in Hz.
         selected_ratios (list of tuples): Band ratio pairs like [("gamma2", "alpha"), ("beta", "delta")].
-        frequency_bands (dict): Mapping of band names to (f_min, f_max) tuples or composite sub-band lists.
+        frequency_bands (dict or BandRegistry, optional): Mapping of band names to (f_min, f_max) tuples
+            or composite sub-band lists. Defaults to the shared EEG_BANDS definitions.
         name (str, optional): Plot title.
         y_axis_limits (tuple, optional): Y-axis range for log scale.
 
@@ -305,6 +317,7 @@ def plot_band_ratios_spectrogram_plotly(
     """
     colors = generate_plotly_colors(len(data_dict))
     num_ratios = len(selected_ratios)
+    registry = _ratio_registry(frequency_bands)
 
     fig = sp.make_subplots(
         rows=num_ratios,
@@ -321,19 +334,10 @@ def plot_band_ratios_spectrogram_plotly(
                 data, fs, nperseg=int(fs), noverlap=int(fs * 0.5), window="hann"
             )
 
-            def get_band_power(band):
-                # Recursive resolution for composite bands
-                if isinstance(frequency_bands[band], list):
-                    return np.mean(
-                        [get_band_power(sub) for sub in frequency_bands[band]], axis=0
-                    )
-                else:
-                    f_min, f_max = frequency_bands[band]
-                    return spg[np.logical_and(f >= f_min, f <= f_max), :].mean(axis=0)
-
-            # Compute band powers
-            power_band1 = get_band_power(band1)
-            power_band2 = get_band_power(band2)
+            # Compute band powers (mean over bins, composites averaged)
+            plan = registry.compile_freqs(f)
+            power_band1 = plan.band_power(spg.T, band1)
+            power_band2 = plan.band_power(spg.T, band2)
             ratio = np.maximum(power_band1 / power_band2, 1e-6)
 
             # Plot
@@ -373,7 +377,7 @@ def plot_band_ratios_spectrogram_plotly(
 
 
 def plot_band_ratios_box_whisker_plotly(
-    data_dict, fs, selected_ratios, frequency_bands, name=None, y_axis_limits=None
+    data_dict, fs, selected_ratios, frequency_bands=None, name=None, y_axis_limits=None
 ):
     """
     Interactive box-and-whisker plot for comparing EEG band ratios using Plotly.
@@ -382,7 +386,8 @@ def plot_band_ratios_box_whisker_plotly(
         data_dict (dict): Dictionary of EEG data arrays.
         fs (int): Sampling frequency in Hz.
         selected_ratios (list): List of (high_band, low_band) tuples.
-        frequency_bands (dict): Mapping of band names to (f_min, f_max) or sub-band lists.
+        frequency_bands (dict or BandRegistry, optional): Mapping of band names to (f_min, f_max)
+            or sub-band lists. Defaults to the shared EEG_BANDS definitions.
         name (str): Optional title for the figure.
         y_axis_limits (tuple): Optional log-scale y-axis limits.
 
@@ -390,6 +395,7 @@ def plot_band_ratios_box_whisker_plotly(
         None
     """
     colors = generate_plotly_colors(len(data_dict))
+    registry = _ratio_registry(frequency_bands)
     fig = go.Figure()
 
     for ratio_idx, (band1, band2) in enumerate(selected_ratios):
@@ -399,21 +405,9 @@ def plot_band_ratios_box_whisker_plotly(
                 data, fs, nperseg=int(fs), noverlap=int(fs * 0.5), window="hann"
             )
 
-            def get_band_power(band):
-                if isinstance(frequency_bands[band], list):
-                    return np.mean(
-                        [
-                            get_band_power(sub_band)
-                            for sub_band in frequency_bands[band]
-                        ],
-                        axis=0,
-                    )
-                else:
-                    f_min, f_max = frequency_bands[band]
-                    return spg[np.logical_and(f >= f_min, f <= f_max)].mean(axis=0)
-
-            power_band1 = get_band_power(band1)
-            power_band2 = get_band_power(band2)
+            plan = registry.compile_freqs(f)
+            power_band1 = plan.band_power(spg.T, band1)
+            power_band2 = plan.band_power(spg.T, band2)
             ratio_values = np.maximum(power_band1 / power_band2, 1e-6)
 
             fig.add_trace(
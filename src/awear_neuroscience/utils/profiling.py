@@ -0,0 +1,374 @@
+"""
+Opt-in per-stage profiling of the EEG pipeline.
+
+Pipeline entry points are wrapped with :func:`profiled`; while no
+:class:`Profiler` is active the wrapper is a single attribute check. An
+active profiler records, per stage, the wall time, the records and segments
+handled (and so their rates) and the peak traced memory. It can also sample
+the call stack into a flame-graph file and serve its numbers over HTTP.
+
+Profiling is switched on without code changes:
+
+- ``awear-pipeline config.toml --profile report.json [--profile-stacks
+  stacks.txt] [--metrics-port 9100]``
+- ``AWEAR_PROFILE=report.json python scripts/arousal_eda.py``, with the
+  optional ``AWEAR_PROFILE_STACKS`` and ``AWEAR_METRICS_PORT`` variables;
+  the report is written when the interpreter exits.
+"""
+
+import atexit
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+_ACTIVE: Optional["Profiler"] = None
+
+
+@dataclass
+class StageStats:
+    """
+    Totals of one stage over all its calls.
+
+    Attributes
+    ----------
+    calls : int
+        Number of calls.
+    wall_s : float
+        Total wall time in seconds.
+    records : int
+        Input records (raw Firestore records or long-frame rows).
+    segments : int
+        Segments produced or consumed.
+    peak_bytes : int
+        Largest traced allocation above the stage's starting point, over all
+        calls (0 without memory tracing).
+    """
+
+    calls: int = 0
+    wall_s: float = 0.0
+    records: int = 0
+    segments: int = 0
+    peak_bytes: int = 0
+
+    def to_dict(self) -> Dict[str, float]:
+        out = asdict(self)
+        wall = self.wall_s or float("nan")
+        out["records_per_s"] = self.records / wall if self.records else 0.0
+        out["segments_per_s"] = self.segments / wall if self.segments else 0.0
+        out["peak_mib"] = self.peak_bytes / 2**20
+        return out
+
+
+class StackSampler:
+    """
+    Sampling profiler: records the call stack of one thread at a fixed
+    interval from a background thread.
+
+    Stacks are kept in the folded format (``outer;inner;leaf count``) read
+    by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        if names:
+            self.stacks[";".join(reversed(names))] += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """
+    Collect per-stage timing, throughput and memory while active.
+
+    Parameters
+    ----------
+    memory : bool, default True
+        Trace allocations with ``tracemalloc`` to report peak memory per
+        stage. Tracing slows allocation-heavy code down noticeably.
+    sample_interval : float, optional
+        Seconds between stack samples; None disables sampling.
+
+    Examples
+    --------
+    >>> with Profiler() as profiler:
+    ...     long_df = process_long_df(long_df, SAMPLING_RATE)
+    >>> profiler.report()["stages"]["process_long_df"]["segments_per_s"]
+    """
+
+    def __init__(self, memory: bool = True, sample_interval: Optional[float] = None):
+        self.memory = memory
+        self.sampler = StackSampler(sample_interval) if sample_interval else None
+        self.stages: Dict[str, StageStats] = {}
+        self._frames: List[List[int]] = []
+        self._started_tracing = False
+        self._previous: Optional["Profiler"] = None
+        self._start = None
+        self.wall_s = 0.0
+
+    def start(self) -> "Profiler":
+        """Make this the active profiler."""
+        global _ACTIVE
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self.sampler is not None:
+            self.sampler.start()
+        self._previous, _ACTIVE = _ACTIVE, self
+        self._start = time.perf_counter()
+        return self
+
+    def stop(self) -> None:
+        """Deactivate, restoring the previously active profiler if any."""
+        global _ACTIVE
+        self.wall_s += time.perf_counter() - self._start
+        _ACTIVE = self._previous
+        if self.sampler is not None:
+            self.sampler.stop()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self) -> "Profiler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the block as one call of stage `name`."""
+        stats = self.stages.setdefault(name, StageStats())
+        tracing = self.memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            # Enclosing stages keep the peak reached so far before the reset
+            for frame in self._frames:
+                frame[1] = max(frame[1], peak)
+            tracemalloc.reset_peak()
+            self._frames.append([current, current])
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.wall_s += time.perf_counter() - start
+            stats.calls += 1
+            if tracing:
+                base, peak = self._frames.pop()
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                stats.peak_bytes = max(stats.peak_bytes, peak - base)
+                for frame in self._frames:
+                    frame[1] = max(frame[1], peak)
+
+    def report(self) -> Dict[str, Any]:
+        """Structured per-stage report, stages in order of first call."""
+        wall_s = self.wall_s
+        if _ACTIVE is self:
+            wall_s += time.perf_counter() - self._start
+        return {
+            "wall_s": wall_s,
+            "memory_traced": self.memory,
+            "stages": {name: stats.to_dict() for name, stats in self.stages.items()},
+        }
+
+    def to_prometheus(self) -> str:
+        """The report in the Prometheus text exposition format."""
+        metrics = [
+            ("calls", "awear_stage_calls_total", "counter"),
+            ("wall_s", "awear_stage_wall_seconds_total", "counter"),
+            ("records", "awear_stage_records_total", "counter"),
+            ("segments", "awear_stage_segments_total", "counter"),
+            ("peak_bytes", "awear_stage_peak_bytes", "gauge"),
+        ]
+        lines = []
+        for field, metric, kind in metrics:
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, stats in self.stages.items():
+                lines.append(f'{metric}{{stage="{name}"}} {getattr(stats, field)}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str, stacks_path: Optional[str] = None) -> None:
+        """Write the report as JSON and, if sampled, the folded stacks."""
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        if stacks_path and self.sampler is not None:
+            self.sampler.dump(stacks_path)
+
+    def summary(self) -> str:
+        """Human-readable table of the report."""
+        lines = [
+            f"{'stage':<32} {'calls':>5} {'seconds':>9} {'records/s':>11} "
+            f"{'segments/s':>11} {'peak MiB':>9}"
+        ]
+        for name, s in self.report()["stages"].items():
+            lines.append(
+                f"{name:<32} {s['calls']:>5} {s['wall_s']:>9.3f} "
+                f"{s['records_per_s']:>11.0f} {s['segments_per_s']:>11.0f} "
+                f"{s['peak_mib']:>9.1f}"
+            )
+        return "\n".join(lines)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Serve ``/metrics`` (Prometheus text) and ``/report`` (JSON) from a
+        daemon thread. Call ``shutdown()`` on the returned server to stop.
+        """
+        profiler = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = profiler.to_prometheus().encode()
+                    content_type = "text/plain; version=0.0.4"
+                elif self.path == "/report":
+                    body = json.dumps(profiler.report()).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def active() -> Optional[Profiler]:
+    """The active profiler, or None when profiling is off."""
+    return _ACTIVE
+
+
+@contextmanager
+def stage(name: str):
+    """Time the block as stage `name` if a profiler is active, else do nothing."""
+    if _ACTIVE is None:
+        yield None
+        return
+    with _ACTIVE.stage(name) as stats:
+        yield stats
+
+
+def _count(value, segments: bool) -> int:
+    if isinstance(value, pd.DataFrame):
+        if segments and "segment" in value.columns:
+            return int(value["segment"].nunique())
+        return len(value)
+    return len(value) if hasattr(value, "__len__") else 0
+
+
+def profiled(
+    name: str, records: Optional[str] = None, segments: Optional[str] = None
+) -> Callable:
+    """
+    Decorate a pipeline function as profiling stage `name`.
+
+    Parameters
+    ----------
+    name : str
+        Stage name in the report.
+    records, segments : str, optional
+        Argument name (or ``"return"`` for the result) whose length gives
+        the records / segments handled per call. A DataFrame with a
+        'segment' column counts its distinct segments.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _ACTIVE
+            if profiler is None:
+                return func(*args, **kwargs)
+            with profiler.stage(name) as stats:
+                result = func(*args, **kwargs)
+            # Counted outside the timed block
+            bound = signature.bind_partial(*args, **kwargs).arguments
+            bound["return"] = result
+            if records is not None:
+                stats.records += _count(bound.get(records, ()), segments=False)
+            if segments is not None:
+                stats.segments += _count(bound.get(segments, ()), segments=True)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def enable_from_env() -> Optional[Profiler]:
+    """
+    Start a process-wide profiler if ``AWEAR_PROFILE`` is set.
+
+    ``AWEAR_PROFILE`` names the JSON report written at exit (``1`` prints
+    the summary only); ``AWEAR_PROFILE_STACKS`` adds a sampled stack dump
+    and ``AWEAR_METRICS_PORT`` serves the metrics endpoint.
+    """
+    target = os.getenv("AWEAR_PROFILE")
+    if not target or _ACTIVE is not None:
+        return None
+    stacks = os.getenv("AWEAR_PROFILE_STACKS")
+    profiler = Profiler(sample_interval=0.005 if stacks else None).start()
+    port = os.getenv("AWEAR_METRICS_PORT")
+    if port:
+        profiler.serve(int(port))
+
+    def finish():
+        print(profiler.summary(), file=sys.stderr)
+        if target != "1":
+            profiler.dump(target, stacks)
+        elif stacks and profiler.sampler is not None:
+            profiler.sampler.dump(stacks)
+
+    atexit.register(finish)
+    return profiler
+
+
+enable_from_env()
@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from awear_neuroscience.data_extraction.constants import SAMPLING_RATE, WAVEFORM_KEY
+
+
+@pytest.fixture
+def make_records():
+    """Factory of loader records: two users, ``n`` one-second segments each."""
+
+    def make(n=30, seed=0):
+        rng = np.random.default_rng(seed)
+        t = np.arange(SAMPLING_RATE) / SAMPLING_RATE
+        t0 = pd.Timestamp("2025-07-01T10:00:00Z")
+        records = []
+        for user in ("a@eeg.com", "b@eeg.com"):
+            for i in range(n):
+                wf = rng.normal(0, 4, SAMPLING_RATE) + 8 * np.sin(2 * np.pi * 10 * t)
+                if i % 7 == 3:
+                    wf[100] = 400  # artifact
+                records.append(
+                    {
+                        "timestamp": (t0 + pd.Timedelta(seconds=i)).strftime(
+                            "%Y-%m-%dT%H:%M:%S.%fZ"
+                        ),
+                        WAVEFORM_KEY: wf.tolist(),
+                        "focus_type": "calm" if i % 2 else "stressed",
+                        "document_name": user,
+                        "session_id": i // 15,
+                    }
+                )
+        return records
+
+    return make
+
+
+@pytest.fixture
+def write_config(tmp_path):
+    """Factory writing a pipeline config under ``tmp_path``; returns its path."""
+
+    def write(**overrides):
+        config = {
+            "users": ["a@eeg.com", "b@eeg.com"],
+            "start": "2025-07-01",
+            "end": "2025-07-02",
+            "ema_alpha": 0.3,
+            "columns_to_normalize": ["alpha_fil"],
+            "store": str(tmp_path / "store"),
+            **overrides,
+        }
+        path = tmp_path / "config.json"
+        path.write_text(json.dumps(config))
+        return str(path)
+
+    return write
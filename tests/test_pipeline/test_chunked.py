@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from awear_neuroscience.data_extraction.constants import SAMPLING_RATE
+from awear_neuroscience.data_extraction.firestore_loader import process_eeg_records
+from awear_neuroscience.pipeline import main
+from awear_neuroscience.pipeline.chunked import run_chunked_pipeline, time_chunks
+from awear_neuroscience.pipeline.fused import run_segment_pipeline
+from awear_neuroscience.pipeline.store import FeatureStore
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def spread_segments(make_records):
+    """Factory of loader segments spread over several days."""
+
+    def spread(hours=3):
+        segments = process_eeg_records(make_records()).drop(columns="utc_ts")
+        t0 = pd.Timestamp("2025-07-01T10:00:00Z")
+        step = segments.groupby("document_name").cumcount().to_numpy()
+        segments["timestamp"] = t0 + pd.to_timedelta(step * hours, unit="h")
+        # As written by the extract stage
+        segments.insert(0, "segment", [f"seg_{i}" for i in range(len(segments))])
+        return segments
+
+    return spread
+
+
+def test_time_chunks_align_to_frequency():
+    chunks = time_chunks("2025-07-01T10:00", "2025-07-03T06:00", "1D")
+
+    assert [(str(lo), str(hi)) for lo, hi in chunks] == [
+        ("2025-07-01 10:00:00+00:00", "2025-07-02 00:00:00+00:00"),
+        ("2025-07-02 00:00:00+00:00", "2025-07-03 00:00:00+00:00"),
+        ("2025-07-03 00:00:00+00:00", "2025-07-03 06:00:00+00:00"),
+    ]
+
+
+def test_chunked_pipeline_matches_in_memory_run(tmp_path, spread_segments):
+    segments = spread_segments()
+    store = FeatureStore(tmp_path)
+    store.append(segments, table="segments")
+
+    written = run_chunked_pipeline(
+        store,
+        SAMPLING_RATE,
+        0.3,
+        "2025-07-01",
+        "2025-07-06",
+        freq="12h",
+        columns_to_normalize=["alpha_fil"],
+    )
+
+    expected, _ = run_segment_pipeline(segments, SAMPLING_RATE, 0.3, ["alpha_fil"])
+    expected = expected.sort_values(["document_name", "timestamp"], kind="stable")
+    features = store.read("features")
+    assert written == {
+        "segment_features": len(expected),
+        "segment_flags": len(segments),
+        "features": len(expected),
+    }
+    columns = ["alpha_fil", "focus_index_fil", "alpha_fil_norm", "hours_since_midnight"]
+    for col in columns:
+        np.testing.assert_allclose(features[col], expected[col], rtol=1e-9)
+    assert set(expected.columns) <= set(features.columns)
+    assert store.read("segment_flags")["is_artifact"].sum() == 8
+    assert "_smoothed_staging" not in store.tables()
+
+
+def test_cli_chunk_mode_matches_in_memory_stages(
+    tmp_path, spread_segments, write_config
+):
+    segments = spread_segments(hours=1)
+    FeatureStore(tmp_path / "store").append(segments, table="segments")
+    config = write_config(end="2025-07-04")
+    argv = [config, "--stages", "preprocess", "features", "--workers", "1"]
+
+    assert main(argv) == 0
+    expected = FeatureStore(tmp_path / "store").read("features")
+    assert main([*argv, "--force", "--chunk", "6h"]) == 0
+    features = FeatureStore(tmp_path / "store").read("features")
+
+    pd.testing.assert_frame_equal(
+        features[expected.columns], expected, check_exact=False, rtol=1e-9
+    )
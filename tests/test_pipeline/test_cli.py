@@ -0,0 +1,148 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from awear_neuroscience.data_extraction.constants import SAMPLING_RATE
+from awear_neuroscience.data_extraction.firestore_loader import process_eeg_records
+from awear_neuroscience.pipeline import main
+from awear_neuroscience.pipeline.cli import PipelineConfig
+from awear_neuroscience.pipeline.fused import run_segment_pipeline
+from awear_neuroscience.pipeline.store import FeatureStore
+
+pytest.importorskip("pyarrow")
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    import tomli as tomllib
+
+
+def test_cli_runs_stages_and_caches(tmp_path, capsys, make_records, write_config):
+    segments = process_eeg_records(make_records())
+    segments.insert(0, "segment", [f"seg_{i}" for i in range(len(segments))])
+    store = FeatureStore(tmp_path / "store")
+    store.append(segments, table="segments")
+    config = write_config()
+
+    argv = [config, "--stages", "preprocess", "features", "--workers", "1"]
+    assert main(argv) == 0
+    features = store.read("features")
+    expected, _ = run_segment_pipeline(
+        segments, SAMPLING_RATE, 0.3, ["alpha_fil"], batch_size=16
+    )
+    expected = expected.sort_values(["document_name", "timestamp"], kind="stable")
+    np.testing.assert_allclose(features["alpha_fil"], expected["alpha_fil"])
+    np.testing.assert_allclose(features["alpha_fil_norm"], expected["alpha_fil_norm"])
+    assert store.read("segment_flags")["is_artifact"].sum() == 8
+
+    capsys.readouterr()
+    assert main(argv) == 0
+    assert capsys.readouterr().out.count("cached") == 2
+
+
+def test_cli_reports_missing_inputs_and_bad_config(write_config):
+    assert main([write_config(), "--stages", "features"]) == 1
+    with pytest.raises(ValueError):
+        PipelineConfig.from_file(write_config(ema=0.2))
+
+
+def test_cli_reruns_only_stages_after_changed_parameter(
+    tmp_path, capsys, make_records, write_config
+):
+    segments = process_eeg_records(make_records(n=10))
+    FeatureStore(tmp_path / "store").append(segments, table="segments")
+    argv = ["--stages", "preprocess", "features", "--workers", "1"]
+
+    main([write_config(), *argv])
+    capsys.readouterr()
+    main([write_config(ema_alpha=0.5), *argv])
+    out = capsys.readouterr().out
+    assert "[preprocess] cached" in out
+    assert "[features] wrote" in out
+
+    main([write_config(ema_alpha=0.5, amplitude_threshold=25), *argv])
+    out = capsys.readouterr().out
+    assert "[preprocess] wrote" in out and "[features] wrote" in out
+
+
+def test_cli_features_keep_local_time_of_day(tmp_path, make_records, write_config):
+    records = make_records(n=10)
+    for record in records:
+        # Recorded at UTC+02:00; the store keeps timestamps in UTC
+        record["timestamp"] = record["timestamp"].replace("Z", "+02:00")
+    segments = process_eeg_records(records)
+    FeatureStore(tmp_path / "store").append(segments, table="segments")
+    argv = ["--stages", "preprocess", "features", "--workers", "1"]
+
+    assert main([write_config(), *argv]) == 0
+    features = FeatureStore(tmp_path / "store").read("features")
+    expected, _ = run_segment_pipeline(segments, SAMPLING_RATE, 0.3, ["alpha_fil"])
+    expected = expected.sort_values(["document_name", "timestamp"], kind="stable")
+
+    for col in ("hours_since_midnight", "minutes_since_midnight"):
+        np.testing.assert_allclose(features[col], expected[col])
+    assert features["hours_since_midnight"].between(10, 11).all()
+    assert (features["utc_offset_minutes"] == 120).all()
+
+
+def test_cli_profile_writes_stage_report(tmp_path, make_records, write_config):
+    segments = process_eeg_records(make_records(n=10))
+    FeatureStore(tmp_path / "store").append(segments, table="segments")
+    report_path = tmp_path / "profile.json"
+    argv = ["--stages", "preprocess", "features", "--workers", "1"]
+
+    assert main([write_config(), *argv, "--profile", str(report_path)]) == 0
+    stages = json.loads(report_path.read_text())["stages"]
+    assert stages["stage:preprocess"]["segments"] == 18
+    assert stages["process_features"]["calls"] == 1
+    assert stages["stage:features"]["peak_bytes"] > 0
+
+
+def test_cli_extract_stage_stores_segments(
+    tmp_path, monkeypatch, make_records, write_config
+):
+    from google.cloud import firestore
+
+    from awear_neuroscience.data_extraction import firestore_loader
+
+    records = make_records(n=4)
+    calls = []
+
+    def fake_selreport(**kwargs):
+        calls.append(kwargs)
+        return [r for r in records if r["document_name"] == kwargs["document_name"]]
+
+    monkeypatch.setattr(firestore, "Client", lambda: None)
+    monkeypatch.setattr(firestore_loader, "get_selreport_data", fake_selreport)
+    monkeypatch.setenv("COLLECTION_NAME", "eeg")
+
+    assert main([write_config(), "--stages", "extract"]) == 0
+    assert [c["document_name"] for c in calls] == ["a@eeg.com", "b@eeg.com"]
+    assert calls[0]["collection_name"] == "eeg"
+    assert calls[0]["sessions_of_interest"] == ["calm", "stressed"]
+    start, end = calls[0]["time_ranges"][0]
+    assert (start.isoformat(), end.isoformat()) == (
+        "2025-07-01T00:00:00",
+        "2025-07-02T00:00:00",
+    )
+
+    segments = FeatureStore(tmp_path / "store").read("segments")
+    assert len(segments) == 8
+    assert segments["segment"].str.startswith("seg_").all()
+
+
+@pytest.mark.parametrize("tomllib_available", [True, False])
+def test_config_loads_example_toml(monkeypatch, tomllib_available):
+    if not tomllib_available:
+        # Python 3.10 has no tomllib; the tomli backport provides the same API
+        monkeypatch.setitem(sys.modules, "tomllib", None)
+        monkeypatch.setitem(sys.modules, "tomli", tomllib)
+    path = os.path.join(
+        os.path.dirname(__file__), "..", "..", "scripts", "pipeline_config.example.toml"
+    )
+    config = PipelineConfig.from_file(path)
+    assert config.ema_alpha == 0.125
+    assert config.columns_to_normalize == ["gamma_fil", "gamma1_fil", "gamma2_fil"]
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from awear_neuroscience.data_extraction.constants import SAMPLING_RATE
+from awear_neuroscience.data_extraction.firestore_loader import process_eeg_records
+from awear_neuroscience.pipeline import fused, preprocess
+from awear_neuroscience.pipeline.fused import run_segment_pipeline
+from awear_neuroscience.pipeline.preprocess import (
+    extract_features_from_long_df,
+    process_features,
+    process_long_df,
+)
+from awear_neuroscience.signal_processing.filters import preprocess_segment
+
+
+@pytest.mark.parametrize("nan_samples", [False, True])
+def test_fused_pipeline_matches_staged_pipeline(make_records, monkeypatch, nan_samples):
+    records = make_records()
+    if nan_samples:
+        # Filtered values turn NaN where the raw signal is high, so both
+        # pipelines see the same NaN samples whatever their batching
+        def with_nans(x, *args, **kwargs):
+            out = preprocess_segment(x, *args, **kwargs)
+            out[np.asarray(x) > 15] = np.nan
+            return out
+
+        for module in (preprocess, fused):
+            monkeypatch.setattr(module, "preprocess_segment", with_nans)
+    long_df = process_long_df(
+        process_eeg_records(records, return_long=True), SAMPLING_RATE
+    )
+    staged = extract_features_from_long_df(long_df, SAMPLING_RATE)
+    # Staged features come out in segment-name order; smooth them in time order
+    staged["n"] = staged["segment"].str[4:].astype(int)
+    staged = staged.sort_values("n").drop(columns="n").reset_index(drop=True)
+    expected = process_features(staged, 0.3, ["alpha_fil"])
+
+    features, flags = run_segment_pipeline(
+        process_eeg_records(records), SAMPLING_RATE, 0.3, ["alpha_fil"], batch_size=7
+    )
+
+    pd.testing.assert_frame_equal(features, expected, check_exact=False, rtol=1e-9)
+    seg_flags = long_df.drop_duplicates("segment").set_index("segment")
+    assert (
+        flags["is_artifact"].tolist()
+        == seg_flags.loc[flags["segment"], "is_artifact"].tolist()
+    )
+    assert flags["is_artifact"].sum() == 8
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from awear_neuroscience.pipeline.incremental import FeatureState
+from awear_neuroscience.pipeline.preprocess import process_features
+from awear_neuroscience.signal_processing.features import bands
+
+
+def make_features_df(n=90, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.random((n, len(bands))), columns=list(bands))
+    df["sample_entropy"] = rng.random(n)
+    df["document_name"] = rng.choice(["a@eeg.com", "b@eeg.com"], n)
+    df["timestamp"] = pd.date_range("2025-07-01", periods=n, freq="s").astype(str)
+    return df
+
+
+def test_update_matches_full_recompute(tmp_path):
+    df = make_features_df()
+    # Missing values across a batch boundary exercise the NaN-aware path
+    df.loc[28:33, "sample_entropy"] = np.nan
+    alpha, columns = 0.2, ["gamma_fil", "alpha_fil"]
+    full = process_features(df, alpha, columns)
+
+    state = FeatureState(alpha, columns)
+    first = state.update(df.iloc[:30])
+    state.save(tmp_path / "state.json")
+    state = FeatureState.load(tmp_path / "state.json")
+    second = state.update(df.iloc[30:60])
+    last = state.update(df.iloc[60:])
+
+    incremental = pd.concat([first, second, last])
+    fil_cols = [c for c in full.columns if c.endswith("_fil")]
+    pd.testing.assert_frame_equal(
+        incremental[fil_cols], full[fil_cols], check_exact=False, rtol=1e-12
+    )
+    # The newest rows are normalized against every row seen so far
+    norm_cols = [f"{c}_norm" for c in columns]
+    pd.testing.assert_frame_equal(
+        last[norm_cols], full.loc[last.index, norm_cols], check_exact=False, rtol=1e-10
+    )
+
+
+def test_state_rejects_changed_columns():
+    df = make_features_df()
+    state = FeatureState(0.5)
+    state.update(df.iloc[:10])
+    with pytest.raises(ValueError):
+        state.update(df.iloc[10:].drop(columns="sample_entropy"))
@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from awear_neuroscience.pipeline.memo import (
+    CachedResult,
+    StageCache,
+    code_fingerprint,
+    fingerprint,
+)
+
+
+def test_fingerprint_is_content_based():
+    df = pd.DataFrame({"a": [1.0, 2.0], "w": [np.zeros(3), np.ones(3)]})
+    assert fingerprint(df) == fingerprint(df.copy())
+    changed = df.copy()
+    changed.at[1, "w"] = np.full(3, 2.0)
+    assert fingerprint(df) != fingerprint(changed)
+    assert fingerprint({"x": 1, "y": [1, 2]}) == fingerprint({"y": [1, 2], "x": 1})
+    assert fingerprint(CachedResult("k", df)) == fingerprint(CachedResult("k", None))
+
+
+def test_late_parameter_change_reruns_only_late_stages(tmp_path):
+    calls = []
+
+    def scale(df, factor):
+        calls.append("scale")
+        return df * factor
+
+    def shift(df, offset):
+        calls.append("shift")
+        return df + offset
+
+    def run(offset):
+        cache = StageCache(tmp_path)
+        df = pd.DataFrame({"a": np.arange(5.0)})
+        scaled = cache.run("scale", scale, df, factor=2)
+        return scaled, cache.run("shift", shift, scaled, offset=offset)
+
+    run(1)
+    scaled, shifted = run(1)
+    assert scaled.hit and shifted.hit
+    scaled, shifted = run(3)
+    assert scaled.hit and not shifted.hit
+    assert calls == ["scale", "shift", "shift"]
+    assert shifted.value["a"].tolist() == [3.0, 5.0, 7.0, 9.0, 11.0]
+
+
+def define(source):
+    namespace = {"__name__": "stages"}
+    exec(source, namespace)
+    return namespace["stage"]
+
+
+def test_edited_stage_function_misses_the_cache(tmp_path):
+    cache = StageCache(tmp_path)
+    old = define("def stage(x):\n    return x + 1\n")
+    new = define("def stage(x):\n    return x + 2\n")
+    assert code_fingerprint(old) == code_fingerprint(
+        define("def stage(x):\n    return x + 1\n")
+    )
+
+    assert cache.run("stage", old, 1).value == 2
+    assert cache.run("stage", old, 1).hit
+    result = cache.run("stage", new, 1)
+    assert not result.hit and result.value == 3
+    # Changes in called code need an explicit version
+    assert not cache.run("stage", old, 1, cache_version=2).hit
+    assert code_fingerprint(np.add) == ""
+
+
+def test_lru_eviction_bounds_size(tmp_path):
+    cache = StageCache(tmp_path, max_bytes=10**9)
+    keys = [cache.run("arr", np.ones, 20_000 + i).key for i in range(3)]
+    entry_size = cache.size() // 3
+    # Touch the oldest entry so the second one becomes least recently used
+    for i, key in enumerate(keys):
+        os.utime(os.path.join(tmp_path, f"{key}.pkl"), (i, i))
+    assert cache.run("arr", np.ones, 20_000).hit
+
+    cache.max_bytes = int(2.5 * entry_size)
+    cache.evict()
+    assert keys[1] not in cache
+    assert keys[0] in cache and keys[2] in cache
+    assert cache.size() <= cache.max_bytes
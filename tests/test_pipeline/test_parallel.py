@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from awear_neuroscience.data_extraction.constants import SAMPLING_RATE
+from awear_neuroscience.data_extraction.firestore_loader import process_eeg_records
+from awear_neuroscience.pipeline.fused import (
+    extract_segment_features,
+    run_segment_pipeline,
+)
+from awear_neuroscience.pipeline.parallel import (
+    extract_segment_features_parallel,
+    run_parallel_pipeline,
+    shard_segments,
+)
+
+
+def test_shards_follow_user_and_session(make_records):
+    segments_df = process_eeg_records(make_records(n=20))
+    shards = shard_segments(segments_df)
+
+    assert len(shards) == 4
+    for rows in shards:
+        keys = segments_df.iloc[rows][["document_name", "session_id"]]
+        assert len(keys.drop_duplicates()) == 1
+        assert np.all(np.diff(rows) > 0)
+    assert sorted(np.concatenate(shards)) == list(range(len(segments_df)))
+
+
+def test_parallel_matches_single_process(make_records):
+    # Shuffle users so shards are interleaved in the input
+    segments_df = process_eeg_records(make_records())
+    segments_df = segments_df.iloc[np.argsort(np.arange(60) % 30, kind="stable")]
+    expected, expected_flags = run_segment_pipeline(
+        segments_df, SAMPLING_RATE, 0.3, ["alpha_fil"]
+    )
+
+    features, flags = run_parallel_pipeline(
+        segments_df, SAMPLING_RATE, 0.3, ["alpha_fil"], n_workers=2, batch_size=8
+    )
+
+    pd.testing.assert_frame_equal(features, expected, check_exact=False, rtol=1e-9)
+    pd.testing.assert_frame_equal(flags, expected_flags)
+
+
+def test_shared_buffer_holds_mixed_waveform_dtypes(make_records):
+    segments_df = process_eeg_records(make_records(n=15))
+    waveforms = [np.asarray(w, dtype=np.float64) for w in segments_df["waveform"]]
+    # A float32 first segment must not round the float64 ones
+    waveforms[0] = waveforms[0].astype(np.float32)
+    segments_df["waveform"] = waveforms
+    expected, _ = extract_segment_features(
+        segments_df, SAMPLING_RATE, precision="float64"
+    )
+
+    features, _ = extract_segment_features_parallel(
+        segments_df, SAMPLING_RATE, n_workers=2, precision="float64"
+    )
+
+    pd.testing.assert_frame_equal(features, expected, check_exact=False, rtol=1e-9)
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from awear_neuroscience.pipeline.preprocess import (
+    extract_sliding_window_features,
+    process_long_df,
+)
+from awear_neuroscience.signal_processing.filters import preprocess_segment
+
+fs = 256
+
+
+def make_long_df(n_segments=12, seed=0):
+    rng = np.random.default_rng(seed)
+    t0 = pd.Timestamp("2025-07-01T10:00:00Z")
+    # One second missing after segment 5 splits the recording into two runs
+    times = [t0 + pd.Timedelta(seconds=i + (i > 5) * 2) for i in range(n_segments)]
+    return pd.DataFrame(
+        {
+            "segment": np.repeat([f"{t.isoformat()}_a" for t in times], fs),
+            "time_UTC": np.repeat(times, fs),
+            "focus_type": "calm",
+            "document_name": "a@eeg.com",
+            "session_id": 0,
+            "filtered_value": rng.normal(size=n_segments * fs),
+            "is_artifact": np.repeat(np.arange(n_segments) == 9, fs),
+        }
+    )
+
+
+def test_sliding_windows_respect_runs_and_artifacts():
+    long_df = make_long_df()
+    out = extract_sliding_window_features(
+        long_df, fs, window_s=2.0, hop_s=0.5, drop_artifacts=False
+    )
+
+    # Two 6-second runs give 9 windows each; none straddles the gap
+    assert len(out) == 18
+    assert out["timestamp"].diff().dt.total_seconds().iloc[1:9].eq(0.5).all()
+    assert out["timestamp"].iloc[9] == pd.Timestamp("2025-07-01T10:00:08Z")
+    # Segment 9 is the fourth segment of the second run: windows starting at
+    # 1.5 s up to 3.5 s into that run overlap it
+    assert out["is_artifact"].sum() == 5
+
+    kept = extract_sliding_window_features(long_df, fs, window_s=2.0, hop_s=0.5)
+    assert len(kept) == 13 and not kept["is_artifact"].any()
+
+
+def test_process_long_df_matches_per_segment_reference():
+    long_df = make_long_df().drop(columns="is_artifact")
+    long_df["waveform_value"] = long_df.pop("filtered_value") * 10
+    # Interleave two segments and add a row without a segment
+    long_df = pd.concat(
+        [long_df.iloc[:100], long_df.iloc[fs : fs + 50], long_df.iloc[100:fs]]
+        + [long_df.iloc[fs + 50 :], long_df.iloc[:1].assign(segment=None)],
+        ignore_index=True,
+    )
+    out = process_long_df(long_df, fs, amplitude_threshold=30)
+
+    assert len(out) == len(long_df) - 1
+    assert out["segment"].equals(long_df["segment"].iloc[:-1])
+    for seg, rows in long_df.iloc[:-1].groupby("segment").indices.items():
+        expected = preprocess_segment(long_df["waveform_value"].to_numpy()[rows], fs)
+        np.testing.assert_allclose(out["filtered_value"].to_numpy()[rows], expected)
+        max_abs = np.abs(expected).max()
+        np.testing.assert_allclose(
+            out["max_abs_filtered_value"].to_numpy()[rows], max_abs
+        )
+        assert (out["is_artifact"].to_numpy()[rows] == (max_abs > 30)).all()
+
+
+def test_process_long_df_drops_nan_rows(monkeypatch):
+    long_df = make_long_df(4).drop(columns="is_artifact")
+    long_df["waveform_value"] = long_df.pop("filtered_value") * 10
+
+    def nan_second_segment(x, fs, dtype=None):
+        out = preprocess_segment(x, fs, dtype=dtype)
+        out[1] = np.nan
+        return out
+
+    monkeypatch.setattr(
+        "awear_neuroscience.pipeline.preprocess.preprocess_segment",
+        nan_second_segment,
+    )
+    out = process_long_df(long_df, fs, amplitude_threshold=30)
+
+    assert len(out) == 3 * fs
+    assert not out["filtered_value"].isna().any()
+    expected = long_df.drop(index=range(fs, 2 * fs)).reset_index(drop=True)
+    assert out["segment"].equals(expected["segment"])
+    assert (out["max_abs_filtered_value"] >= out["abs_filtered"]).all()
@@ -0,0 +1,128 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from awear_neuroscience.data_extraction.constants import SAMPLING_RATE
+from awear_neuroscience.data_extraction.firestore_loader import process_eeg_records
+from awear_neuroscience.pipeline.fused import run_segment_pipeline
+from awear_neuroscience.pipeline.realtime import (
+    STAGES,
+    LatencyHistogram,
+    ScoringEngine,
+    SegmentScorer,
+)
+
+
+def test_stream_matches_batch_pipeline(make_records):
+    segments_df = process_eeg_records(make_records())
+    # float64 throughout: float32 storage may round batched and single-segment
+    # spectra to neighbouring values
+    expected, flags = run_segment_pipeline(
+        segments_df, SAMPLING_RATE, 0.3, precision="float64"
+    )
+
+    async def stream():
+        scores = []
+
+        async def collect(score):
+            scores.append(score)
+
+        async with ScoringEngine(
+            SAMPLING_RATE, 0.3, shed=None, on_result=collect, precision="float64"
+        ) as engine:
+            for row in segments_df.itertuples():
+                await engine.submit(row.document_name, row.waveform, row.timestamp)
+        return scores, engine.stats()
+
+    scores, stats = asyncio.run(stream())
+
+    assert len(scores) == len(segments_df)
+    is_artifact = {(s.user, s.timestamp): s.is_artifact for s in scores}
+    assert [
+        is_artifact[(u, t)] for u, t in zip(flags["document_name"], flags["timestamp"])
+    ] == flags["is_artifact"].tolist()
+
+    clean = pd.DataFrame(
+        [
+            {"document_name": s.user, "timestamp": s.timestamp, **s.values}
+            for s in scores
+            if not s.is_artifact
+        ]
+    )
+    merged = expected.merge(clean, on=["document_name", "timestamp"])
+    assert len(merged) == len(expected)
+    for col in ("alpha_fil", "theta_beta_ratio_fil", "focus_index_fil_db"):
+        np.testing.assert_allclose(merged[f"{col}_x"], merged[f"{col}_y"], rtol=1e-9)
+
+    assert set(stats["stages"]) == set(STAGES)
+    assert stats["stages"]["filter"]["count"] == len(segments_df)
+    assert stats["stages"]["ema"]["count"] == len(expected)
+    assert stats["dropped"] == {"a@eeg.com": 0, "b@eeg.com": 0}
+
+
+def test_full_queue_sheds_oldest_segments():
+    wf = np.random.default_rng(0).normal(0, 4, SAMPLING_RATE)
+
+    async def burst():
+        engine = ScoringEngine(SAMPLING_RATE, 0.3, max_pending=4, shed="oldest")
+        # No awaits yield to the worker, so the whole burst hits the queue
+        accepted = [await engine.submit("a@eeg.com", wf, i) for i in range(10)]
+        await engine.stop()
+        results = []
+        while not engine.results.empty():
+            results.append(engine.results.get_nowait().timestamp)
+        return accepted, results, engine.stats()
+
+    accepted, results, stats = asyncio.run(burst())
+
+    assert all(accepted)
+    assert results == [6, 7, 8, 9]
+    assert stats["dropped"]["a@eeg.com"] == 6
+    assert stats["processed"]["a@eeg.com"] == 4
+
+
+def test_failed_segment_does_not_stop_the_worker():
+    wf = np.random.default_rng(0).normal(0, 4, SAMPLING_RATE)
+
+    async def run():
+        engine = ScoringEngine(SAMPLING_RATE, 0.3, shed=None)
+        # Too short to filter: the band-pass padding needs 27 samples
+        await engine.submit("a@eeg.com", wf[:10], 0)
+        await engine.submit("a@eeg.com", wf, 1)
+        await asyncio.wait_for(engine.drain(), timeout=10)
+        results = [engine.results.get_nowait() for _ in range(2)]
+        await engine.stop()
+        return results, engine.stats()
+
+    (bad, good), stats = asyncio.run(run())
+
+    assert bad.is_artifact and bad.error and "padlen" in bad.error
+    assert not bad.values
+    assert good.error is None and not good.is_artifact and good.values
+    assert stats["errors"]["a@eeg.com"] == 1
+    assert stats["processed"]["a@eeg.com"] == 1
+
+
+def test_ema_state_stays_float64_under_single_precision():
+    wf = np.random.default_rng(0).normal(0, 4, SAMPLING_RATE)
+    scorer = SegmentScorer(SAMPLING_RATE, 0.3, precision="float32-compute")
+    scorer.score("a@eeg.com", wf)
+    score = scorer.score("a@eeg.com", wf)
+
+    last = scorer.users["a@eeg.com"]["last"]
+    assert last.dtype == np.float64
+    alpha = last[scorer.state["columns"].index("alpha")]
+    assert np.isclose(score.values["alpha_fil"], alpha, rtol=1e-6)
+
+
+def test_latency_histogram_quantiles():
+    hist = LatencyHistogram(bounds_ms=[1, 2, 4, 8])
+    for ms in [0.5] * 50 + [3] * 45 + [20] * 5:
+        hist.record(ms / 1e3)
+
+    assert hist.count == 100
+    assert hist.quantile(0.5) == 1
+    assert hist.quantile(0.9) == 4
+    assert hist.quantile(0.99) == 20
+    assert abs(hist.mean_ms - (25 + 135 + 100) / 100) < 1e-12
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from awear_neuroscience.pipeline.store import FeatureStore  # noqa: E402
+
+
+def make_features_df(n=48, start="2025-07-01T22:00:00Z", seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "alpha": rng.random(n),
+            "gamma": rng.random(n),
+            "focus_type": np.where(np.arange(n) % 2, "calm", "stressed"),
+            "timestamp": pd.date_range(start, periods=n, freq="5min").strftime(
+                "%Y-%m-%dT%H:%M:%S.%fZ"
+            ),
+            "document_name": np.where(np.arange(n) % 3, "a@eeg.com", "b@eeg.com"),
+            "session_id": 0,
+        }
+    )
+
+
+def test_append_partitions_and_roundtrip(tmp_path):
+    store = FeatureStore(tmp_path)
+    df = make_features_df()
+    assert store.append(df.iloc[:20]) == 20
+    assert store.append(df.iloc[20:]) == 28
+
+    user_dirs = sorted(p.name for p in (tmp_path / "features").iterdir())
+    assert user_dirs == ["document_name=a%40eeg.com", "document_name=b%40eeg.com"]
+    days = sorted(p.name for p in (tmp_path / "features" / user_dirs[0]).iterdir())
+    assert days == ["date=2025-07-01", "date=2025-07-02"]
+
+    out = store.read()
+    expected = df.sort_values(["document_name", "timestamp"], kind="stable")
+    np.testing.assert_allclose(out["alpha"], expected["alpha"])
+    expected_ts = pd.to_datetime(expected["timestamp"], utc=True).to_numpy()
+    assert (out["timestamp"].to_numpy() == expected_ts).all()
+    assert store.tables() == ["features"]
+
+
+def test_read_filters_and_projection(tmp_path):
+    store = FeatureStore(tmp_path)
+    df = make_features_df()
+    store.append(df)
+
+    out = store.read(
+        columns=["alpha", "timestamp", "document_name"],
+        users="a@eeg.com",
+        start="2025-07-01T23:00:00",
+        end=pd.Timestamp("2025-07-02T01:00:00Z"),
+        focus_types=["calm"],
+    )
+    ts = pd.to_datetime(df["timestamp"], utc=True)
+    mask = (
+        (df["document_name"] == "a@eeg.com")
+        & (ts >= pd.Timestamp("2025-07-01T23:00:00Z"))
+        & (ts < pd.Timestamp("2025-07-02T01:00:00Z"))
+        & (df["focus_type"] == "calm")
+    )
+    assert list(out.columns) == ["alpha", "timestamp", "document_name"]
+    np.testing.assert_allclose(out["alpha"], df.loc[mask, "alpha"])
+
+
+def test_append_rejects_changed_columns(tmp_path):
+    store = FeatureStore(tmp_path)
+    df = make_features_df()
+    store.append(df.iloc[:10])
+    with pytest.raises(ValueError):
+        store.append(df.iloc[10:].drop(columns="gamma"))
+    assert len(store.read(table="missing")) == 0
+
+
+def test_exists_needs_data_files(tmp_path):
+    store = FeatureStore(tmp_path)
+    assert not store.exists("features")
+    # Metadata alone, or an empty partition directory, holds no rows
+    store.set_meta("features", {"key": "abc"})
+    (tmp_path / "features" / "document_name=a%40eeg.com").mkdir()
+    assert not store.exists("features")
+    assert len(store.read()) == 0
+
+    assert store.append(make_features_df(n=4)) == 4
+    assert store.exists("features")
+    assert store.get_meta("features") == {"key": "abc"}
+
+
+def test_append_keeps_source_utc_offsets(tmp_path):
+    store = FeatureStore(tmp_path)
+    df = make_features_df(n=2).assign(document_name="a@eeg.com")
+    # Either side of a daylight saving change
+    df["timestamp"] = ["2025-03-30T00:30:00.000+01:00", "2025-03-30T03:30:00.000+02:00"]
+    store.append(df)
+
+    out = store.read()
+    assert out["utc_offset_minutes"].tolist() == [60, 120]
+    assert [str(ts) for ts in out["timestamp"]] == [
+        "2025-03-29 23:30:00+00:00",
+        "2025-03-30 01:30:00+00:00",
+    ]
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from awear_neuroscience.signal_processing.bands import (
+    EEG_BANDS,
+    BandRegistry,
+    as_registry,
+)
+from awear_neuroscience.signal_processing.features import bandpower, bands, compute_psd
+
+fs = 256
+
+
+def test_plan_matches_trapezoid_bandpower():
+    """Compiled weights reproduce the per-band np.trapz integration."""
+    signal = np.random.default_rng(0).normal(size=fs)
+    freqs, psd = compute_psd(signal, fs)
+    plan = EEG_BANDS.compile(fs, fs)
+
+    assert np.array_equal(plan.freqs, freqs)
+    powers = plan.band_powers(psd)
+    for i, name in enumerate(plan.names):
+        expected = bandpower(freqs, psd, bands[name])
+        assert np.isclose(powers[i], expected, rtol=1e-12)
+        assert np.isclose(plan.band_power(psd, name), expected, rtol=1e-12)
+
+
+def test_plan_is_memoized_and_batched():
+    plan = EEG_BANDS.compile(fs, fs)
+    assert EEG_BANDS.compile(fs, fs) is plan
+    assert EEG_BANDS.compile_freqs(np.fft.rfftfreq(fs, 1 / fs)) is plan
+
+    psd = np.random.default_rng(1).random((5, plan.freqs.size))
+    batched = plan.band_powers(psd)
+    assert batched.shape == (5, len(EEG_BANDS))
+    assert np.allclose(batched[3], plan.band_powers(psd[3]))
+
+
+def test_composite_bands():
+    registry = BandRegistry(
+        {
+            "alpha1": (8, 10),
+            "alpha2": (10, 12),
+            "alpha": ["alpha1", "alpha2"],
+            "alpha_full": (8, 12),
+        }
+    )
+    psd = np.random.default_rng(2).random(fs // 2 + 1)
+    plan = registry.compile(fs, fs)
+
+    # On an integer-Hz grid alpha1 + alpha2 integrates exactly like 8-12 Hz
+    assert np.isclose(plan.band_power(psd, "alpha"), plan.band_power(psd, "alpha_full"))
+    assert registry.range("alpha") == (8, 12)
+
+    averaged = BandRegistry(registry.bands, integration="sum", composite="mean")
+    plan = averaged.compile(fs, fs)
+    expected = (psd[8:11].sum() + psd[10:13].sum()) / 2
+    assert np.isclose(plan.band_power(psd, "alpha"), expected)
+
+
+def test_invalid_definitions_raise():
+    with pytest.raises(KeyError):
+        BandRegistry({"alpha": ["alpha1", "alpha2"]})
+    with pytest.raises(ValueError):
+        BandRegistry({"a": ["b"], "b": ["a"]})
+    with pytest.raises(ValueError):
+        BandRegistry({"a": (1, 2)}, integration="simpson")
+
+
+def test_as_registry_reuses_dict_registries():
+    spec = {"theta": [4, 8], "alpha": [8, 12]}
+    assert as_registry(None) is EEG_BANDS
+    assert as_registry(spec, integration="mean") is as_registry(
+        dict(spec), integration="mean"
+    )
@@ -1,7 +1,28 @@
 import numpy as np
+import pandas as pd
+import pytest
 
 from awear_neuroscience.signal_processing.features import (
-    bandpower, bands, compute_psd, extract_band_features)
+    add_time_features,
+    apply_ema_filtering,
+    bandpower,
+    bands,
+    combine_moments,
+    compute_psd,
+    dpss_tapers,
+    extract_band_features,
+    normalize_indexes,
+    sliding_window_psd,
+)
+
+
+def make_features_df(n=60, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.random((n, len(bands))), columns=list(bands))
+    df["sample_entropy"] = rng.random(n)
+    df["document_name"] = rng.choice(["a@eeg.com", "b@eeg.com", "c@eeg.com"], n)
+    df["timestamp"] = pd.date_range("2025-07-01", periods=n, freq="s").astype(str)
+    return df
 
 
 def test_compute_psd_returns_correct_shape():
@@ -13,6 +34,57 @@ def test_compute_psd_returns_correct_shape():
     assert all(np.diff(freqs) > 0)
 
 
+def test_multitaper_psd_matches_welch_scale_with_lower_variance():
+    fs = 256
+    signals = np.random.default_rng(0).normal(size=(500, fs))
+    freqs_w, psd_w = compute_psd(signals, fs)
+    freqs_m, psd_m = compute_psd(signals, fs, method="multitaper", NW=2.5)
+
+    assert np.array_equal(freqs_w, freqs_m)
+    assert psd_m.shape == psd_w.shape
+    # White noise: both estimators agree on average power density
+    np.testing.assert_allclose(psd_m[:, 5:-5].mean(), psd_w[:, 5:-5].mean(), rtol=0.02)
+    # Averaging 4 tapers roughly halves the per-bin spread
+    assert psd_m[:, 20].std() < 0.7 * psd_w[:, 20].std()
+    assert dpss_tapers(fs, 2.5) is dpss_tapers(fs, 2.5)
+
+
+def test_sliding_window_psd_matches_explicit_windows():
+    fs = 256
+    signal = np.random.default_rng(3).normal(size=10 * fs)
+    freqs, psd, starts = sliding_window_psd(signal, fs, 2 * fs, fs // 2, batch_size=5)
+
+    assert list(starts) == list(range(0, 8 * fs + 1, fs // 2))
+    for i, start in enumerate(starts):
+        f, expected = compute_psd(signal[start : start + 2 * fs], fs)
+        assert np.array_equal(freqs, f)
+        np.testing.assert_allclose(psd[i], expected, rtol=1e-10)
+
+    _, psd, starts = sliding_window_psd(signal[:100], fs, 2 * fs, fs // 2)
+    assert psd.shape[0] == starts.size == 0
+
+
+@pytest.mark.parametrize("method", ["welch", "multitaper"])
+def test_sliding_window_psd_follows_compute_dtype(method):
+    fs = 256
+    signal = np.random.default_rng(3).normal(size=4 * fs)
+    _, reference, _ = sliding_window_psd(signal, fs, fs, fs // 2, method=method)
+    _, single, _ = sliding_window_psd(
+        signal.astype(np.float32),
+        fs,
+        fs,
+        fs // 2,
+        method=method,
+        precision="float32-compute",
+    )
+
+    assert reference.dtype == np.float64
+    assert single.dtype == np.float32
+    np.testing.assert_allclose(
+        single, reference, rtol=1e-3, atol=1e-6 * reference.max()
+    )
+
+
 def test_bandpower_matches_known_band():
     fs = 256
     t = np.arange(0, 1, 1 / fs)
@@ -42,3 +114,113 @@ def test_extract_band_features_metadata_and_keys():
     assert "alpha" in features and "beta" in features
     assert features["document_name"] == "test@eeg.com"
     assert features["segment"] == 1
+
+
+def test_apply_ema_filtering_matches_per_user_pandas_ewm():
+    df = make_features_df()
+    df.loc[3, "sample_entropy"] = np.nan
+    alpha = 0.3
+    out = apply_ema_filtering(df, alpha=alpha, precision="float64")
+
+    for _, group in df.groupby("document_name"):
+        for col in list(bands) + ["sample_entropy"]:
+            expected = group[col].ewm(alpha=alpha, adjust=False).mean().fillna(0)
+            np.testing.assert_allclose(
+                out.loc[group.index, f"{col}_fil"], expected, rtol=1e-12
+            )
+    np.testing.assert_allclose(
+        out["focus_index_fil"], out["beta_fil"] / (out["theta_fil"] + out["alpha_fil"])
+    )
+    assert "alpha_fil" not in df.columns
+
+
+def test_apply_ema_filtering_without_document_name():
+    df = make_features_df().drop(columns="document_name")
+    out = apply_ema_filtering(df, alpha=0.5, precision="float64")
+    expected = df["gamma"].ewm(alpha=0.5, adjust=False).mean()
+    np.testing.assert_allclose(out["gamma_fil"], expected, rtol=1e-12)
+
+
+def test_normalize_indexes_zscore_per_user():
+    df = make_features_df()
+    df.loc[df["document_name"] == "a@eeg.com", "theta"] = 2.0
+    out = normalize_indexes(df, ["alpha", "theta"])
+
+    for name, group in df.groupby("document_name"):
+        expected = (group["alpha"] - group["alpha"].mean()) / group["alpha"].std()
+        np.testing.assert_allclose(out.loc[group.index, "alpha_norm"], expected)
+    # Zero-variance users get 0 instead of a silently missing value
+    constant = df["document_name"] == "a@eeg.com"
+    assert (out.loc[constant, "theta_norm"] == 0).all()
+    assert out["theta_norm"].notna().all()
+
+
+def test_normalize_indexes_against_frozen_state():
+    df = make_features_df()
+    state = {}
+    full = normalize_indexes(df, ["alpha"], state=state, precision="float64")
+    counts = {user: s["count"].copy() for user, s in state["users"].items()}
+
+    # Rows z-scored against final statistics, without folding them in again
+    half = df.iloc[: len(df) // 2]
+    out = normalize_indexes(
+        half, ["alpha"], state=state, precision="float64", update_state=False
+    )
+    np.testing.assert_allclose(out["alpha_norm"], full.loc[half.index, "alpha_norm"])
+    for user, s in state["users"].items():
+        np.testing.assert_array_equal(s["count"], counts[user])
+
+
+def test_normalize_indexes_robust():
+    df = make_features_df()
+    out = normalize_indexes(df, ["beta"], method="robust")
+    for _, group in df.groupby("document_name"):
+        median = group["beta"].median()
+        mad = (group["beta"] - median).abs().median() * 1.4826
+        np.testing.assert_allclose(
+            out.loc[group.index, "beta_norm"], (group["beta"] - median) / mad
+        )
+
+
+def test_add_time_features_returns_new_frame():
+    df = pd.DataFrame(
+        {
+            "timestamp": ["2025-07-01T10:00:30Z", "2025-07-01T10:05:00Z"],
+            "document_name": ["a@eeg.com", "a@eeg.com"],
+            "session_id": [0, 0],
+        }
+    )
+    out = add_time_features(df, calendar=True, timezones={"a@eeg.com": "Europe/Rome"})
+
+    assert list(df.columns) == ["timestamp", "document_name", "session_id"]
+    np.testing.assert_allclose(
+        out["hours_since_midnight"], [10 + 30 / 3600, 10 + 5 / 60]
+    )
+    assert list(out["minutes_since_midnight"]) == [600, 605]
+    assert list(out["day_of_week"]) == [1, 1]
+    assert list(out["utc_offset_hours"]) == [2.0, 2.0]
+    np.testing.assert_allclose(out["minutes_since_session_start"], [0.0, 4.5])
+
+    # A column that is already datetime64 is used as is
+    parsed = df.assign(timestamp=pd.to_datetime(df["timestamp"]))
+    pd.testing.assert_series_equal(
+        add_time_features(parsed)["hours_since_midnight"], out["hours_since_midnight"]
+    )
+
+
+def test_combine_moments_matches_moments_of_the_union():
+    rng = np.random.default_rng(3)
+    a, b = rng.normal(0, 2, (40, 3)), rng.normal(5, 1, (25, 3))
+
+    def moments(x):
+        mean = x.mean(axis=0)
+        return np.full(3, len(x), float), mean, ((x - mean) ** 2).sum(axis=0)
+
+    count, mean, m2 = combine_moments(*moments(a), *moments(b))
+    for got, want in zip((count, mean, m2), moments(np.vstack([a, b]))):
+        np.testing.assert_allclose(got, want, rtol=1e-12)
+
+    # An empty side leaves the other unchanged
+    empty = (np.zeros(3), np.zeros(3), np.zeros(3))
+    for got, want in zip(combine_moments(*empty, *moments(b)), moments(b)):
+        np.testing.assert_allclose(got, want)
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from awear_neuroscience.pipeline.preprocess import (
+    extract_features_from_long_df,
+    process_features,
+    process_long_df,
+)
+from awear_neuroscience.signal_processing.filters import preprocess_segment
+from awear_neuroscience.signal_processing.precision import (
+    POLICIES,
+    dtype_policy,
+    get_policy,
+)
+from awear_neuroscience.signal_processing.spectral import fit_aperiodic
+
+FS = 256
+
+
+def make_long_df(n_segments=40, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(FS) / FS
+    waves = rng.normal(0, 4, (n_segments, FS)) + 8 * np.sin(2 * np.pi * 10 * t)
+    waves[n_segments // 2, 100] = 400  # artifact
+    return pd.DataFrame(
+        {
+            "waveform_value": waves.ravel().astype(np.float32),
+            "segment": np.repeat([f"seg_{i:02d}" for i in range(n_segments)], FS),
+            "time_UTC": np.repeat(
+                pd.date_range("2025-07-01", periods=n_segments, freq="s", tz="UTC"), FS
+            ),
+            "timestamp": np.repeat(
+                [f"2025-07-01T00:00:{i:02d}Z" for i in range(n_segments)], FS
+            ),
+            "focus_type": "calm",
+            "document_name": "a@eeg.com",
+        }
+    )
+
+
+def run(long_df, precision):
+    filtered = process_long_df(long_df, FS, precision=precision)
+    features = extract_features_from_long_df(
+        filtered, FS, spectral_shape=True, aperiodic=True, precision=precision
+    )
+    processed = process_features(
+        features, 0.3, ["alpha_fil", "focus_index_fil"], precision=precision
+    )
+    return filtered, processed
+
+
+def max_scaled_error(values, reference):
+    """Largest absolute error relative to the magnitude of the column."""
+    values, reference = np.asarray(values, float), np.asarray(reference, float)
+    return np.abs(values - reference).max() / np.abs(reference).max()
+
+
+def test_policy_resolution():
+    assert get_policy("float64") is POLICIES["float64"]
+    assert get_policy(POLICIES["float32-compute"]).compute == "float32"
+    with dtype_policy("float64"):
+        assert get_policy().signal == "float64"
+    assert get_policy().signal == "float32"
+    with pytest.raises(ValueError):
+        get_policy("float16")
+
+
+@pytest.mark.parametrize(
+    "precision, signal_tol, feature_tol",
+    [("float32", 1e-6, 1e-5), ("float32-compute", 1e-4, 1e-2)],
+)
+def test_single_precision_matches_float64_reference(precision, signal_tol, feature_tol):
+    long_df = make_long_df()
+    ref_long, ref = run(long_df, "float64")
+    out_long, out = run(long_df, precision)
+
+    assert out_long["filtered_value"].dtype == np.float32
+    assert out_long["abs_filtered"].dtype == np.float32
+    assert ref_long["filtered_value"].dtype == np.float64
+    assert out_long["filtered_value"].nbytes * 2 == ref_long["filtered_value"].nbytes
+    assert (out_long["is_artifact"] == ref_long["is_artifact"]).all()
+    assert (
+        max_scaled_error(out_long["filtered_value"], ref_long["filtered_value"])
+        < signal_tol
+    )
+
+    assert list(out.columns) == list(ref.columns)
+    # Signal features; time-of-day features keep their own dtype
+    floats = [
+        c
+        for c in ref.columns
+        if ref[c].dtype == np.float64 and c != "hours_since_midnight"
+    ]
+    assert all(out[c].dtype == np.float32 for c in floats)
+    for col in floats:
+        assert max_scaled_error(out[col], ref[col]) < feature_tol, col
+
+
+def test_float32_filtering_is_stable():
+    # Transfer-function coefficients of the 0.5 Hz high-pass blow up in float32
+    x = make_long_df(4)["waveform_value"].to_numpy().reshape(4, FS)
+    reference = preprocess_segment(x, FS)
+    single = preprocess_segment(x, FS, dtype=np.float32)
+
+    assert single.dtype == np.float32
+    assert max_scaled_error(single, reference) < 1e-4
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_aperiodic_fit_survives_zero_power_bins(dtype):
+    freqs = np.arange(1, 41, dtype=float)
+    psd = (10 / freqs**1.5)[None].astype(dtype)
+    psd[0, 5] = 0  # e.g. a notch-filtered bin
+
+    params = fit_aperiodic(freqs, psd)
+
+    for value in params.values():
+        assert np.isfinite(value).all()
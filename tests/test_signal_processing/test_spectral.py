@@ -0,0 +1,84 @@
+import numpy as np
+
+from awear_neuroscience.signal_processing.features import compute_psd
+from awear_neuroscience.signal_processing.spectral import (
+    fit_aperiodic,
+    hjorth_parameters,
+    periodic_band_powers,
+    spectral_edge_frequency,
+    spectral_entropy,
+    spectral_shape_features,
+)
+
+fs = 256
+t = np.arange(fs) / fs
+
+
+def make_segments():
+    rng = np.random.default_rng(0)
+    tone = np.sin(2 * np.pi * 10 * t)
+    noise = rng.normal(size=fs)
+    return np.vstack([tone, noise, tone + 0.1 * noise])
+
+
+def test_batched_features_match_single_segments():
+    signals = make_segments()
+    freqs, psd = compute_psd(signals, fs)
+    batch = spectral_shape_features(freqs, psd, signals)
+
+    for i, signal in enumerate(signals):
+        f, p = compute_psd(signal, fs)
+        single = spectral_shape_features(f, p, signal)
+        for name, values in batch.items():
+            np.testing.assert_allclose(values[i], single[name][0], rtol=1e-10)
+
+
+def test_spectral_shape_of_pure_tone():
+    signals = make_segments()
+    freqs, psd = compute_psd(signals, fs)
+    features = spectral_shape_features(freqs, psd, signals)
+
+    assert features["peak_alpha_freq"][0] == 10
+    assert features["sef50"][0] == 10
+    assert features["alpha_rel"][0] > 0.9
+    # A tone is far more ordered than white noise
+    entropy = spectral_entropy(freqs, psd)
+    assert entropy[0] < 0.3 < entropy[1] <= 1
+    sef = spectral_edge_frequency(freqs, psd, edges=(95,))
+    assert sef["sef95"][1] > sef["sef95"][0]
+
+
+def test_hjorth_parameters_of_sine():
+    """A sine's mobility is its angular frequency per sample and complexity ~1."""
+    signal = np.sin(2 * np.pi * 10 * np.arange(4 * fs) / fs)
+    hjorth = hjorth_parameters(signal[None, :])
+    np.testing.assert_allclose(hjorth["hjorth_activity"], 0.5, rtol=1e-3)
+    np.testing.assert_allclose(
+        hjorth["hjorth_mobility"], 2 * np.sin(np.pi * 10 / fs), rtol=1e-3
+    )
+    np.testing.assert_allclose(hjorth["hjorth_complexity"], 1.0, rtol=1e-2)
+
+
+def test_fit_aperiodic_recovers_power_law():
+    freqs = np.fft.rfftfreq(fs, 1 / fs)
+    exponents = np.array([1.0, 1.5, 2.0])
+    with np.errstate(divide="ignore"):
+        psd = 10 ** (2.0 - exponents[:, None] * np.log10(freqs[None, :]))
+    psd[:, 0] = 0.0
+    params = fit_aperiodic(freqs, psd)
+    np.testing.assert_allclose(params["aperiodic_exponent"], exponents)
+    np.testing.assert_allclose(params["aperiodic_offset"], 2.0)
+    np.testing.assert_allclose(params["aperiodic_r2"], 1.0)
+    # Nothing is left once the aperiodic component is removed
+    periodic = periodic_band_powers(freqs, psd, params)
+    alpha = (freqs >= 8) & (freqs <= 12)
+    assert np.all(periodic["alpha_periodic"] < 1e-9 * psd[:, alpha].sum(axis=1))
+
+
+def test_fit_aperiodic_with_knee():
+    freqs = np.fft.rfftfreq(fs, 1 / fs)
+    knee_freqs = np.array([2.0, 5.0, 10.0])
+    psd = 10 ** (3.0 - 2.0 * 0.5 * np.log10(5.0**2 + freqs**2))[None, :]
+    params = fit_aperiodic(freqs, psd, knee=True, knee_freqs=knee_freqs)
+    assert params["aperiodic_knee_freq"][0] == 5.0
+    np.testing.assert_allclose(params["aperiodic_exponent"], 2.0)
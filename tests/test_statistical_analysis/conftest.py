@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+SESSIONS = (("calm", 0.0, 40), ("stressed", 0.5, 55))
+
+
+@pytest.fixture
+def make_features():
+    """Factory of per-segment features of several users and session types."""
+
+    def make(n_users=3, n_features=6, seed=0, sessions=SESSIONS):
+        rng = np.random.default_rng(seed)
+        rows = []
+        for u in range(n_users):
+            for focus, shift, n in sessions:
+                values = rng.normal(shift * np.arange(n_features), 1, (n, n_features))
+                # Rounded columns carry ties
+                values[:, 1] = np.round(values[:, 1])
+                values[:, 2] = np.round(values[:, 2], 1)
+                frame = pd.DataFrame(
+                    values, columns=[f"f{j}" for j in range(n_features)]
+                )
+                frame["document_name"] = f"user{u}@eeg.com"
+                frame["focus_type"] = focus
+                rows.append(frame)
+        df = pd.concat(rows, ignore_index=True)
+        df.loc[rng.choice(len(df), 30, replace=False), "f3"] = np.nan
+        df.loc[df["document_name"] == "user2@eeg.com", "f5"] = np.nan
+        return df
+
+    make.sessions = SESSIONS
+    return make
@@ -0,0 +1,106 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from awear_neuroscience.statistical_analysis.resampling import (
+    bootstrap_matrix,
+    resampling_tests,
+    session_blocks,
+)
+from awear_neuroscience.statistical_analysis.statistical_tests import cohens_d
+
+
+def make_sessions(n_users=2, sessions=(3, 3), length=20, effect=1.0, seed=0):
+    """Segments of calm and stressed sessions sharing a per-session offset."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for u in range(n_users):
+        for focus, n_sessions, shift in (
+            ("calm", sessions[0], 0.0),
+            ("stressed", sessions[1], effect),
+        ):
+            for s in range(n_sessions):
+                offset = rng.normal(0, 0.5)
+                rows.append(
+                    pd.DataFrame(
+                        {
+                            "f0": shift + offset + rng.normal(0, 1, length),
+                            "f1": offset + rng.normal(0, 1, length),
+                            "document_name": f"user{u}@eeg.com",
+                            "focus_type": focus,
+                            "session_id": f"{focus}-{s}",
+                        }
+                    )
+                )
+    return pd.concat(rows, ignore_index=True)
+
+
+def test_small_designs_enumerate_all_session_permutations():
+    df = make_sessions(n_users=1)
+    result = resampling_tests(
+        df, ["f0", "f1"], n_bootstrap=0, statistic="mean_diff", n_workers=1
+    )
+
+    # Brute force: every choice of 3 of the 6 sessions as 'calm'
+    sessions = df["session_id"].unique().tolist()
+    observed = df.groupby("focus_type")["f0"].mean()
+    observed = observed["calm"] - observed["stressed"]
+    stats = []
+    for calm in combinations(sessions, 3):
+        mask = df["session_id"].isin(calm)
+        stats.append(df.loc[mask, "f0"].mean() - df.loc[~mask, "f0"].mean())
+    expected = np.mean(np.abs(stats) >= abs(observed) * (1 - 1e-12))
+
+    row = result.set_index("feature").loc["f0"]
+    assert row["exact"] and row["n_permutations"] == 20
+    assert (row["n_sessions_1"], row["n_sessions_2"]) == (3, 3)
+    assert row["mean_diff"] == pytest.approx(observed)
+    assert row["perm_pvalue"] == pytest.approx(expected)
+
+
+def test_results_are_reproducible_for_any_worker_count():
+    df = make_sessions(n_users=3, sessions=(6, 7), effect=2.0)
+    kwargs = dict(n_permutations=500, n_bootstrap=300, seed=7)
+
+    serial = resampling_tests(df, ["f0", "f1"], n_workers=1, **kwargs)
+    parallel = resampling_tests(df, ["f0", "f1"], n_workers=2, **kwargs)
+    reseeded = resampling_tests(df, ["f0", "f1"], n_workers=1, **{**kwargs, "seed": 8})
+
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert not np.allclose(serial["ci_low"], reseeded["ci_low"])
+    assert not serial["exact"].any()
+
+    f0 = serial[serial["feature"] == "f0"]
+    group = df[df["document_name"] == "user0@eeg.com"]
+    d = cohens_d(
+        group.loc[group["focus_type"] == "calm", "f0"],
+        group.loc[group["focus_type"] == "stressed", "f0"],
+    )
+    assert f0["cohens_d"].iloc[0] == pytest.approx(d)
+    # A large effect: the interval excludes 0 and contains the estimate
+    assert (f0["ci_high"] < 0).all()
+    assert ((f0["ci_low"] <= f0["cohens_d"]) & (f0["cohens_d"] <= f0["ci_high"])).all()
+    assert (f0["perm_pvalue"] < 0.01).all()
+
+
+def test_session_blocks_fall_back_to_runs_of_one_type():
+    group = pd.DataFrame(
+        {
+            "focus_type": ["calm", "calm", "stressed", "calm", "stressed"],
+            "timestamp": pd.date_range("2025-07-01", periods=5, freq="min")[
+                [0, 1, 3, 2, 4]
+            ],
+        }
+    )
+    # Time order: calm, calm, calm, stressed, stressed
+    np.testing.assert_array_equal(session_blocks(group), [0, 0, 1, 0, 1])
+
+
+def test_bootstrap_draws_sessions_within_each_type():
+    labels = np.array([True, True, False, False, False])
+    counts = bootstrap_matrix(labels, 200, np.random.default_rng(0))
+
+    np.testing.assert_array_equal(counts[:, labels].sum(axis=1), 2)
+    np.testing.assert_array_equal(counts[:, ~labels].sum(axis=1), 3)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import ks_2samp, ttest_ind
+
+from awear_neuroscience.statistical_analysis.session_stats import (
+    SessionStats,
+    compress_sketch,
+    sketch_ks,
+    sketch_quantiles,
+)
+from awear_neuroscience.statistical_analysis.statistical_tests import cohens_d
+
+FEATURES = [f"f{j}" for j in range(4)]
+
+
+def test_incremental_updates_match_statistics_of_all_rows(tmp_path, make_features):
+    df = make_features(n_features=4)
+    stats = SessionStats(FEATURES)
+    # Sessions arrive in batches; the store survives a save / load
+    shuffled = df.sample(frac=1, random_state=0)
+    for i, start in enumerate(range(0, len(df), len(df) // 3 + 1)):
+        stats.update(shuffled.iloc[start : start + len(df) // 3 + 1])
+        if i == 0:
+            stats.save(tmp_path / "stats.json")
+            stats = SessionStats.load(tmp_path / "stats.json")
+
+    summary = stats.summary().set_index(["document_name", "focus_type", "feature"])
+    expected = df.melt(
+        ["document_name", "focus_type"], FEATURES, var_name="feature"
+    ).groupby(["document_name", "focus_type", "feature"])["value"]
+    np.testing.assert_allclose(
+        summary.loc[expected.mean().index, "mean"], expected.mean(), rtol=1e-12
+    )
+    np.testing.assert_allclose(
+        summary.loc[expected.std().index, "std"], expected.std(), rtol=1e-10
+    )
+    # Up to sketch_size rows the sketch holds the raw values
+    np.testing.assert_allclose(
+        summary.loc[expected.median().index, "median"], expected.median(), rtol=1e-12
+    )
+
+    result = stats.compare("calm", "stressed")
+    assert len(result) == 3 * 4
+    for row in result.itertuples():
+        group = df[df["document_name"] == row.document_name]
+        a = group.loc[group["focus_type"] == "calm", row.feature].dropna()
+        b = group.loc[group["focus_type"] == "stressed", row.feature].dropna()
+        welch = ttest_ind(a, b, equal_var=False)
+        np.testing.assert_allclose(
+            [row.cohens_d, row.welch_t, row.welch_pvalue, row.ks_stat],
+            [cohens_d(a, b), welch.statistic, welch.pvalue, ks_2samp(a, b).statistic],
+            rtol=1e-9,
+        )
+
+
+def test_merged_stores_equal_one_store(make_features):
+    df = make_features(n_features=4)
+    first, second = df.iloc[::2], df.iloc[1::2]
+    single = SessionStats(FEATURES, sketch_size=16)
+    single.update(df)
+    merged = SessionStats(FEATURES, sketch_size=16)
+    merged.update(first)
+    other = SessionStats(FEATURES, sketch_size=16)
+    other.update(second)
+    merged.merge(other)
+
+    for key, group in single.groups.items():
+        for stat in ("count", "mean", "m2"):
+            np.testing.assert_allclose(
+                merged.groups[key][stat], group[stat], rtol=1e-10
+            )
+    with pytest.raises(ValueError):
+        merged.merge(SessionStats(["f0"]))
+
+
+def test_compressed_sketch_tracks_quantiles_and_ks():
+    rng = np.random.default_rng(1)
+    x = rng.normal(0, 1, (3, 5000))
+    y = rng.normal(0.3, 1.5, (3, 4000))
+    points_x, weights_x = np.full((3, 0), np.nan), np.zeros((3, 0))
+    points_y, weights_y = np.full((3, 0), np.nan), np.zeros((3, 0))
+    # Values arrive in sessions of 250
+    for start in range(0, 5000, 250):
+        points_x, weights_x = compress_sketch(
+            np.hstack([points_x, x[:, start : start + 250]]),
+            np.hstack([weights_x, np.ones((3, 250))]),
+            100,
+        )
+        points_y, weights_y = compress_sketch(
+            np.hstack([points_y, y[:, start : start + 250]]),
+            np.hstack([weights_y, np.ones((3, min(250, max(0, 4000 - start))))]),
+            100,
+        )
+
+    assert points_x.shape == (3, 100)
+    np.testing.assert_allclose(weights_x.sum(axis=1), 5000)
+    for q in (0.1, 0.5, 0.9):
+        estimate = sketch_quantiles(points_x, weights_x, q)
+        # Rank error of the estimates
+        ranks = (x <= estimate[:, None]).mean(axis=1)
+        np.testing.assert_allclose(ranks, q, atol=0.02)
+    exact = [ks_2samp(a, b).statistic for a, b in zip(x, y)]
+    np.testing.assert_allclose(
+        sketch_ks(points_x, weights_x, points_y, weights_y), exact, atol=0.02
+    )
@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import (
+    f_oneway,
+    kruskal,
+    ks_2samp,
+    kstwo,
+    mannwhitneyu,
+    rankdata,
+    ttest_ind,
+)
+
+from awear_neuroscience.statistical_analysis.statistical_tests import (
+    average_ranks,
+    benjamini_hochberg,
+    cohens_d,
+    compare_groups,
+    compare_session_types,
+    ks_pvalue,
+    two_sample_tests,
+)
+
+
+def test_average_ranks_match_rankdata_with_ties_and_nans():
+    values = np.array([[3.0, 1.0], [1.0, np.nan], [3.0, 1.0], [2.0, 0.0]])
+    ranks, tie_term = average_ranks(values)
+
+    np.testing.assert_array_equal(ranks[:, 0], rankdata(values[:, 0]))
+    np.testing.assert_array_equal(ranks[:, 1], [2.5, np.nan, 2.5, 1.0])
+    np.testing.assert_array_equal(tie_term, [6.0, 6.0])
+
+
+def test_compare_session_types_matches_scalar_scipy_tests(make_features):
+    df = make_features()
+    features = [f"f{j}" for j in range(6)]
+    result = compare_session_types(df, features)
+    fast = compare_session_types(df, features, exact=False)
+
+    # f5 is all-NaN for user2
+    assert len(result) == 3 * 6 - 1
+    assert result.columns.tolist()[:4] == [
+        "document_name",
+        "feature",
+        "focus_type_1",
+        "focus_type_2",
+    ]
+    for row, approx in zip(result.itertuples(), fast.itertuples()):
+        group = df[df["document_name"] == row.document_name]
+        a = group.loc[group["focus_type"] == "calm", row.feature].dropna()
+        b = group.loc[group["focus_type"] == "stressed", row.feature].dropna()
+        # scipy's defaults, as before vectorization
+        ks = ks_2samp(a, b)
+        mw = mannwhitneyu(a, b, alternative="two-sided")
+
+        assert (row.n1, row.n2) == (len(a), len(b))
+        np.testing.assert_allclose(
+            [row.ks_stat, row.ks_pvalue, row.mw_stat, row.mw_pvalue, row.cohens_d],
+            [ks.statistic, ks.pvalue, mw.statistic, mw.pvalue, abs(cohens_d(a, b))],
+            rtol=1e-10,
+            atol=1e-300,
+        )
+        assert approx.ks_stat == row.ks_stat
+        np.testing.assert_allclose(approx.ks_pvalue, ks.pvalue, rtol=0.03, atol=0.03)
+        asymptotic = mannwhitneyu(a, b, alternative="two-sided", method="asymptotic")
+        np.testing.assert_allclose(approx.mw_pvalue, asymptotic.pvalue, rtol=1e-10)
+
+
+def test_two_sample_tests_small_samples_use_exact_pvalues():
+    rng = np.random.default_rng(5)
+    x, y = rng.normal(0, 1, (6, 3)), rng.normal(1, 1, (7, 3))
+    tests = two_sample_tests(x, y)
+    fast = two_sample_tests(x, y, exact=False)
+
+    for j in range(3):
+        ks = ks_2samp(x[:, j], y[:, j])
+        mw = mannwhitneyu(x[:, j], y[:, j], alternative="two-sided")
+        np.testing.assert_allclose(tests["ks_pvalue"][j], ks.pvalue, rtol=1e-12)
+        np.testing.assert_allclose(tests["mw_pvalue"][j], mw.pvalue, rtol=1e-12)
+    # The approximations differ noticeably at this size
+    assert not np.allclose(fast["mw_pvalue"], tests["mw_pvalue"], rtol=1e-3)
+
+
+def test_two_sample_tests_large_samples_skip_scipy(monkeypatch):
+    from awear_neuroscience.statistical_analysis import statistical_tests
+
+    rng = np.random.default_rng(6)
+    x, y = rng.normal(0, 1, (120, 4)), rng.normal(0.3, 1, (150, 4))
+    expected = [ks_2samp(a, b).pvalue for a, b in zip(x.T, y.T)]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("scipy called for a large sample")
+
+    monkeypatch.setattr(statistical_tests, "ks_2samp", fail)
+    monkeypatch.setattr(statistical_tests, "mannwhitneyu", fail)
+    tests = two_sample_tests(x, y)
+
+    np.testing.assert_array_equal(
+        tests["ks_pvalue"], two_sample_tests(x, y, exact=False)["ks_pvalue"]
+    )
+    np.testing.assert_allclose(tests["ks_pvalue"], expected, atol=0.03)
+
+
+@pytest.mark.parametrize("n1, n2", [(20, 30), (40, 55), (300, 250)])
+def test_ks_pvalue_follows_scipy_asymptotic_distribution(n1, n2):
+    d = np.linspace(0.01, 0.8, 80)
+    # What ks_2samp(method="asymp") evaluates
+    reference = kstwo.sf(d, round(n1 * n2 / (n1 + n2)))
+    p = ks_pvalue(d, n1, n2)
+
+    np.testing.assert_allclose(p, reference, atol=0.03)
+    significant = reference > 1e-3
+    significant &= reference < 0.05
+    np.testing.assert_allclose(p[significant], reference[significant], rtol=0.04)
+
+
+def test_compare_groups_matches_scipy_omnibus_and_pairwise_tests(make_features):
+    sessions = make_features.sessions + (("focused", 1.0, 30), ("relaxed", 0.2, 12))
+    df = make_features(n_users=2, n_features=4, sessions=sessions)
+    features = [f"f{j}" for j in range(4)]
+    omnibus, pairwise = compare_groups(df, features)
+
+    assert len(omnibus) == 2 * 4
+    assert len(pairwise) == 2 * 4 * 6
+    for row in omnibus.itertuples():
+        group = df[df["document_name"] == row.document_name]
+        samples = [
+            s[row.feature].dropna() for _, s in group.groupby("focus_type", sort=False)
+        ]
+        kw, anova = kruskal(*samples), f_oneway(*samples)
+        np.testing.assert_allclose(
+            [row.kw_stat, row.kw_pvalue, row.anova_f, row.anova_pvalue],
+            [kw.statistic, kw.pvalue, anova.statistic, anova.pvalue],
+            rtol=1e-9,
+        )
+
+    for row in pairwise.itertuples():
+        group = df[df["document_name"] == row.document_name]
+        a = group.loc[group["focus_type"] == row.focus_type_1, row.feature].dropna()
+        b = group.loc[group["focus_type"] == row.focus_type_2, row.feature].dropna()
+        mw = mannwhitneyu(a, b, alternative="two-sided")
+        welch = ttest_ind(a, b, equal_var=False)
+        np.testing.assert_allclose(
+            [row.mw_stat, row.mw_pvalue, row.welch_t, row.welch_pvalue, row.cohens_d],
+            [mw.statistic, mw.pvalue, welch.statistic, welch.pvalue, cohens_d(a, b)],
+            rtol=1e-9,
+        )
+        u_share = mw.statistic / (len(a) * len(b))
+        assert row.rank_biserial == pytest.approx(2 * u_share - 1)
+
+    # Dunn's z uses the ranks over all four groups
+    group = df[df["document_name"] == "user0@eeg.com"]
+    ranks = pd.Series(rankdata(group["f0"]), index=group.index)
+    mean_rank = ranks.groupby(group["focus_type"]).mean()
+    n = group["focus_type"].value_counts()
+    scale = len(group) * (len(group) + 1) / 12  # f0 has no ties
+    z = (mean_rank["calm"] - mean_rank["focused"]) / np.sqrt(
+        scale * (1 / n["calm"] + 1 / n["focused"])
+    )
+    row = pairwise[
+        (pairwise["document_name"] == "user0@eeg.com")
+        & (pairwise["feature"] == "f0")
+        & (pairwise["focus_type_2"] == "focused")
+        & (pairwise["focus_type_1"] == "calm")
+    ]
+    assert row["dunn_z"].item() == pytest.approx(z)
+
+    np.testing.assert_array_equal(
+        pairwise["welch_qvalue"], benjamini_hochberg(pairwise["welch_pvalue"])
+    )
+
+
+def test_compare_groups_uses_exact_mann_whitney_for_small_groups(make_features):
+    sessions = make_features.sessions + (("brief", 1.0, 6),)
+    df = make_features(n_users=1, n_features=3, sessions=sessions)
+    features = [f"f{j}" for j in range(3)]
+    _, pairwise = compare_groups(df, features)
+    _, fast = compare_groups(df, features, exact=False)
+
+    for row, approx in zip(pairwise.itertuples(), fast.itertuples()):
+        a = df.loc[df["focus_type"] == row.focus_type_1, row.feature].dropna()
+        b = df.loc[df["focus_type"] == row.focus_type_2, row.feature].dropna()
+        mw = mannwhitneyu(a, b, alternative="two-sided")
+        asymptotic = mannwhitneyu(a, b, alternative="two-sided", method="asymptotic")
+        assert row.mw_pvalue == pytest.approx(mw.pvalue, rel=1e-12)
+        assert approx.mw_pvalue == pytest.approx(asymptotic.pvalue, rel=1e-12)
+    assert (pairwise["focus_type_2"] == "brief").any()
+
+
+def test_benjamini_hochberg_adjusts_across_the_family():
+    p = np.array([0.01, np.nan, 0.04, 0.03, 0.005, 0.5])
+    expected = [0.025, np.nan, 0.05, 0.05, 0.025, 0.5]
+
+    np.testing.assert_allclose(benjamini_hochberg(p), expected)
@@ -0,0 +1,90 @@
+import json
+import urllib.request
+
+import numpy as np
+
+from awear_neuroscience.data_extraction.constants import SAMPLING_RATE, WAVEFORM_KEY
+from awear_neuroscience.data_extraction.firestore_loader import process_eeg_records
+from awear_neuroscience.pipeline.preprocess import (
+    extract_features_from_long_df,
+    process_features,
+    process_long_df,
+)
+from awear_neuroscience.utils import profiling
+from awear_neuroscience.utils.profiling import Profiler
+
+
+def make_records(n=20):
+    rng = np.random.default_rng(0)
+    return [
+        {
+            "timestamp": f"2025-07-01T10:00:{i:02d}.000000Z",
+            WAVEFORM_KEY: rng.normal(0, 4, SAMPLING_RATE).tolist(),
+            "focus_type": "calm",
+            "document_name": "a@eeg.com",
+            "session_id": 0,
+        }
+        for i in range(n)
+    ]
+
+
+def run_pipeline(records):
+    long_df = process_long_df(process_eeg_records(records, return_long=True), 256)
+    features = extract_features_from_long_df(long_df, 256)
+    return process_features(features, 0.3)
+
+
+def test_profiler_reports_every_stage():
+    records = make_records()
+    with Profiler() as profiler:
+        run_pipeline(records)
+    report = profiler.report()
+
+    stages = report["stages"]
+    assert list(stages) == [
+        "process_eeg_records",
+        "process_long_df",
+        "extract_features_from_long_df",
+        "process_features",
+    ]
+    assert all(s["calls"] == 1 and s["wall_s"] > 0 for s in stages.values())
+    assert stages["process_eeg_records"]["records"] == 20
+    assert stages["process_long_df"]["records"] == 20 * SAMPLING_RATE
+    assert stages["process_long_df"]["segments"] == 20
+    assert stages["process_features"]["segments_per_s"] > 0
+    assert stages["process_long_df"]["peak_bytes"] > 20 * SAMPLING_RATE * 8
+
+    # Nothing is recorded once the profiler is stopped
+    run_pipeline(records)
+    assert profiler.report()["stages"]["process_long_df"]["calls"] == 1
+    assert profiling.active() is None
+
+
+def test_nested_stage_peaks_reach_the_outer_stage():
+    with Profiler() as profiler:
+        with profiler.stage("outer"):
+            with profiler.stage("inner"):
+                block = np.ones(2**20)
+                del block
+    stages = profiler.report()["stages"]
+    assert stages["inner"]["peak_bytes"] >= 8 * 2**20
+    assert stages["outer"]["peak_bytes"] >= stages["inner"]["peak_bytes"]
+
+
+def test_metrics_endpoint_and_stack_dump(tmp_path):
+    with Profiler(sample_interval=0.001) as profiler:
+        server = profiler.serve(0)
+        run_pipeline(make_records(n=40))
+        port = server.server_address[1]
+        metrics = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read()
+        report = json.loads(
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/report").read()
+        )
+        server.shutdown()
+    profiler.dump(tmp_path / "report.json", tmp_path / "stacks.txt")
+
+    assert b'awear_stage_calls_total{stage="process_long_df"} 1' in metrics
+    assert report["stages"]["process_features"]["calls"] == 1
+    assert json.loads((tmp_path / "report.json").read_text())["stages"]
+    stacks = (tmp_path / "stacks.txt").read_text().splitlines()
+    assert stacks and any("process_long_df" in line for line in stacks)